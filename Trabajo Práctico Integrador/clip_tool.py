@@ -0,0 +1,197 @@
+"""Graba clips de frames crudos (.npy mapeado en memoria) y mide el pipeline sobre ellos.
+Ejecutar:   python clip_tool.py record --source rtsp://usuario:clave@IP:554/Streaming/Channels/102 --frames 300 --output clip.npy
+            python clip_tool.py bench --clip clip.npy --imgsz 416
+            python clip_tool.py bench --clip clip.npy --imgsz 416 --backend openvino
+            python clip_tool.py batch --clip clip.npy --producers 4 --max_batch 4 --max_wait 10
+Los clips se sirven sin decodificar (CapturaClip), así el benchmark mide solo:
+- Detector (inferencia YOLO)
+- Tracker (ByteTrack o SimpleTracker)
+- Overlay (zonas, bounding boxes y panel)
+El subcomando batch simula N cámaras sobre el mismo clip contra un único PlanificadorLotes
+y reporta rendimiento, tamaño medio de lote, espera en cola y latencia por solicitud.
+Un clip también sirve como fuente de main.py: python main.py --source clip.npy
+"""
+import argparse
+import statistics
+import threading
+import time
+import cv2
+from src.clips import CapturaClip, grabar_clip
+from src.detector import BACKENDS, Detector
+from src.overlay import dibujar_bounding_box, dibujar_panel_estadisticas, dibujar_zona
+from src.planificador_lotes import PlanificadorLotes
+from src.screen_capture import crear_fuente_pantalla
+from src.tracker import SimpleTracker
+from src.zonas import GestorZonas
+
+try:
+    from src.bytetrack_wrapper import ByteTrackWrapper
+    BYTETRACK_AVAILABLE = True
+except ImportError:
+    BYTETRACK_AVAILABLE = False
+
+#region Constantes
+
+FRAMES_CLIP_DEFECTO = 300
+FRAMES_CALENTAMIENTO = 5  # Iteraciones iniciales excluidas de las estadísticas
+
+#endregion
+
+#region Funciones Auxiliares
+
+def crear_tracker():
+    if BYTETRACK_AVAILABLE:
+        try:
+            tracker = ByteTrackWrapper()
+            return 'ByteTrack', tracker.actualizar_columnas
+        except ImportError:
+            pass
+    tracker = SimpleTracker()
+    return 'SimpleTracker', tracker.actualizar_columnas
+
+def dibujar_pipeline(frame, zonas, tracks):
+    for poligono in zonas:
+        dibujar_zona(frame, poligono)
+    for bbox, track_id in zip(tracks.xyxy, tracks.track_id):
+        dibujar_bounding_box(frame, bbox, etiqueta=f"ID:{track_id}")
+    dibujar_panel_estadisticas(frame, {'Tracks': len(tracks)})
+
+def resumir(nombre, tiempos):
+    tiempos_ms = sorted(t * 1000 for t in tiempos)
+    p95 = tiempos_ms[int(len(tiempos_ms) * 0.95) - 1] if len(tiempos_ms) >= 20 else tiempos_ms[-1]
+    print(f"{nombre:<10}{statistics.mean(tiempos_ms):>10.2f}ms{statistics.median(tiempos_ms):>10.2f}ms{p95:>10.2f}ms")
+
+#endregion
+
+#region Funciones Principales
+
+def grabar(args):
+    cap = crear_fuente_pantalla(args.source, transporte_rtsp=args.rtsp_transport)
+    if not cap.isOpened():
+        print(f"[Clip] No se pudo abrir la fuente: {args.source}")
+        return
+    print(f"[Clip] Grabando {args.frames} frames de {args.source}...")
+    inicio = time.time()
+    grabados = grabar_clip(cap, args.output, args.frames)
+    cap.release()
+    print(f"[Clip] {grabados} frames guardados en {args.output} ({time.time() - inicio:.1f}s)")
+
+def medir(args):
+    cap = CapturaClip(args.clip, repetir=True)
+    if not cap.isOpened():
+        return
+    detector = Detector(pesos=args.weights, umbral_confianza=args.conf, tam_imagen=args.imgsz, backend=args.backend, datos_calibracion=args.calib_data)
+    nombre_tracker, actualizar_tracker = crear_tracker()
+    zonas = GestorZonas(args.zones)
+    zonas.cargar()
+    tiempos = {'detector': [], 'tracker': [], 'overlay': []}
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    iteraciones = args.iterations or total_frames
+    print(f"[Bench] {args.clip}: {total_frames} frames, {iteraciones} iteraciones, imgsz {args.imgsz}, {args.backend}, {nombre_tracker}")
+    for iteracion in range(FRAMES_CALENTAMIENTO + iteraciones):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        inicio = time.perf_counter()
+        detecciones = detector.detectar_columnas(frame)
+        fin_detector = time.perf_counter()
+        tracks = actualizar_tracker(detecciones)
+        fin_tracker = time.perf_counter()
+        dibujar_pipeline(frame, zonas.zonas, tracks)
+        fin_overlay = time.perf_counter()
+        if iteracion < FRAMES_CALENTAMIENTO:
+            continue
+        tiempos['detector'].append(fin_detector - inicio)
+        tiempos['tracker'].append(fin_tracker - fin_detector)
+        tiempos['overlay'].append(fin_overlay - fin_tracker)
+    cap.release()
+    if not tiempos['detector']:
+        print("[Bench] Clip sin frames suficientes")
+        return
+    print("\n=== BENCHMARK DEL PIPELINE (sin decodificación) ===")
+    print(f"{'Etapa':<10}{'Media':>12}{'Mediana':>12}{'P95':>12}")
+    for nombre, valores in tiempos.items():
+        resumir(nombre, valores)
+    total = [sum(etapas) for etapas in zip(*tiempos.values())]
+    resumir('total', total)
+    print(f"FPS del pipeline: {1.0 / statistics.mean(total):.1f}")
+    print("=" * 46 + "\n")
+
+# Cada productor lee su propia CapturaClip y detecta a través del planificador compartido
+def medir_lotes(args):
+    detector = Detector(pesos=args.weights, umbral_confianza=args.conf, tam_imagen=args.imgsz, backend=args.backend, datos_calibracion=args.calib_data)
+    capturas = [CapturaClip(args.clip, repetir=True) for _ in range(args.producers)]
+    if not all(cap.isOpened() for cap in capturas):
+        return
+    for _ in range(FRAMES_CALENTAMIENTO):
+        detector.detectar_lote([capturas[0].read()[1]] * args.max_batch)
+    planificador = PlanificadorLotes(detector, tamano_lote_maximo=args.max_batch, espera_maxima=args.max_wait / 1000.0)
+    iteraciones = args.iterations or int(capturas[0].get(cv2.CAP_PROP_FRAME_COUNT))
+    procesados = [0] * args.producers
+
+    def producir(indice):
+        cap = capturas[indice]
+        for _ in range(iteraciones):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            planificador.detectar(frame)
+            procesados[indice] += 1
+
+    print(f"[Bench] {args.clip}: {args.producers} productores x {iteraciones} frames, lote max {args.max_batch}, espera max {args.max_wait}ms")
+    hilos = [threading.Thread(target=producir, args=(i,)) for i in range(args.producers)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+    planificador.detener()
+    for cap in capturas:
+        cap.release()
+    metricas = planificador.obtener_metricas()
+    print("\n=== BENCHMARK DE MICRO-LOTES ===")
+    print(f"Frames detectados:   {sum(procesados)} en {duracion:.2f}s ({sum(procesados) / duracion:.1f} FPS totales)")
+    print(f"Lotes ejecutados:    {metricas['lotes']} (tamaño medio {metricas['tamano_lote_medio']:.2f})")
+    print(f"Espera en cola:      {metricas['espera_cola_media_ms']:.2f}ms media")
+    print(f"Inferencia por lote: {metricas['inferencia_media_ms']:.2f}ms media")
+    print(f"Latencia solicitud:  p50 {metricas['latencia_p50_ms']:.2f}ms, p95 {metricas['latencia_p95_ms']:.2f}ms")
+    print("=" * 46 + "\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Graba clips crudos .npy y mide el pipeline sin decodificación")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    parser_record = subparsers.add_parser("record", help="Grabar N frames de una fuente en un .npy")
+    parser_record.add_argument("--source", required=True, help="Fuente de video (igual que main.py)")
+    parser_record.add_argument("--frames", type=int, default=FRAMES_CLIP_DEFECTO, help="Frames a grabar (default: 300)")
+    parser_record.add_argument("--output", default="clip.npy", help="Archivo .npy de salida")
+    parser_record.add_argument("--rtsp_transport", default="tcp", choices=["tcp", "udp"], help="Transporte RTSP (default: tcp)")
+    parser_bench = subparsers.add_parser("bench", help="Medir detector, tracker y overlay sobre un clip")
+    parser_bench.add_argument("--clip", required=True, help="Archivo .npy grabado con 'record'")
+    parser_bench.add_argument("--weights", default=None, help="Ruta a pesos YOLO")
+    parser_bench.add_argument("--conf", type=float, default=0.53, help="Umbral de confianza")
+    parser_bench.add_argument("--imgsz", type=int, default=640, help="Tamano de imagen para inferencia")
+    parser_bench.add_argument("--backend", default="pytorch", choices=list(BACKENDS), help="Runtime de inferencia")
+    parser_bench.add_argument("--calib_data", default=None, help="calibracion.yaml para openvino_int8")
+    parser_bench.add_argument("--zones", default="zonas.json", help="Archivo JSON con zonas a dibujar")
+    parser_bench.add_argument("--iterations", type=int, default=0, help="Frames a medir (0=una pasada del clip)")
+    parser_batch = subparsers.add_parser("batch", help="Medir el planificador de micro-lotes con N productores")
+    parser_batch.add_argument("--clip", required=True, help="Archivo .npy grabado con 'record'")
+    parser_batch.add_argument("--weights", default=None, help="Ruta a pesos YOLO")
+    parser_batch.add_argument("--conf", type=float, default=0.53, help="Umbral de confianza")
+    parser_batch.add_argument("--imgsz", type=int, default=640, help="Tamano de imagen para inferencia")
+    parser_batch.add_argument("--backend", default="pytorch", choices=list(BACKENDS), help="Runtime de inferencia")
+    parser_batch.add_argument("--calib_data", default=None, help="calibracion.yaml para openvino_int8")
+    parser_batch.add_argument("--producers", type=int, default=4, help="Productores concurrentes (camaras simuladas)")
+    parser_batch.add_argument("--max_batch", type=int, default=4, help="Frames maximos por inferencia")
+    parser_batch.add_argument("--max_wait", type=float, default=10.0, help="Espera maxima para completar un lote en ms")
+    parser_batch.add_argument("--iterations", type=int, default=0, help="Frames por productor (0=una pasada del clip)")
+    args = parser.parse_args()
+    if args.command == "record":
+        grabar(args)
+    elif args.command == "batch":
+        medir_lotes(args)
+    else:
+        medir(args)
+
+#endregion
@@ -0,0 +1,153 @@
+"""Herramienta para medir la latencia de ingesta de un stream con cada perfil RTSP.
+Ejecutar:   python latency_tool.py --source rtsp://usuario:clave@IP:554/Streaming/Channels/101
+            python latency_tool.py --source rtsp://... --rtsp_transport udp --profiles low_latency
+Mide por perfil:
+- Tiempo de apertura y tiempo hasta el primer frame
+- Intervalo mediano entre frames leyendo sin pausas
+- Latencia de buffer: se deja de leer durante --pause segundos (como cuando la inferencia
+  se atrasa) y luego se cuentan los frames que llegan "de golpe" porque ya estaban en buffer.
+  Frames en buffer x intervalo entre frames = antigüedad del frame que se procesaría.
+Con --e2e N (fuente con marcas de tiempo, p.ej. stream_server.py --timestamps) se lee N segundos
+a través del supervisor de reconexión y se informa la latencia extremo a extremo y la
+recuperación ante cortes:
+            python latency_tool.py --source http://127.0.0.1:8080/video --e2e 60
+"""
+import argparse
+import statistics
+import time
+from src.marcas_tiempo import latencia_marca_tiempo
+from src.screen_capture import PERFILES_RTSP, TIMEOUT_RTSP_DEFECTO, crear_fuente_pantalla
+
+#region Constantes
+
+SEGUNDOS_CALENTAMIENTO = 3.0
+SEGUNDOS_PAUSA = 2.0
+FRACCION_INTERVALO_BUFFER = 0.5  # Lecturas más rápidas que esta fracción del intervalo venían del buffer
+MAXIMO_FRAMES_DRENAJE = 1000
+
+#endregion
+
+#region Funciones Auxiliares
+
+def medir_intervalos(cap, segundos):
+    intervalos = []
+    anterior = time.time()
+    fin = anterior + segundos
+    while time.time() < fin:
+        ret, _ = cap.read()
+        if not ret:
+            break
+        ahora = time.time()
+        intervalos.append(ahora - anterior)
+        anterior = ahora
+    return intervalos
+
+def contar_frames_en_buffer(cap, intervalo):
+    frames = 0
+    while frames < MAXIMO_FRAMES_DRENAJE:
+        inicio = time.time()
+        ret, _ = cap.read()
+        if not ret or time.time() - inicio > intervalo * FRACCION_INTERVALO_BUFFER:
+            break
+        frames += 1
+    return frames
+
+def percentil(valores, fraccion):
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * fraccion), len(ordenados) - 1)]
+
+def mostrar_resultados(resultados):
+    print("\n=== LATENCIA POR PERFIL ===")
+    print(f"{'Perfil':<14}{'Apertura':>10}{'1er frame':>11}{'Intervalo':>11}{'En buffer':>11}{'Latencia':>11}")
+    for r in resultados:
+        if r is None:
+            continue
+        if not r['abierto']:
+            print(f"{r['perfil']:<14}{'no se pudo abrir':>54}")
+            continue
+        print(f"{r['perfil']:<14}{r['apertura']:>9.2f}s{r['primer_frame']:>10.2f}s"
+              f"{r['intervalo'] * 1000:>9.1f}ms{r['frames_buffer']:>11d}{r['latencia_buffer'] * 1000:>9.0f}ms")
+    print("=" * 68 + "\n")
+
+#endregion
+
+#region Funciones Principales
+
+def medir_perfil(source, perfil, transporte, timeout, calentamiento, pausa):
+    print(f"\n[Latencia] Perfil '{perfil}' ({transporte.upper()})")
+    inicio = time.time()
+    cap = crear_fuente_pantalla(source, transporte_rtsp=transporte, timeout=timeout, perfil_rtsp=perfil)
+    apertura = time.time() - inicio
+    if not cap.isOpened():
+        cap.release()
+        return {'perfil': perfil, 'abierto': False}
+    ret, _ = cap.read()
+    primer_frame = time.time() - inicio
+    intervalos = medir_intervalos(cap, calentamiento) if ret else []
+    if not intervalos:
+        cap.release()
+        return {'perfil': perfil, 'abierto': False}
+    intervalo = statistics.median(intervalos)
+    # Simular un consumidor lento: el stream sigue llegando y se acumula en los buffers
+    time.sleep(pausa)
+    frames_buffer = contar_frames_en_buffer(cap, intervalo)
+    cap.release()
+    return {
+        'perfil': perfil,
+        'abierto': True,
+        'apertura': apertura,
+        'primer_frame': primer_frame,
+        'intervalo': intervalo,
+        'frames_buffer': frames_buffer,
+        'latencia_buffer': frames_buffer * intervalo,
+    }
+
+def medir_extremo_a_extremo(source, perfil, transporte, timeout, segundos, max_reintentos):
+    print(f"\n[Latencia] Extremo a extremo durante {segundos:.0f}s (perfil '{perfil}')")
+    cap = crear_fuente_pantalla(source, transporte_rtsp=transporte, timeout=timeout, perfil_rtsp=perfil,
+                                reconectar=True, max_reintentos=max_reintentos)
+    latencias = []
+    fin = time.time() + segundos
+    while time.time() < fin and cap.isOpened():
+        ret, frame = cap.read()
+        if ret:
+            latencias.append(latencia_marca_tiempo(frame))
+    metricas = cap.obtener_metricas()
+    cap.release()
+    print("\n=== LATENCIA EXTREMO A EXTREMO ===")
+    if latencias:
+        print(f"Frames: {len(latencias)}")
+        print(f"Latencia mediana: {statistics.median(latencias) * 1000:.0f}ms  "
+              f"p95: {percentil(latencias, 0.95) * 1000:.0f}ms  max: {max(latencias) * 1000:.0f}ms")
+    else:
+        print("Sin frames recibidos")
+    print(f"Reconexiones: {metricas['reconexiones']} (intentos fallidos: {metricas['intentos_fallidos']})")
+    print(f"Ultima recuperacion: {metricas['ultima_latencia_reconexion']:.1f}s  "
+          f"Tiempo total sin stream: {metricas['tiempo_caida_total']:.1f}s")
+    print("=" * 34 + "\n")
+
+def main(args):
+    if args.e2e:
+        medir_extremo_a_extremo(args.source, args.profiles[0], args.rtsp_transport, args.timeout, args.e2e, args.max_retries)
+        return
+    resultados = [
+        medir_perfil(args.source, perfil, args.rtsp_transport, args.timeout, args.warmup, args.pause)
+        for perfil in args.profiles
+    ]
+    mostrar_resultados(resultados)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide la latencia de ingesta de un stream RTSP/HTTP por perfil")
+    parser.add_argument("--source", required=True, help="URL rtsp:// o http:// del stream")
+    parser.add_argument("--profiles", nargs="+", default=list(PERFILES_RTSP), choices=list(PERFILES_RTSP),
+                        help="Perfiles a comparar (default: todos)")
+    parser.add_argument("--rtsp_transport", default="tcp", choices=["tcp", "udp"], help="Transporte RTSP (default: tcp)")
+    parser.add_argument("--timeout", type=int, default=TIMEOUT_RTSP_DEFECTO, help="Timeout de apertura/lectura en ms")
+    parser.add_argument("--warmup", type=float, default=SEGUNDOS_CALENTAMIENTO, help="Segundos leyendo sin pausa")
+    parser.add_argument("--pause", type=float, default=SEGUNDOS_PAUSA, help="Segundos sin leer antes de medir el buffer")
+    parser.add_argument("--e2e", type=float, default=0,
+                        help="Segundos midiendo latencia extremo a extremo con marcas incrustadas (usa el primer perfil)")
+    parser.add_argument("--max_retries", type=int, default=0, help="Reintentos de reconexion en --e2e (0=infinito)")
+    main(parser.parse_args())
+
+#endregion
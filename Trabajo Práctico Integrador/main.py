@@ -11,14 +11,22 @@ Notas:
 - Usa --source screen:region:x,y,w,h para capturar una region especifica
 """
 import argparse
+import time
 import cv2
 import numpy as np
-import time
 from src.alertas import Alertas
-from src.detector import Detector
+from src.cambios import DetectorCambios
+from src.control_adaptativo import ControladorAdaptativo
+from src.detecciones import Detecciones, integral_mascara
+from src.detector import BACKENDS, Detector
+from src.escalado import CapturaEscalada, escala_inversa, escalar_poligono
 from src.filtro_geometrico import FiltroGeometrico
-from src.overlay import (dibujar_bounding_box, dibujar_fps, dibujar_panel_estadisticas, dibujar_zona)
-from src.screen_capture import crear_fuente_pantalla, listar_monitores
+from src.flujo_optico import PropagadorFlujo
+from src.integridad import VerificadorIntegridad
+from src.movimiento import DetectorMovimiento
+from src.reproduccion import CapturaReproduccion, RelojMedios
+from src.overlay import (dibujar_aviso, dibujar_bounding_box, dibujar_fps, dibujar_panel_estadisticas, dibujar_zona)
+from src.screen_capture import PERFILES_RTSP, crear_fuente_pantalla, listar_monitores
 from src.tracker import SimpleTracker
 from src.utils import ContadorFPS
 from src.zonas import GestorZonas
@@ -31,29 +39,51 @@ except ImportError:
     BYTETRACK_AVAILABLE = False
     print("[WARNING] ByteTrack no disponible. Usando SimpleTracker.")
 
-def bbox_center(bbox):
-    x1, y1, x2, y2 = bbox
-    return int((x1 + x2) / 2), int((y1 + y2) / 2)
-
-def bbox_zone_overlap_ratio(bbox, zone_mask):
-    """Calcula el porcentaje de solapamiento del bbox con la mascara de zonas."""
-    if zone_mask is None:
-        return 0.0
-    height, width = zone_mask.shape[:2]
-    x1 = max(int(bbox[0]), 0)
-    y1 = max(int(bbox[1]), 0)
-    x2 = min(int(bbox[2]), width)
-    y2 = min(int(bbox[3]), height)
-    box_width = x2 - x1
-    box_height = y2 - y1
-    if box_width <= 0 or box_height <= 0:
-        return 0.0
-    bbox_area = float(box_width * box_height)
-    zone_area = float(np.count_nonzero(zone_mask[y1:y2, x1:x2]))
-    return zone_area / bbox_area if bbox_area > 0 else 0.0
+def es_archivo_de_video(source):
+    source = str(source).lower()
+    return not (source.isdigit() or source.endswith(".npy") or source.startswith(("screen", "rtsp://", "http://")))
+
+# Con --downscale_capture la captura se reduce a --imgsz, que con --adaptive es el mayor escalon:
+# queda fija aunque el controlador baje el imgsz del detector. Cambiar la escala en marcha dejaria
+# las cajas del tracker en coordenadas viejas (IDs nuevos y tiempos en zona reiniciados); el
+# detector ya reduce cada frame a su imgsz actual.
+def abrir_fuente(args, recorte=None, reloj=None):
+    # Reproduccion acelerada: decodificacion anticipada y reloj de medios
+    if args.replay:
+        cap = CapturaReproduccion(args.source, reloj=reloj)
+        if args.downscale_capture and cap.isOpened():
+            cap = CapturaEscalada(cap, args.imgsz)
+        return cap
+    # Los streams quedan a cargo de un supervisor que reconecta en segundo plano
+    cap = crear_fuente_pantalla(
+        args.source,
+        transporte_rtsp=args.rtsp_transport,
+        timeout=args.timeout,
+        en_hilo=args.threaded_capture,
+        recorte=recorte,
+        reconectar=True,
+        max_reintentos=args.max_retries,
+        perfil_rtsp=args.rtsp_profile,
+        fuente_evidencia=args.source_main,
+        fourcc=args.cam_fourcc,
+        resolucion=(args.cam_width, args.cam_height) if args.cam_width and args.cam_height else None,
+        fps_camara=args.cam_fps,
+        # Un unico consumidor que termina con cada frame antes de leer el siguiente
+        reutilizar_buffer=True,
+    )
+    # En modo dual el substream ya tiene resolucion de deteccion
+    if args.downscale_capture and not args.source_main and cap.isOpened():
+        cap = CapturaEscalada(cap, args.imgsz)
+    return cap
+
+def construir_mascara_zonas(zonas, alto, ancho, escala=1.0):
+    mascara = np.zeros((alto, ancho), dtype=np.uint8)
+    for poly in zonas:
+        cv2.fillPoly(mascara, [np.array(escalar_poligono(poly, escala), dtype=np.int32)], 255)
+    return mascara
 
 def main(args):
-    detector = Detector(pesos=args.weights, dispositivo="cuda", umbral_confianza=args.conf, tam_imagen=args.imgsz)
+    detector = Detector(pesos=args.weights, dispositivo="cuda", umbral_confianza=args.conf, tam_imagen=args.imgsz, backend=args.backend, datos_calibracion=args.calib_data)
 
     # Seleccionar tracker segun parametro
     if args.tracker == "bytetrack" and BYTETRACK_AVAILABLE:
@@ -70,10 +100,37 @@ def main(args):
         if args.tracker == "bytetrack" and not BYTETRACK_AVAILABLE:
             print("[WARNING] ByteTrack solicitado pero no disponible. Usando SimpleTracker.")
 
+    # En reproduccion, tiempos en zona y cooldowns siguen el tiempo del video y no el de pared
+    if args.replay and (not es_archivo_de_video(args.source) or args.source_main):
+        print("[WARNING] --replay solo aplica a un archivo de video sin --source_main. Se ignora.")
+        args.replay = False
+    media_clock = RelojMedios() if args.replay else None
+    clock = media_clock if media_clock is not None else time.time
+
     zones_manager = GestorZonas(args.zones)
     zones_manager.cargar()
-    alerts = Alertas(segundos_espera=args.cooldown)
+    alerts = Alertas(segundos_espera=args.cooldown, reloj=clock)
     fps_counter = ContadorFPS()
+    change_detector = DetectorCambios(umbral=args.change_threshold) if args.skip_unchanged else None
+    integrity_checker = VerificadorIntegridad(fraccion_maxima=args.corrupt_fraction) if args.check_integrity else None
+    motion_gate = DetectorMovimiento(fraccion_minima=args.motion_fraction, margen=args.motion_margin) if args.motion_gate else None
+
+    # Control adaptativo de salto/imgsz: reemplaza los --skip_frames / --imgsz fijos
+    adaptive = None
+    if args.adaptive:
+        if args.target_fps > 0 or args.target_latency > 0:
+            adaptive = ControladorAdaptativo(
+                fps_objetivo=args.target_fps,
+                latencia_objetivo=args.target_latency,
+                salto_inicial=args.skip_frames,
+                salto_maximo=args.max_skip,
+                escalera_imgsz=[int(valor) for valor in args.imgsz_ladder.split(",") if valor.strip()],
+                tam_imagen=args.imgsz,
+            )
+        else:
+            print("[WARNING] --adaptive requiere --target_fps o --target_latency. Se ignora.")
+    skip_frames = args.skip_frames
+    flow_propagator = PropagadorFlujo() if args.flow_propagation else None
 
     # Inicializar filtro geometrico avanzado
     geo_filter = FiltroGeometrico(
@@ -82,22 +139,42 @@ def main(args):
         confianza_minima=args.conf,
         longitud_trayectoria=10,
         umbral_movimiento_minimo=2.0,
+        reloj=clock,
     )
 
+    # Captura de pantalla restringida al rectangulo que contiene las zonas (+ margen)
+    screen_crop = None
+    if args.screen_zone_crop and str(args.source).lower().startswith("screen"):
+        screen_crop = zones_manager.rectangulo_envolvente(args.zone_margin)
+
     # Usar crear_fuente_pantalla para soportar captura de pantalla y RTSP
-    cap = crear_fuente_pantalla(args.source, transporte_rtsp=args.rtsp_transport, timeout=args.timeout)
+    cap = abrir_fuente(args, recorte=screen_crop, reloj=media_clock)
     if not cap.isOpened():
         print("No se pudo abrir fuente:", args.source)
         return
 
+    # Las zonas pasan a coordenadas de la region capturada
+    if screen_crop is not None:
+        offset_x, offset_y = cap.desplazamiento
+        zones_manager.desplazar(-offset_x, -offset_y)
+
     window_title = "Sistema de Deteccion de Intrusiones"
     cv2.namedWindow(window_title, cv2.WINDOW_NORMAL)
 
     total_alerts = 0
     frame_count = 0
-    last_dets = []
-    last_tracks = []
+    last_tracks = Detecciones.vacias()
     zone_mask = None
+    zone_integral = None
+    zone_rois = None
+    zone_mask_scale = 1.0
+    # Sin decodificar los frames salteados no hay nada nuevo que mostrar en ellos
+    show_processed_only = args.show_processed_only or args.decode_skip
+    # El flujo optico necesita los frames salteados decodificados y mostrados
+    if flow_propagator is not None and show_processed_only:
+        print("[WARNING] --flow_propagation no aplica con --decode_skip ni --show_processed_only "
+              "(los frames salteados no se decodifican o no se muestran). Se ignora.")
+        flow_propagator = None
 
     print("\n" + "=" * 60)
     print("SISTEMA DE DETECCION DE INTRUSIONES ACTIVO")
@@ -109,106 +186,192 @@ def main(args):
         print(f"  - Tiempo minimo en zona: {args.min_time_zone}s")
         print(f"  - Area minima bbox: {args.min_bbox_area}px^2")
     print(f"Tamano de inferencia: {args.imgsz}px")
+    print(f"Backend de inferencia: {args.backend}")
     print(f"Skip frames: {args.skip_frames} (0=procesar todos)")
+    if adaptive is not None:
+        print(f"  - Control adaptativo: objetivo {args.target_fps or '-'} FPS / {args.target_latency or '-'} ms, "
+              f"salto maximo {args.max_skip}, imgsz {adaptive.escalera}")
+    if args.skip_frames > 0 or adaptive is not None:
+        print(f"  - Frames salteados: {'grab() sin decodificar' if args.decode_skip else 'decodificados'}")
+        print(f"  - Mostrar solo frames procesados: {'SI' if show_processed_only else 'NO'}")
+        print(f"  - Propagacion por flujo optico: {'SI' if flow_propagator is not None else 'NO'}")
+    print(f"Inferencia solo en zonas: {'SI (margen ' + str(args.roi_margin) + 'px)' if args.zone_roi else 'NO'}")
+    if args.tiled:
+        print(f"Inferencia por tiles: {args.tile_size}px, solapamiento {args.tile_overlap * 100:.0f}%"
+              f"{', solo tiles en zonas' if args.tile_zones_only else ''}")
+        if args.downscale_capture:
+            print("[WARNING] --tiled con --downscale_capture infiere sobre el frame reducido: se pierde el detalle lejano")
+    print(f"Compuerta de movimiento: {'SI (fraccion ' + str(args.motion_fraction) + ', margen ' + str(args.motion_margin) + 'px)' if args.motion_gate else 'NO'}")
+    print(f"Omitir frames sin cambios: {'SI (umbral ' + str(args.change_threshold) + ')' if args.skip_unchanged else 'NO'}")
+    print(f"Descartar frames corruptos: {'SI (fraccion ' + str(args.corrupt_fraction) + ')' if args.check_integrity else 'NO'}")
+    print(f"Captura en hilo: {'SI (ultimo frame gana)' if args.threaded_capture else 'NO'}")
+    print(f"Reproduccion acelerada: {'SI (reloj de medios)' if args.replay else 'NO'}")
+    print(f"Reduccion en captura: {'SI (lado mayor ' + str(args.imgsz) + 'px)' if args.downscale_capture else 'NO'}")
+    if args.source_main:
+        print(f"Modo dual: deteccion en {args.source}, visualizacion/evidencia en {args.source_main}")
     print(f"Zonas configuradas: {len(zones_manager.zonas)}")
+    if screen_crop is not None:
+        print(f"Captura restringida a zonas: {screen_crop} (margen {args.zone_margin}px)")
     print(f"Umbral de confianza: {args.conf}")
     print(f"Porcentaje minimo de solapamiento bbox/zona: {args.zone_overlap_ratio * 100:.0f}%")
     print(f"Alertas locales: SI (solo local)")
     print("Presiona Q o ESC para salir")
     print("=" * 60 + "\n")
 
-    consecutive_failures = 0
     is_stream = str(args.source).lower().startswith(("rtsp://", "http://"))
+    last_display_frame = None
+    was_reconnecting = False
 
     while True:
+        # Con --decode_skip los frames salteados solo avanzan la fuente (grab), sin decodificarse ni mostrarse
+        # La ventana del controlador puede cerrarse en cualquier frame (tambien en los salteados):
+        # salto e imgsz se copian una vez por iteracion, antes de cualquier inferencia
+        if adaptive is not None:
+            skip_frames = adaptive.salto
+            detector.tam_imagen = adaptive.tam_imagen
+        if args.decode_skip and skip_frames > 0 and (frame_count + 1) % (skip_frames + 1) != 0:
+            if cap.grab():
+                fps_counter.registrar_tiempo()
+                if adaptive is not None:
+                    adaptive.registrar_frame()
+                frame_count += 1
+                key = cv2.waitKey(1) & 0xFF
+                if key == 27 or key == ord("q"):
+                    break
+                continue
+
         ret, frame = cap.read()
         if not ret:
-            # Si es un stream, intentar reconexion
-            if is_stream and consecutive_failures < args.max_retries:
-                consecutive_failures += 1
-                print(f"\n[WARNING] Frame perdido. Intento de reconexion {consecutive_failures}/{args.max_retries}...")
-                cap.release()
-                time.sleep(2)
-                cap = crear_fuente_pantalla(args.source, transporte_rtsp=args.rtsp_transport, timeout=args.timeout)
-                if cap.isOpened():
-                    print("[SUCCESS] Reconectado exitosamente")
-                    consecutive_failures = 0
-                    zone_mask = None
-                    continue
+            # Streams: el supervisor reconecta en segundo plano y la ventana sigue respondiendo
+            if is_stream and cap.isOpened():
+                was_reconnecting = was_reconnecting or cap.reconectando
+                metrics = cap.obtener_metricas()
+                if last_display_frame is not None:
+                    status_frame = last_display_frame.copy()
                 else:
-                    print("[ERROR] Fallo en reconexion")
-                    continue
-            else:
-                if is_stream:
-                    print(f"\n[ERROR] Maximo de reintentos alcanzado ({args.max_retries}). Cerrando...")
+                    status_frame = np.zeros((360, 640, 3), dtype=np.uint8)
+                status_text = "RECONECTANDO..." if cap.reconectando else "ESPERANDO FRAMES..."
+                dibujar_aviso(status_frame, f"{status_text} ({metrics['caida_actual']:.0f}s)")
+                cv2.imshow(window_title, status_frame)
+                key = cv2.waitKey(1) & 0xFF
+                if key == 27 or key == ord("q"):
+                    break
+                continue
+            if is_stream:
+                print(f"\n[ERROR] Maximo de reintentos alcanzado ({args.max_retries}). Cerrando...")
+            break
+
+        # Tras una reconexion la resolucion o la escena pueden haber cambiado
+        if was_reconnecting:
+            was_reconnecting = False
+            zone_mask = None
+            if change_detector is not None:
+                change_detector.reiniciar()
+            if motion_gate is not None:
+                motion_gate.reiniciar()
+            if flow_propagator is not None:
+                flow_propagator.reiniciar()
+
+        # Frames manchados por perdida de paquetes no llegan al detector ni al tracker
+        if integrity_checker is not None and not integrity_checker.frame_valido(frame):
+            key = cv2.waitKey(1) & 0xFF
+            if key == 27 or key == ord("q"):
                 break
-        else:
-            consecutive_failures = 0
+            continue
 
         fps_counter.registrar_tiempo()
         frame_count += 1
 
-        # Construir mascara combinada de zonas (una sola vez segun tamano del frame)
-        if zone_mask is None and zones_manager.zonas:
+        # Con reduccion en captura o modo dual, 'frame' es el frame de inferencia y 'display_frame'
+        # el de resolucion completa. Deteccion, tracking y zonas usan el primero; el dibujo el segundo.
+        if hasattr(cap, "obtener_frame_completo"):
+            scale = cap.escala
+            display_frame = cap.obtener_frame_completo()
+        else:
+            scale = 1.0
+            display_frame = frame
+
+        # Construir mascara combinada de zonas (se rehace si cambia el tamano o la escala del frame)
+        if zones_manager.zonas and (zone_mask is None or zone_mask.shape[:2] != frame.shape[:2] or zone_mask_scale != scale):
             height, width = frame.shape[:2]
-            zone_mask = np.zeros((height, width), dtype=np.uint8)
-            for poly in zones_manager.zonas:
-                cv2.fillPoly(zone_mask, [np.array(poly, dtype=np.int32)], 255)
+            zone_mask = construir_mascara_zonas(zones_manager.zonas, height, width, scale)
+            zone_integral = integral_mascara(zone_mask)
+            zone_mask_scale = scale
+            if args.zone_roi or args.tile_zones_only:
+                zone_rois = zones_manager.rectangulos_zonas(args.roi_margin, width, height, scale)
+            if motion_gate is not None:
+                motion_gate.establecer_zonas(zones_manager.zonas, scale)
 
         # Optimizacion: skip frames para mejorar FPS
-        if args.skip_frames > 0 and frame_count % (args.skip_frames + 1) != 0:
-            detections = last_dets
+        is_skipped_frame = skip_frames > 0 and frame_count % (skip_frames + 1) != 0
+        # Frames sin cambios de contenido reutilizan las detecciones anteriores
+        is_unchanged_frame = (
+            not is_skipped_frame and change_detector is not None and not change_detector.hay_cambio(frame)
+        )
+        # Sin movimiento en las zonas (+ margen) ni tracks vivos, el frame no pasa por el detector
+        is_static_frame = (
+            not is_skipped_frame
+            and not is_unchanged_frame
+            and motion_gate is not None
+            and not motion_gate.debe_detectar(frame, hay_tracks=len(last_tracks) > 0)
+        )
+        if is_skipped_frame and show_processed_only:
+            if adaptive is not None:
+                adaptive.registrar_frame()
+            key = cv2.waitKey(1) & 0xFF
+            if key == 27 or key == ord("q"):
+                break
+            continue
+        detector_latency = None
+        if is_skipped_frame and flow_propagator is not None:
+            # Las cajas siguen al contenido en lugar de quedar congeladas hasta la proxima inferencia
+            tracks = flow_propagator.propagar(frame, last_tracks)
+            last_tracks = tracks
+        elif is_skipped_frame or is_unchanged_frame or is_static_frame:
             tracks = last_tracks
         else:
-            detections = detector.detectar(frame)
-            last_dets = detections
-
-            tracks = tracker.actualizar(detections)
+            detection_start = time.perf_counter()
+            if args.tiled:
+                tile_rects = zone_rois if args.tile_zones_only else None
+                detections = detector.detectar_mosaico(frame, args.tile_size, args.tile_overlap, tile_rects)
+            elif zone_rois is not None:
+                detections = detector.detectar_regiones(frame, zone_rois)
+            else:
+                detections = detector.detectar_columnas(frame)
+            detector_latency = time.perf_counter() - detection_start
+            tracks = tracker.actualizar_columnas(detections)
             last_tracks = tracks
+            if flow_propagator is not None:
+                flow_propagator.inicializar(frame, tracks)
+        if adaptive is not None and adaptive.registrar_frame(detector_latency):
+            print(f"[Adaptativo] {adaptive.fps_medidos:.1f} FPS, {adaptive.latencia_media * 1000:.0f} ms/inferencia -> {adaptive.describir()}")
 
         # Overlay de zonas con nombres personalizados
         for indice_zona, poly in enumerate(zones_manager.zonas):
             zone_name = zones_manager.obtener_nombre_zona(indice_zona)
             zone_color = (0, 0, 255)
-            dibujar_zona(frame, poly, color=zone_color, nombre_zona=zone_name)
+            dibujar_zona(display_frame, poly, color=zone_color, nombre_zona=zone_name)
 
         current_in_zone = set()
-        active_track_ids = [track["track_id"] for track in tracks]
-
-        for track in tracks:
-            track_id = track["track_id"]
-            bbox = track["bbox"]
-            center_x, center_y = bbox_center(bbox)
-
-            # Buscar confianza en las detecciones originales
-            confidence = track.get("conf", 0.0)
-            if confidence == 0.0:
-                for detection in detections:
-                    det_bbox = detection["bbox"]
-                    if abs(det_bbox[0] - bbox[0]) < 5 and abs(det_bbox[1] - bbox[1]) < 5:
-                        confidence = detection["conf"]
-                        break
-
-            overlap_ratio = 0.0
-            inside_zone = False
-            if zones_manager.zonas and zone_mask is not None:
-                overlap_ratio = bbox_zone_overlap_ratio(bbox, zone_mask)
-                inside_zone = overlap_ratio >= args.zone_overlap_ratio
-
-            is_valid_intrusion = False
-            validation_result = None
-
-            if args.use_geometric_filter:
-                validation_result = geo_filter.validar_intrusion(
-                    id_track=track_id,
-                    bbox=bbox,
-                    confianza=confidence,
-                    centro=(center_x, center_y),
-                    esta_en_zona=inside_zone,
-                )
-                is_valid_intrusion = validation_result["is_valid"]
-            else:
-                is_valid_intrusion = inside_zone
+        active_track_ids = tracks.track_id.tolist()
+
+        # Solapamiento con zonas (frame de inferencia) y filtro geometrico (frame original), para todos los tracks a la vez
+        full_tracks = tracks.escalar(escala_inversa(scale))
+        if zones_manager.zonas and zone_integral is not None:
+            inside_zone_all = tracks.solapamiento(zone_integral) >= args.zone_overlap_ratio
+        else:
+            inside_zone_all = np.zeros(len(tracks), dtype=bool)
+        if args.use_geometric_filter:
+            validation_results = geo_filter.validar_intrusiones(full_tracks, inside_zone_all)
+            valid_intrusions = [result["is_valid"] for result in validation_results]
+        else:
+            valid_intrusions = inside_zone_all.tolist()
+
+        for i, track_id in enumerate(active_track_ids):
+            full_bbox = full_tracks.xyxy[i]
+            confidence = float(tracks.conf[i])
+            inside_zone = bool(inside_zone_all[i])
+            is_valid_intrusion = valid_intrusions[i]
 
             if is_valid_intrusion:
                 current_in_zone.add(track_id)
@@ -223,7 +386,7 @@ def main(args):
                 color = (0, 255, 0)
                 label = f"ID:{track_id} ({confidence:.2f})"
 
-            dibujar_bounding_box(frame, bbox, etiqueta=label, color=color, grosor=2)
+            dibujar_bounding_box(display_frame, full_bbox, etiqueta=label, color=color, grosor=2)
 
             if is_valid_intrusion:
                 if alerts.alertar_por_track(
@@ -238,7 +401,7 @@ def main(args):
         # Actualizar estado del flash visual segun presencia en zona
         alerts.establecer_estado_flash(len(current_in_zone) > 0)
 
-        dibujar_fps(frame, fps_counter.obtener_fps(), numero_de_frame=frame_count)
+        dibujar_fps(display_frame, fps_counter.obtener_fps(), numero_de_frame=frame_count)
 
         active_zones = sum(1 for _ in zones_manager.zonas if len(current_in_zone) > 0)
         avg_detections = len(tracks)
@@ -248,18 +411,50 @@ def main(args):
             "Total Zonas": len(zones_manager.zonas),
             "Detecciones Prom": f"{avg_detections:.1f}",
         }
-        dibujar_panel_estadisticas(frame, estadisticas, posicion="top-right")
+        if args.zone_roi:
+            inferred_area = sum(w * h for _, _, w, h in zone_rois) / float(frame.shape[0] * frame.shape[1]) if zone_rois else 1.0
+            estadisticas["Area Inferida"] = f"{inferred_area * 100:.0f}%"
+        if args.tiled and detector.metricas_mosaico:
+            tile_metrics = detector.metricas_mosaico
+            estadisticas["Tiles"] = f"{tile_metrics['tiles']}/{tile_metrics['tiles_totales']} ({tile_metrics['latencia_tile_ms']:.0f} ms/tile)"
+        if flow_propagator is not None:
+            estadisticas["Flujo Optico"] = f"{flow_propagator.obtener_tasa_exito():.0f}% cajas"
+        if adaptive is not None:
+            estadisticas["Adaptativo"] = adaptive.describir()
+            estadisticas["Latencia Det"] = f"{adaptive.latencia_media * 1000:.0f} ms"
+        if motion_gate is not None:
+            motion_rate, tracks_rate, closed_rate = motion_gate.obtener_tasas()
+            estadisticas["Compuerta Abierta"] = f"{motion_rate:.0f}% mov + {tracks_rate:.0f}% tracks"
+            estadisticas["Compuerta Cerrada"] = f"{closed_rate:.0f}%"
+        if change_detector is not None:
+            estadisticas["Omitidos Sin Cambio"] = f"{change_detector.obtener_tasa_omision():.0f}%"
+        if hasattr(cap, "frames_descartados"):
+            estadisticas["Frames Descartados"] = cap.frames_descartados
+        if integrity_checker is not None:
+            estadisticas["Frames Corruptos"] = integrity_checker.frames_corruptos
+        if args.replay:
+            estadisticas["Tiempo Video"] = f"{cap.posicion_ms / 1000:.0f}s"
+            estadisticas["Velocidad"] = f"{cap.obtener_velocidad():.1f}x"
+        if hasattr(cap, "obtener_metricas"):
+            stream_metrics = cap.obtener_metricas()
+            estadisticas["Reconexiones"] = stream_metrics["reconexiones"]
+            estadisticas["Caida Total"] = f"{stream_metrics['tiempo_caida_total']:.0f}s"
+        dibujar_panel_estadisticas(display_frame, estadisticas, posicion="top-right")
 
         # Flash visual de alerta (punto rojo persistente tras una alerta)
         if alerts.debe_mostrar_flash():
-            cv2.circle(frame, (35, 70), 20, (0, 0, 255), -1)
-            cv2.circle(frame, (35, 70), 24, (0, 0, 255), 2)
+            cv2.circle(display_frame, (35, 70), 20, (0, 0, 255), -1)
+            cv2.circle(display_frame, (35, 70), 24, (0, 0, 255), 2)
 
-        cv2.imshow(window_title, frame)
+        cv2.imshow(window_title, display_frame)
+        last_display_frame = display_frame
         key = cv2.waitKey(1) & 0xFF
         if key == 27 or key == ord("q"):
             break
 
+    frames_descartados = getattr(cap, "frames_descartados", None)
+    replay_summary = (cap.posicion_ms / 1000, cap.obtener_velocidad()) if args.replay else None
+    stream_metrics = cap.obtener_metricas() if hasattr(cap, "obtener_metricas") else None
     cap.release()
     cv2.destroyAllWindows()
 
@@ -267,6 +462,27 @@ def main(args):
     print("SISTEMA DETENIDO")
     print("=" * 60)
     print(f"Total de alertas enviadas: {total_alerts}")
+    if replay_summary is not None:
+        print(f"Video reprocesado: {replay_summary[0]:.1f}s a {replay_summary[1]:.1f}x tiempo real")
+    if frames_descartados is not None:
+        print(f"Frames descartados por captura en hilo: {frames_descartados}")
+    if integrity_checker is not None:
+        print(f"Frames corruptos descartados: {integrity_checker.frames_corruptos} "
+              f"({integrity_checker.obtener_tasa_corruptos():.1f}%)")
+    if flow_propagator is not None:
+        print(f"Cajas propagadas por flujo optico: {flow_propagator.cajas_propagadas} "
+              f"(sin puntos validos: {flow_propagator.cajas_sin_puntos}, exito {flow_propagator.obtener_tasa_exito():.1f}%)")
+    if adaptive is not None:
+        print(f"Control adaptativo: {adaptive.cambios} cambios, configuracion final {adaptive.describir()} "
+              f"({adaptive.fps_medidos:.1f} FPS, {adaptive.latencia_media * 1000:.0f} ms/inferencia)")
+    if motion_gate is not None:
+        motion_rate, tracks_rate, closed_rate = motion_gate.obtener_tasas()
+        print(f"Compuerta de movimiento: {motion_gate.frames_evaluados} frames evaluados, abierta por movimiento "
+              f"{motion_rate:.1f}%, por tracks vivos {tracks_rate:.1f}%, cerrada {closed_rate:.1f}%")
+    if stream_metrics is not None:
+        print(f"Reconexiones: {stream_metrics['reconexiones']} (intentos fallidos: {stream_metrics['intentos_fallidos']})")
+        print(f"Ultima latencia de reconexion: {stream_metrics['ultima_latencia_reconexion']:.1f}s")
+        print(f"Tiempo total sin stream: {stream_metrics['tiempo_caida_total']:.1f}s")
 
     if args.use_geometric_filter:
         filter_stats = geo_filter.obtener_estadisticas()
@@ -290,6 +506,12 @@ if __name__ == "__main__":
         help='Fuente de video: indice de camara (0), ruta de video, o "screen" para captura de pantalla. '
         "Ejemplos: 0, video.mp4, screen, screen:1, screen:region:100,100,800,600",
     )
+    parser.add_argument(
+        "--source_main",
+        default=None,
+        help="Modo dual: stream principal (alta resolucion) para visualizar/evidencia; --source pasa a ser el "
+        "substream de deteccion. Las zonas se definen sobre este stream. Ej: .../Channels/101 con --source .../Channels/102",
+    )
     parser.add_argument("--weights", default=None, help="Ruta a pesos YOLO (ej: yolov11.pt o yolov8n.pt)")
     parser.add_argument("--zones", default="zonas.json", help="Archivo JSON con zonas")
     parser.add_argument("--conf", type=float, default=0.53, help="Umbral de confianza")
@@ -300,12 +522,115 @@ if __name__ == "__main__":
         default=640,
         help="Tamano de imagen para inferencia (default: 640, usar 416 o 320 para mas FPS)",
     )
+    parser.add_argument(
+        "--backend",
+        default="pytorch",
+        choices=list(BACKENDS),
+        help="Runtime de inferencia: pytorch, onnx (ONNX Runtime), openvino u openvino_int8; los exportados se "
+        "generan una vez por imgsz y se guardan en modelos_exportados/",
+    )
+    parser.add_argument(
+        "--calib_data",
+        default=None,
+        help="calibracion.yaml para --backend openvino_int8 (generarlo con quant_tool.py calibrate)",
+    )
+    parser.add_argument(
+        "--tiled",
+        action="store_true",
+        help="Inferir por tiles solapados en un solo lote (personas chicas y lejanas en camaras de alta resolucion)",
+    )
+    parser.add_argument("--tile_size", type=int, default=640, help="Con --tiled, lado del tile en pixeles del frame (default: 640)")
+    parser.add_argument("--tile_overlap", type=float, default=0.2, help="Con --tiled, fraccion del tile solapada con su vecino (default: 0.2)")
+    parser.add_argument(
+        "--tile_zones_only",
+        action="store_true",
+        help="Con --tiled, inferir solo los tiles que tocan las zonas (+ --roi_margin)",
+    )
+    parser.add_argument(
+        "--downscale_capture",
+        action="store_true",
+        help="Reducir cada frame a --imgsz al capturarlo; deteccion y zonas usan el frame reducido y "
+        "el original solo se usa para visualizar",
+    )
     parser.add_argument(
         "--skip_frames",
         type=int,
         default=0,
         help="Procesar 1 de cada N frames (0=todos, 1=la mitad, 2=un tercio, etc)",
     )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Ajustar salto de frames (y opcionalmente imgsz) en lazo cerrado para cumplir --target_fps / --target_latency",
+    )
+    parser.add_argument("--target_fps", type=float, default=0, help="Con --adaptive, FPS de punta a punta a sostener (0=sin objetivo)")
+    parser.add_argument(
+        "--target_latency", type=float, default=0, help="Con --adaptive, presupuesto en ms por inferencia del detector (0=sin objetivo)"
+    )
+    parser.add_argument("--max_skip", type=int, default=4, help="Con --adaptive, maximo de frames salteados (default: 4)")
+    parser.add_argument(
+        "--imgsz_ladder",
+        default="",
+        help="Con --adaptive, tamanos de inferencia admitidos separados por coma (ej: 640,512,416,320); "
+        "--imgsz es el inicial y el maximo. Vacio = solo se ajusta el salto",
+    )
+    parser.add_argument(
+        "--decode_skip",
+        action="store_true",
+        help="Con --skip_frames, avanzar los frames salteados con grab() sin decodificarlos (solo se muestran los procesados)",
+    )
+    parser.add_argument(
+        "--flow_propagation",
+        action="store_true",
+        help="Con --skip_frames, mover las cajas de los tracks en los frames salteados con flujo optico Lucas-Kanade",
+    )
+    parser.add_argument(
+        "--show_processed_only",
+        action="store_true",
+        help="Con --skip_frames, mostrar solo los frames que pasan por el detector (no redibujar tracks viejos)",
+    )
+    parser.add_argument(
+        "--skip_unchanged",
+        action="store_true",
+        help="Reutilizar las detecciones anteriores cuando el frame no cambio (pantallas/camaras estaticas)",
+    )
+    parser.add_argument(
+        "--change_threshold",
+        type=float,
+        default=2.0,
+        help="Diferencia media (0-255) en alguna celda de la miniatura para considerar que el frame cambio (default: 2.0)",
+    )
+    parser.add_argument(
+        "--motion_gate",
+        action="store_true",
+        help="Invocar al detector solo si hay movimiento (MOG2) en las zonas o quedan tracks vivos",
+    )
+    parser.add_argument(
+        "--motion_fraction",
+        type=float,
+        default=0.005,
+        help="Fraccion del area vigilada en movimiento para abrir la compuerta (default: 0.005)",
+    )
+    parser.add_argument(
+        "--motion_margin", type=int, default=80, help="Margen en pixeles alrededor de las zonas vigilado por --motion_gate (default: 80)"
+    )
+    parser.add_argument(
+        "--check_integrity",
+        action="store_true",
+        help="Descartar antes del detector los frames manchados/grises por perdida de paquetes (RTSP)",
+    )
+    parser.add_argument(
+        "--corrupt_fraction",
+        type=float,
+        default=0.25,
+        help="Fraccion del frame con filas repetidas o bloques planos para considerarlo corrupto (default: 0.25)",
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Reprocesar un archivo de video lo mas rapido posible: decodificacion anticipada y tiempos "
+        "(tiempo en zona, cooldown) segun las marcas de tiempo del video",
+    )
     parser.add_argument(
         "--tracker",
         default="bytetrack",
@@ -313,6 +638,22 @@ if __name__ == "__main__":
         help="Algoritmo de tracking: simple (IoU basico) o bytetrack (robusto, default)",
     )
     parser.add_argument("--list_monitors", action="store_true", help="Listar monitores disponibles y salir")
+    parser.add_argument(
+        "--screen_zone_crop",
+        action="store_true",
+        help="Con --source screen, capturar solo el rectangulo que contiene las zonas (mas --zone_margin)",
+    )
+    parser.add_argument(
+        "--zone_margin", type=int, default=50, help="Margen en pixeles alrededor de las zonas para --screen_zone_crop (default: 50)"
+    )
+    parser.add_argument(
+        "--zone_roi",
+        action="store_true",
+        help="Inferir solo en los rectangulos alrededor de las zonas (fusionados si se solapan) en lugar del frame completo",
+    )
+    parser.add_argument(
+        "--roi_margin", type=int, default=80, help="Margen en pixeles alrededor de cada zona para --zone_roi (default: 80)"
+    )
 
     # Parametros de filtrado geometrico avanzado
     parser.add_argument(
@@ -347,9 +688,33 @@ if __name__ == "__main__":
         help="Protocolo de transporte RTSP (tcp o udp, default: tcp)",
     )
     parser.add_argument(
-        "--max_retries", type=int, default=10, help="Intentos maximos de reconexion para streams RTSP (default: 10)"
+        "--rtsp_profile",
+        default="default",
+        choices=list(PERFILES_RTSP),
+        help="Perfil de ingesta FFmpeg: default o low_latency (nobuffer, low_delay, probesize minimo). "
+        "Medir con latency_tool.py",
+    )
+    parser.add_argument(
+        "--max_retries",
+        type=int,
+        default=10,
+        help="Intentos de reconexion fallidos consecutivos antes de cerrar (backoff exponencial en segundo plano, 0=infinito, default: 10)",
     )
     parser.add_argument("--timeout", type=int, default=10000, help="Timeout en milisegundos para conexion RTSP (default: 10000)")
+    # Parametros de formato de webcam (se negocian con el driver al abrir)
+    parser.add_argument(
+        "--cam_fourcc",
+        default=None,
+        help="Formato de pixel de la webcam: MJPG (comprimido, estable en USB) o YUYV (crudo). Default: el del driver",
+    )
+    parser.add_argument("--cam_width", type=int, default=0, help="Ancho solicitado a la webcam (0=default del driver)")
+    parser.add_argument("--cam_height", type=int, default=0, help="Alto solicitado a la webcam (0=default del driver)")
+    parser.add_argument("--cam_fps", type=float, default=0, help="FPS solicitados a la webcam (0=default del driver)")
+    parser.add_argument(
+        "--threaded_capture",
+        action="store_true",
+        help="Decodificar RTSP/webcam en un hilo y procesar siempre el frame mas reciente (evita retraso acumulado)",
+    )
 
     arguments = parser.parse_args()
 
@@ -0,0 +1,227 @@
+"""Cuantización INT8 del detector calibrada con nuestras grabaciones y comparación contra FP32.
+Ejecutar:   python quant_tool.py calibrate --sources grabacion1.mp4 clip.npy --frames 300 --output calibracion
+            python quant_tool.py compare --source otra_grabacion.mp4 --calib calibracion/calibracion.yaml --imgsz 640
+calibrate:  toma frames repartidos uniformemente entre las fuentes (videos o clips .npy de clip_tool.py)
+            y arma el conjunto que usa OpenVINO/NNCF para calibrar la cuantización.
+compare:    corre el mismo modelo en FP32 y en INT8 (--backend openvino_int8) sobre otra grabación
+            (no usar los frames de calibración) y reporta:
+- Latencia media y P95 de cada uno
+- AP50 de INT8 tomando las detecciones FP32 como referencia, recall y precisión al umbral --conf
+- Recall de intrusiones: frames con una persona en zona según FP32 que INT8 también marca
+El veredicto final indica si el recall de intrusiones alcanza --min_recall.
+Luego: python main.py --backend openvino_int8 --calib_data calibracion/calibracion.yaml ...
+"""
+import argparse
+import os
+import statistics
+import time
+import cv2
+import numpy as np
+from src.detecciones import integral_mascara, iou_matriz
+from src.detector import BACKEND_INT8, BACKENDS, Detector
+from src.zonas import GestorZonas
+
+#region Constantes
+
+FRAMES_CALIBRACION_DEFECTO = 300  # NNCF recomienda ~300 imágenes
+FRAMES_COMPARACION_DEFECTO = 200
+FRAMES_CALENTAMIENTO = 5
+UMBRAL_IOU_COINCIDENCIA = 0.5
+RECALL_MINIMO_DEFECTO = 0.99
+CALIDAD_JPEG = 95
+
+#endregion
+
+#region Funciones Auxiliares
+
+def contar_frames(ruta):
+    if ruta.endswith('.npy'):
+        return len(np.load(ruta, mmap_mode='r'))
+    captura = cv2.VideoCapture(ruta)
+    total = int(captura.get(cv2.CAP_PROP_FRAME_COUNT))
+    captura.release()
+    return total
+
+# Devuelve hasta `cantidad` frames de `ruta` equiespaciados a lo largo de toda la grabación
+def muestrear_frames(ruta, cantidad):
+    total = contar_frames(ruta)
+    if total <= 0 or cantidad <= 0:
+        return
+    indices = np.unique(np.linspace(0, total - 1, min(cantidad, total)).astype(int))
+    if ruta.endswith('.npy'):
+        frames = np.load(ruta, mmap_mode='r')
+        for indice in indices:
+            yield np.array(frames[indice])
+        return
+    captura = cv2.VideoCapture(ruta)
+    try:
+        for indice in indices:
+            captura.set(cv2.CAP_PROP_POS_FRAMES, int(indice))
+            ret, frame = captura.read()
+            if ret:
+                yield frame
+    finally:
+        captura.release()
+
+def percentil(valores, fraccion):
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * fraccion), len(ordenados) - 1)]
+
+# Empareja de mayor a menor confianza cada detección con una de referencia libre (IoU >= umbral).
+# Returns: lista de (confianza, es_coincidencia) por detección
+def emparejar(detecciones, referencia):
+    if len(detecciones) == 0:
+        return []
+    orden = np.argsort(-detecciones.conf)
+    ious = iou_matriz(detecciones.xyxy[orden], referencia.xyxy) if len(referencia) else np.zeros((len(orden), 0))
+    libres = np.ones(len(referencia), dtype=bool)
+    resultado = []
+    for fila, indice in enumerate(orden):
+        candidatos = np.where(libres, ious[fila], -1.0)
+        mejor = int(np.argmax(candidatos)) if len(candidatos) else -1
+        coincide = bool(mejor >= 0 and candidatos[mejor] >= UMBRAL_IOU_COINCIDENCIA)
+        if coincide:
+            libres[mejor] = False
+        resultado.append((float(detecciones.conf[indice]), coincide))
+    return resultado
+
+# AP con interpolación de todos los puntos (como VOC/COCO) sobre las detecciones emparejadas
+def precision_promedio(emparejamientos, total_referencia):
+    if total_referencia == 0 or not emparejamientos:
+        return 0.0
+    aciertos = np.array([coincide for _, coincide in sorted(emparejamientos, key=lambda e: -e[0])], dtype=float)
+    verdaderos = np.cumsum(aciertos)
+    recall = verdaderos / total_referencia
+    precision = verdaderos / np.arange(1, len(aciertos) + 1)
+    recall = np.concatenate(([0.0], recall, [1.0]))
+    precision = np.concatenate(([1.0], precision, [0.0]))
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    cambios = np.where(recall[1:] != recall[:-1])[0]
+    return float(np.sum((recall[cambios + 1] - recall[cambios]) * precision[cambios + 1]))
+
+def hay_intrusion(detecciones, integral, proporcion):
+    return integral is not None and bool(np.any(detecciones.solapamiento(integral) >= proporcion))
+
+def medir(detector, frame):
+    inicio = time.perf_counter()
+    detecciones = detector.detectar_columnas(frame)
+    return detecciones, time.perf_counter() - inicio
+
+#endregion
+
+#region Funciones Principales
+
+def calibrar(args):
+    carpeta_imagenes = os.path.join(args.output, 'images')
+    os.makedirs(carpeta_imagenes, exist_ok=True)
+    totales = [contar_frames(ruta) for ruta in args.sources]
+    if sum(totales) == 0:
+        print("[Calibracion] Las fuentes no tienen frames legibles")
+        return
+    guardados = 0
+    for ruta, total in zip(args.sources, totales):
+        # Cada grabación aporta en proporción a su duración
+        cantidad = round(args.frames * total / sum(totales))
+        for frame in muestrear_frames(ruta, cantidad):
+            cv2.imwrite(os.path.join(carpeta_imagenes, f"{guardados:05d}.jpg"), frame, [cv2.IMWRITE_JPEG_QUALITY, CALIDAD_JPEG])
+            guardados += 1
+        print(f"[Calibracion] {ruta}: {cantidad} frames de {total}")
+    ruta_yaml = os.path.join(args.output, 'calibracion.yaml')
+    with open(ruta_yaml, 'w', encoding='utf-8') as archivo:
+        # Formato de dataset de Ultralytics; sin etiquetas: la calibración solo usa las imágenes
+        archivo.write(f"path: {os.path.abspath(args.output)}\ntrain: images\nval: images\nnames:\n  0: person\n")
+    print(f"[Calibracion] {guardados} frames en {carpeta_imagenes}")
+    print(f"[Calibracion] Usar con: --backend {BACKEND_INT8} --calib_data {ruta_yaml}")
+
+def comparar(args):
+    fp32 = Detector(pesos=args.weights, umbral_confianza=args.conf, tam_imagen=args.imgsz, backend=args.reference)
+    int8 = Detector(pesos=args.weights, umbral_confianza=args.conf, tam_imagen=args.imgsz, backend=BACKEND_INT8, datos_calibracion=args.calib)
+    zonas = GestorZonas(args.zones)
+    zonas.cargar()
+    integral = None
+    tiempos = {'fp32': [], 'int8': []}
+    emparejamientos = []
+    total_referencia = 0
+    coincidencias = 0
+    total_int8 = 0
+    intrusiones_fp32 = 0
+    intrusiones_detectadas = 0
+    intrusiones_espurias = 0
+    for numero, frame in enumerate(muestrear_frames(args.source, FRAMES_CALENTAMIENTO + args.frames)):
+        if zonas.zonas and integral is None:
+            mascara = np.zeros(frame.shape[:2], dtype=np.uint8)
+            for poligono in zonas.zonas:
+                cv2.fillPoly(mascara, [np.array(poligono, dtype=np.int32)], 255)
+            integral = integral_mascara(mascara)
+        referencia, tiempo_fp32 = medir(fp32, frame)
+        cuantizadas, tiempo_int8 = medir(int8, frame)
+        if numero < FRAMES_CALENTAMIENTO:
+            continue
+        tiempos['fp32'].append(tiempo_fp32)
+        tiempos['int8'].append(tiempo_int8)
+        frame_emparejado = emparejar(cuantizadas, referencia)
+        emparejamientos.extend(frame_emparejado)
+        total_referencia += len(referencia)
+        total_int8 += len(cuantizadas)
+        coincidencias += sum(1 for _, coincide in frame_emparejado if coincide)
+        intrusion_fp32 = hay_intrusion(referencia, integral, args.zone_overlap_ratio)
+        intrusion_int8 = hay_intrusion(cuantizadas, integral, args.zone_overlap_ratio)
+        intrusiones_fp32 += intrusion_fp32
+        intrusiones_detectadas += intrusion_fp32 and intrusion_int8
+        intrusiones_espurias += intrusion_int8 and not intrusion_fp32
+    if not tiempos['fp32']:
+        print("[Comparacion] La fuente no tiene frames suficientes")
+        return
+    print(f"\n=== FP32 ({args.reference}) vs INT8 ({len(tiempos['fp32'])} frames, imgsz {args.imgsz}) ===")
+    print(f"{'Modelo':<8}{'Media':>12}{'P95':>12}")
+    for nombre, valores in tiempos.items():
+        print(f"{nombre:<8}{statistics.mean(valores) * 1000:>10.2f}ms{percentil(valores, 0.95) * 1000:>10.2f}ms")
+    print(f"Aceleracion INT8: {statistics.mean(tiempos['fp32']) / statistics.mean(tiempos['int8']):.2f}x")
+    print(f"AP50 INT8 vs FP32:   {precision_promedio(emparejamientos, total_referencia):.3f}")
+    print(f"Recall de cajas:     {coincidencias / total_referencia if total_referencia else 1.0:.3f} ({coincidencias}/{total_referencia})")
+    print(f"Precision de cajas:  {coincidencias / total_int8 if total_int8 else 1.0:.3f} ({coincidencias}/{total_int8})")
+    if integral is None:
+        print("Sin zonas cargadas: no se evalua el recall de intrusiones (--zones)")
+        print("=" * 46 + "\n")
+        return
+    recall_intrusiones = intrusiones_detectadas / intrusiones_fp32 if intrusiones_fp32 else 1.0
+    print(f"Recall intrusiones:  {recall_intrusiones:.3f} ({intrusiones_detectadas}/{intrusiones_fp32} frames con persona en zona)")
+    print(f"Intrusiones nuevas:  {intrusiones_espurias} frames marcados solo por INT8")
+    if intrusiones_fp32 == 0:
+        print("Veredicto: SIN EVIDENCIA (la grabacion no tiene personas en zona)")
+    elif recall_intrusiones >= args.min_recall:
+        print(f"Veredicto: OK (recall de intrusiones >= {args.min_recall})")
+    else:
+        print(f"Veredicto: NO CAMBIAR (recall de intrusiones < {args.min_recall})")
+    print("=" * 46 + "\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cuantizacion INT8 calibrada con grabaciones propias y comparacion contra FP32")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    parser_calibrate = subparsers.add_parser("calibrate", help="Armar el conjunto de calibracion con frames de grabaciones")
+    parser_calibrate.add_argument("--sources", nargs="+", required=True, help="Videos o clips .npy de las camaras")
+    parser_calibrate.add_argument("--frames", type=int, default=FRAMES_CALIBRACION_DEFECTO, help="Frames totales (default: 300)")
+    parser_calibrate.add_argument("--output", default="calibracion", help="Carpeta de salida (default: calibracion)")
+    parser_compare = subparsers.add_parser("compare", help="Comparar FP32 contra INT8 en precision y latencia")
+    parser_compare.add_argument("--source", required=True, help="Video o clip .npy distinto de los de calibracion")
+    parser_compare.add_argument("--calib", required=True, help="calibracion.yaml generado con 'calibrate'")
+    parser_compare.add_argument("--weights", default=None, help="Ruta a pesos YOLO (.pt)")
+    parser_compare.add_argument("--conf", type=float, default=0.53, help="Umbral de confianza")
+    parser_compare.add_argument("--imgsz", type=int, default=640, help="Tamano de imagen para inferencia")
+    parser_compare.add_argument(
+        "--reference",
+        default="openvino",
+        choices=[backend for backend in BACKENDS if backend != BACKEND_INT8],
+        help="Backend FP32 de referencia (default: openvino, aisla el efecto de la cuantizacion)",
+    )
+    parser_compare.add_argument("--frames", type=int, default=FRAMES_COMPARACION_DEFECTO, help="Frames a comparar (default: 200)")
+    parser_compare.add_argument("--zones", default="zonas.json", help="Archivo JSON con zonas para el recall de intrusiones")
+    parser_compare.add_argument("--zone_overlap_ratio", type=float, default=0.30, help="Solapamiento minimo bbox/zona (default: 0.30)")
+    parser_compare.add_argument("--min_recall", type=float, default=RECALL_MINIMO_DEFECTO, help="Recall de intrusiones exigido (default: 0.99)")
+    args = parser.parse_args()
+    if args.command == "calibrate":
+        calibrar(args)
+    else:
+        comparar(args)
+
+#endregion
@@ -8,8 +8,10 @@ SEGUNDOS_ESPERA_DEFECTO = 10  # Espera entre alertas del mismo track
 
 class Alertas:
     
-    def __init__(self, segundos_espera: int = SEGUNDOS_ESPERA_DEFECTO):
+    # reloj: función que devuelve el tiempo actual en segundos (time.time o un RelojMedios)
+    def __init__(self, segundos_espera: int = SEGUNDOS_ESPERA_DEFECTO, reloj=time.time):
         self.espera = segundos_espera
+        self.reloj = reloj
         self.ultima_alerta_tiempo = {}  # key -> timestamp
         self.lock = Lock()
         # Flash visual (punto rojo en pantalla) persistente tras una alerta
@@ -17,9 +19,9 @@ class Alertas:
 
     def _puede_alertar(self, key: str):
         with self.lock:
-            t = time.time()
-            last = self.ultima_alerta_tiempo.get(key, 0)
-            if t - last >= self.espera:
+            t = self.reloj()
+            last = self.ultima_alerta_tiempo.get(key)
+            if last is None or t - last >= self.espera:
                 self.ultima_alerta_tiempo[key] = t
                 return True
             return False
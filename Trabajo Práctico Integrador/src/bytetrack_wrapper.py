@@ -4,6 +4,7 @@
 
 from typing import List, Dict
 import numpy as np
+from src.detecciones import Detecciones
 
 try:
     import supervision as sv
@@ -38,28 +39,25 @@ class ByteTrackWrapper:
     # Args: detecciones: Lista de dicts con 'bbox' y 'conf'
     # Returns: Lista de tracks con 'track_id', 'bbox', 'conf'
     def actualizar(self, detecciones: List[Dict]) -> List[Dict]:
+        return self.actualizar_columnas(Detecciones.desde_diccionarios(detecciones)).a_diccionarios()
+
+    # Igual que actualizar() pero con Detecciones: los arreglos pasan directo a Supervision y vuelven sin convertir
+    def actualizar_columnas(self, detecciones: Detecciones) -> Detecciones:
         if len(detecciones) == 0:
             # Actualizar con detecciones vacías para mantener tracks existentes
-            detecciones_vacias = sv.Detections.empty()
-            tracked = self.tracker.update_with_detections(detecciones_vacias)
-            return []
-        # Convertir detections al formato Supervision
-        xyxy = np.array([d['bbox'] for d in detecciones], dtype=np.float32)
-        confianza = np.array([d['conf'] for d in detecciones], dtype=np.float32)
-        # Crear objeto Detections de supervision
+            self.tracker.update_with_detections(sv.Detections.empty())
+            return Detecciones.vacias(detecciones.nombres)
         # Todos son clase 0 (person)
-        detecciones_sv = sv.Detections(xyxy=xyxy, confidence=confianza, class_id=np.zeros(len(detecciones), dtype=int))
+        detecciones_sv = sv.Detections(xyxy=detecciones.xyxy, confidence=detecciones.conf, class_id=np.zeros(len(detecciones), dtype=int))
         # Ejecutar ByteTrack
         detecciones_rastreadas = self.tracker.update_with_detections(detecciones_sv)
-        # Convertir de vuelta a nuestro formato
-        tracks = []
-        if detecciones_rastreadas.tracker_id is not None:
-            for i in range(len(detecciones_rastreadas.xyxy)):
-                bbox = detecciones_rastreadas.xyxy[i].tolist()
-                id_track = int(detecciones_rastreadas.tracker_id[i])
-                confianza = float(detecciones_rastreadas.confidence[i]) if detecciones_rastreadas.confidence is not None else 1.0
-                tracks.append({'track_id': id_track, 'bbox': bbox, 'conf': confianza, 'lost': 0 })
-        return tracks
+        if detecciones_rastreadas.tracker_id is None or len(detecciones_rastreadas) == 0:
+            return Detecciones.vacias(detecciones.nombres)
+        confianza = detecciones_rastreadas.confidence
+        if confianza is None:
+            confianza = np.ones(len(detecciones_rastreadas), dtype=np.float32)
+        return Detecciones(detecciones_rastreadas.xyxy, confianza, detecciones_rastreadas.class_id,
+                           detecciones_rastreadas.tracker_id, nombres=detecciones.nombres)
 
 if __name__ == '__main__':
     if SUPERVISION_AVAILABLE:
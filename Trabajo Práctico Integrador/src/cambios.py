@@ -0,0 +1,74 @@
+# Detección barata de cambios de contenido entre frames.
+# Compara una miniatura en escala de grises con la del último frame que sí cambió.
+# La diferencia absoluta se promedia por celda de una grilla y decide la celda que más
+# cambió: un promedio sobre todo el frame diluye a una persona chica o lejana (justo el
+# caso que importa) hasta dejarla bajo el umbral. Permite saltear la inferencia en escenas
+# estáticas (pantallas o cámaras fijas) reutilizando las detecciones anteriores.
+import cv2
+import numpy as np
+
+UMBRAL_DIFERENCIA_DEFECTO = 2.0  # Diferencia absoluta media (0-255) en alguna celda para considerar cambio
+TAMANO_MINIATURA = (192, 108)  # (ancho, alto) de la miniatura de comparación
+CELDAS_GRILLA = (16, 9)  # (columnas, filas) de la grilla sobre la miniatura
+
+class DetectorCambios:
+
+    """
+    Args:   umbral (float): Diferencia absoluta media mínima (escala 0-255) en alguna celda para considerar que hubo cambio
+            tamano_miniatura (tuple): (ancho, alto) de la miniatura usada para comparar
+            celdas (tuple): (columnas, filas) de la grilla en la que se promedia la diferencia
+    """
+    def __init__(self, umbral=UMBRAL_DIFERENCIA_DEFECTO, tamano_miniatura=TAMANO_MINIATURA, celdas=CELDAS_GRILLA):
+        self.umbral = umbral
+        self.tamano_miniatura = tamano_miniatura
+        self.celdas = celdas
+        self.frames_evaluados = 0
+        self.frames_sin_cambio = 0
+        self._referencia = None
+
+    def _miniatura(self, frame):
+        miniatura = cv2.resize(frame, self.tamano_miniatura, interpolation=cv2.INTER_AREA)
+        if miniatura.ndim == 3:
+            miniatura = cv2.cvtColor(miniatura, cv2.COLOR_BGR2GRAY)
+        return miniatura
+
+    # Indica si el frame difiere de la última referencia.
+    # La referencia solo se actualiza cuando hay cambio, así los cambios lentos se acumulan
+    # hasta superar el umbral en lugar de pasar desapercibidos.
+    def hay_cambio(self, frame) -> bool:
+        self.frames_evaluados += 1
+        miniatura = self._miniatura(frame)
+        if self._referencia is None or self._referencia.shape != miniatura.shape:
+            self._referencia = miniatura
+            return True
+        diferencia = cv2.absdiff(miniatura, self._referencia).astype(np.float32)
+        # Diferencia media de cada celda; decide la celda que más cambió
+        diferencia = float(cv2.resize(diferencia, self.celdas, interpolation=cv2.INTER_AREA).max())
+        if diferencia >= self.umbral:
+            self._referencia = miniatura
+            return True
+        self.frames_sin_cambio += 1
+        return False
+
+    # Porcentaje de frames evaluados que se consideraron sin cambio
+    def obtener_tasa_omision(self) -> float:
+        if self.frames_evaluados == 0:
+            return 0.0
+        return self.frames_sin_cambio / self.frames_evaluados * 100
+
+    # Fuerza a que el próximo frame se considere cambiado (p.ej. tras reconectar)
+    def reiniciar(self):
+        self._referencia = None
+
+if __name__ == '__main__':
+    # Verificación rápida (python -m src.cambios): una figura chica que entra a un frame 1080p
+    # liso debe contar como cambio, y el mismo frame repetido no
+    fondo = np.full((1080, 1920, 3), 150, dtype=np.uint8)
+    con_intruso = fondo.copy()
+    con_intruso[600:800, 1500:1580] = 50  # 80x200 px, 100 niveles más oscura
+    detector = DetectorCambios()
+    assert detector.hay_cambio(fondo)
+    assert not detector.hay_cambio(fondo.copy())
+    assert detector.hay_cambio(con_intruso), 'Intruso chico no detectado como cambio'
+    assert not detector.hay_cambio(con_intruso.copy())
+    print('DetectorCambios: OK')
@@ -0,0 +1,85 @@
+# Fuente dual: substream de baja resolución para detección y stream principal para evidencia.
+# Detección, tracking y zonas trabajan sobre el substream (p.ej. Hikvision canal 102);
+# el stream principal (canal 101) solo se usa para visualizar o guardar evidencia.
+# Expone la misma interfaz que CapturaEscalada: `escala` y obtener_frame_completo().
+class CapturaDual:
+
+    """
+    Args:   captura_deteccion: Captura del substream (se lee de forma síncrona en read())
+            captura_evidencia: Captura del stream principal. Si expone ultimo_frame() (stream en vivo:
+                               CapturaHilo o suscripción de HubCapturas) se usa su último frame sin
+                               bloquear; si no (archivos de video), se lee en paralelo con la de
+                               detección para mantener ambos sincronizados.
+    Atributos:
+            escala (tuple): (fx, fy) de coordenadas del stream principal a coordenadas del substream
+    """
+    def __init__(self, captura_deteccion, captura_evidencia):
+        self.captura_deteccion = captura_deteccion
+        self.captura_evidencia = captura_evidencia
+        self.sincronica = not hasattr(captura_evidencia, 'ultimo_frame')
+        self.escala = 1.0
+        self._frame_completo = None
+
+    def isOpened(self):
+        return self.captura_deteccion.isOpened() and self.captura_evidencia.isOpened()
+
+    # Lee un frame del substream y asocia el frame de evidencia más reciente.
+    # Returns: tuple: (success, frame_deteccion)
+    def read(self):
+        ret, frame = self.captura_deteccion.read()
+        return self._asociar_evidencia(ret, frame, self.captura_evidencia.read)
+
+    # Avanza ambas fuentes sin decodificar (la de evidencia solo si se lee en sincronía)
+    def grab(self):
+        ret = self.captura_deteccion.grab()
+        if self.sincronica:
+            self.captura_evidencia.grab()
+        return ret
+
+    # Decodifica los frames del último grab()
+    def retrieve(self):
+        ret, frame = self.captura_deteccion.retrieve()
+        return self._asociar_evidencia(ret, frame, self.captura_evidencia.retrieve)
+
+    def _asociar_evidencia(self, ret, frame, leer_evidencia):
+        if not ret or frame is None:
+            self._frame_completo = None
+            return False, None
+        if self.sincronica:
+            ret_evidencia, frame_evidencia = leer_evidencia()
+            if not ret_evidencia:
+                frame_evidencia = None
+        else:
+            # ultimo_frame() es el buffer que publica el hilo del stream principal y vuelve igual
+            # mientras no llegue otro frame: se copia para que el overlay no se acumule sobre él
+            frame_evidencia = self.captura_evidencia.ultimo_frame()
+            if frame_evidencia is not None:
+                frame_evidencia = frame_evidencia.copy()
+        # Sin frame de evidencia todavía: se usa el de detección (escala 1)
+        if frame_evidencia is None:
+            self.escala = 1.0
+            self._frame_completo = frame
+        else:
+            alto, ancho = frame.shape[:2]
+            alto_evidencia, ancho_evidencia = frame_evidencia.shape[:2]
+            self.escala = (ancho / float(ancho_evidencia), alto / float(alto_evidencia))
+            self._frame_completo = frame_evidencia
+        return True, frame
+
+    # Frame del stream principal asociado al último read()
+    def obtener_frame_completo(self):
+        return self._frame_completo
+
+    def release(self):
+        self.captura_deteccion.release()
+        self.captura_evidencia.release()
+
+    def get(self, propId):
+        return self.captura_deteccion.get(propId)
+
+    def set(self, propId, value):
+        return self.captura_deteccion.set(propId, value)
+
+    def __getattr__(self, nombre):
+        # Estado de reconexión/descartes corresponde al substream que maneja el pipeline
+        return getattr(self.captura_deteccion, nombre)
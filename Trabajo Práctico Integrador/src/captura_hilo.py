@@ -0,0 +1,126 @@
+# Captura en segundo plano con política "el último frame gana".
+# Un hilo decodifica la fuente continuamente y conserva solo el frame más reciente,
+# así los streams RTSP/webcam no acumulan retraso cuando la inferencia es más lenta
+# que la cámara. Compatible con la interfaz de cv2.VideoCapture.
+import threading
+
+TIMEOUT_LECTURA_DEFECTO = 5.0  # Segundos máximos esperando un frame nuevo en read()
+TIMEOUT_CIERRE_HILO = 2.0  # Segundos máximos esperando que termine el hilo al liberar
+
+class CapturaHilo:
+
+    """
+    Envuelve una captura ya abierta y la decodifica en un hilo daemon.
+    Args:   captura: Objeto compatible con cv2.VideoCapture (abierto)
+            timeout_lectura (float): Segundos a esperar un frame nuevo en read()
+    Atributos:
+            secuencia (int): Número del último frame decodificado
+            secuencia_leida (int): Número del último frame entregado por read()
+            frames_descartados (int): Frames reemplazados antes de ser leídos
+    """
+    def __init__(self, captura, timeout_lectura=TIMEOUT_LECTURA_DEFECTO):
+        self.captura = captura
+        self._inicializar_estado(timeout_lectura)
+        self._activo = captura.isOpened()
+        if self._activo:
+            self._hilo.start()
+
+    def _inicializar_estado(self, timeout_lectura):
+        self.timeout_lectura = timeout_lectura
+        self.secuencia = 0
+        self.secuencia_leida = 0
+        self.frames_descartados = 0
+        self._frame = None
+        self._frame_tomado = None
+        self._fin_fuente = False
+        self._condicion = threading.Condition()
+        self._hilo = threading.Thread(target=self._bucle_lectura, daemon=True)
+
+    # Publica un frame nuevo reemplazando el anterior (debe llamarse con el lock tomado)
+    def _publicar_frame(self, frame):
+        if self.secuencia > self.secuencia_leida:
+            self.frames_descartados += 1
+        self._frame = frame
+        self.secuencia += 1
+        self._condicion.notify_all()
+
+    # Decodifica frames mientras la captura esté activa, reemplazando el anterior.
+    # Al terminar por el motivo que sea (fin de la fuente o excepción en read()) marca el fin
+    # de la fuente, así read()/esperar_frame() no esperan a un hilo que ya no existe.
+    def _bucle_lectura(self):
+        try:
+            while self._activo:
+                try:
+                    ret, frame = self.captura.read()
+                except Exception as e:
+                    print(f'[CapturaHilo] Error leyendo la fuente: {e}')
+                    return
+                if not ret:
+                    return
+                with self._condicion:
+                    self._publicar_frame(frame)
+        finally:
+            with self._condicion:
+                self._fin_fuente = True
+                self._condicion.notify_all()
+
+    def _hay_novedad(self):
+        return self.secuencia > self.secuencia_leida or self._fin_fuente or not self._activo
+
+    def isOpened(self):
+        return self._activo and self.captura.isOpened()
+
+    # Devuelve el frame más reciente que todavía no fue leído.
+    # Bloquea hasta que llegue uno nuevo (o timeout_lectura) para no repetir frames.
+    # Returns: tuple: (success, frame)
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    # Toma el frame más reciente sin entregarlo (compatible con cv2.VideoCapture.grab).
+    # El hilo decodifica igual todos los frames: aquí grab() solo evita el retrieve().
+    def grab(self):
+        with self._condicion:
+            self._condicion.wait_for(self._hay_novedad, timeout=self.timeout_lectura)
+            if self.secuencia <= self.secuencia_leida:
+                return False
+            self.secuencia_leida = self.secuencia
+            self._frame_tomado = self._frame
+            return True
+
+    # Entrega el frame tomado en el último grab()
+    def retrieve(self):
+        return self._frame_tomado is not None, self._frame_tomado
+
+    # Devuelve el último frame decodificado sin consumirlo (None si aún no hay)
+    def ultimo_frame(self):
+        with self._condicion:
+            return self._frame
+
+    # Espera un frame posterior a `secuencia` sin consumirlo (varios lectores, ver HubCapturas).
+    # Returns: tuple: (secuencia, frame) o (secuencia, None) si no llegó a tiempo
+    def esperar_frame(self, secuencia):
+        with self._condicion:
+            self._condicion.wait_for(
+                lambda: self.secuencia > secuencia or self._fin_fuente or not self._activo,
+                timeout=self.timeout_lectura,
+            )
+            if self.secuencia <= secuencia:
+                return secuencia, None
+            return self.secuencia, self._frame
+
+    # Detiene el hilo y libera la captura subyacente
+    def release(self):
+        with self._condicion:
+            self._activo = False
+            self._condicion.notify_all()
+        if self._hilo.is_alive() and self._hilo is not threading.current_thread():
+            self._hilo.join(timeout=TIMEOUT_CIERRE_HILO)
+        self.captura.release()
+
+    def get(self, propId):
+        return self.captura.get(propId)
+
+    def set(self, propId, value):
+        return self.captura.set(propId, value)
@@ -0,0 +1,122 @@
+# Clips de frames crudos en .npy mapeados en memoria.
+# Permite grabar N frames de cualquier fuente (crear_fuente_pantalla) y reproducirlos sin
+# decodificar: el archivo es un arreglo (N, alto, ancho, 3) uint8 con el encabezado .npy
+# (forma y dtype) y los frames se entregan como vistas del mapeo, sin copias. Así los
+# benchmarks de detector, tracker y overlay miden solo el pipeline y son reproducibles.
+import os
+import cv2
+import numpy as np
+
+FPS_CLIP_DEFECTO = 30.0  # FPS informados por CapturaClip (el .npy no guarda tiempos)
+
+# Graba hasta `cantidad_frames` frames de `captura` en `ruta` (.npy mapeado en memoria).
+# Los frames con una resolución distinta a la del primero se descartan.
+# Returns: int: frames grabados
+def grabar_clip(captura, ruta, cantidad_frames):
+    if not ruta.endswith('.npy'):
+        ruta += '.npy'
+    ret, frame = captura.read()
+    if not ret or frame is None:
+        return 0
+    ruta_temporal = ruta + '.tmp'
+    clip = np.lib.format.open_memmap(ruta_temporal, mode='w+', dtype=np.uint8, shape=(cantidad_frames,) + frame.shape)
+    grabados = 0
+    while True:
+        if frame.shape != clip.shape[1:]:
+            print(f'[Clip] Frame {grabados} descartado: resolución {frame.shape} distinta de {clip.shape[1:]}')
+        else:
+            clip[grabados] = frame
+            grabados += 1
+        if grabados >= cantidad_frames:
+            break
+        ret, frame = captura.read()
+        if not ret or frame is None:
+            break
+    clip.flush()
+    if grabados < cantidad_frames:
+        # La fuente terminó antes: se reescribe con la cantidad real de frames
+        np.save(ruta, clip[:grabados])
+        del clip
+        os.remove(ruta_temporal)
+    else:
+        del clip
+        os.replace(ruta_temporal, ruta)
+    return grabados
+
+class CapturaClip:
+
+    """
+    Fuente compatible con cv2.VideoCapture que lee un clip grabado con grabar_clip().
+    Args:   ruta (str): Archivo .npy
+            fps (float): FPS informados en get(CAP_PROP_FPS)
+            repetir (bool): Volver al inicio al terminar el clip
+    Atributos:
+            indice (int): Índice del próximo frame a entregar
+    Los frames son vistas copy-on-write del mapeo: dibujar sobre ellos no modifica el archivo
+    y el sistema solo copia las páginas tocadas. Cada vuelta (repetir) reabre el mapeo para
+    que los dibujos de la vuelta anterior no se acumulen.
+    """
+    def __init__(self, ruta, fps=FPS_CLIP_DEFECTO, repetir=False):
+        self.ruta = ruta
+        self.fps = fps
+        self.repetir = repetir
+        self.indice = 0
+        self._frames = self._mapear()
+        self._frame = None
+
+    def _mapear(self):
+        try:
+            return np.load(self.ruta, mmap_mode='c')
+        except (OSError, ValueError) as e:
+            print(f'[Clip] No se pudo abrir {self.ruta}: {e}')
+            return None
+
+    def isOpened(self):
+        return self._frames is not None
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def grab(self):
+        if self._frames is None:
+            return False
+        if self.indice >= len(self._frames):
+            if not self.repetir or len(self._frames) == 0:
+                return False
+            self._frames = self._mapear()
+            self.indice = 0
+        self._frame = self._frames[self.indice]
+        self.indice += 1
+        return True
+
+    def retrieve(self):
+        return self._frame is not None, self._frame
+
+    def release(self):
+        self._frames = None
+        self._frame = None
+
+    def get(self, propId):
+        if self._frames is None:
+            return 0
+        if propId == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self._frames)
+        if propId == cv2.CAP_PROP_FRAME_WIDTH:
+            return self._frames.shape[2]
+        if propId == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self._frames.shape[1]
+        if propId == cv2.CAP_PROP_FPS:
+            return self.fps
+        if propId == cv2.CAP_PROP_POS_FRAMES:
+            return self.indice
+        if propId == cv2.CAP_PROP_POS_MSEC:
+            return max(self.indice - 1, 0) * 1000.0 / self.fps
+        return 0
+
+    def set(self, propId, value):
+        if propId == cv2.CAP_PROP_POS_FRAMES and self._frames is not None:
+            self.indice = min(max(int(value), 0), len(self._frames))
+            return True
+        return False
@@ -0,0 +1,129 @@
+# Control adaptativo de la inferencia.
+# Reemplaza los --skip_frames / --imgsz fijos de cada máquina por un lazo cerrado: mide
+# los FPS de punta a punta y la latencia del detector en ventanas de frames y ajusta el
+# salto de frames (stride) y, opcionalmente, el imgsz dentro de una escalera de valores
+# para cumplir un objetivo de FPS y/o un presupuesto de latencia por inferencia.
+# Para degradar primero se sube el salto y recién con el salto al máximo se baja el imgsz;
+# para recuperar calidad se deshace en orden inverso. Contra la oscilación: banda de
+# histéresis alrededor del objetivo, permanencia mínima tras cada cambio, y solo se
+# recupera un escalón si la predicción (latencia escalada con imgsz², frecuencia de
+# inferencia con el salto) sigue cumpliendo el objetivo con la banda de margen.
+import time
+
+SALTO_MAXIMO_DEFECTO = 4  # Frames salteados como máximo entre inferencias
+HISTERESIS_DEFECTO = 0.15  # Banda relativa alrededor del objetivo sin cambios
+FRAMES_VENTANA = 30  # Frames por ventana de medición
+FRAMES_PERMANENCIA = 60  # Frames mínimos entre dos cambios de configuración
+
+class ControladorAdaptativo:
+
+    """
+    Args:   fps_objetivo (float): FPS de punta a punta a sostener (0 = sin objetivo)
+            latencia_objetivo (float): Presupuesto en ms por inferencia del detector (0 = sin objetivo)
+            salto_inicial (int): Frames salteados entre inferencias al arrancar
+            salto_maximo (int): Máximo de frames salteados
+            escalera_imgsz (list): Tamaños de inferencia admitidos; el primero al arrancar es tam_imagen
+            tam_imagen (int): imgsz inicial y máximo (los escalones mayores se descartan)
+            histeresis (float): Banda relativa alrededor del objetivo
+    Atributos:
+            salto (int): Frames salteados entre inferencias (como --skip_frames)
+            tam_imagen (int): imgsz actual para el detector
+            cambios (int): Cambios de configuración aplicados
+    """
+    def __init__(self, fps_objetivo=0, latencia_objetivo=0, salto_inicial=0, salto_maximo=SALTO_MAXIMO_DEFECTO,
+                 escalera_imgsz=None, tam_imagen=640, histeresis=HISTERESIS_DEFECTO,
+                 frames_ventana=FRAMES_VENTANA, frames_permanencia=FRAMES_PERMANENCIA):
+        if not fps_objetivo and not latencia_objetivo:
+            raise ValueError("El control adaptativo necesita un objetivo de FPS o de latencia")
+        self.fps_objetivo = fps_objetivo
+        self.latencia_objetivo = latencia_objetivo / 1000.0
+        self.salto_maximo = max(0, salto_maximo)
+        self.salto = min(max(0, salto_inicial), self.salto_maximo)
+        self.escalera = sorted({t for t in (escalera_imgsz or []) if t <= tam_imagen} | {tam_imagen}, reverse=True)
+        self._indice_imgsz = 0
+        self.histeresis = histeresis
+        self.frames_ventana = frames_ventana
+        self.frames_permanencia = frames_permanencia
+        self.cambios = 0
+        self.fps_medidos = 0.0
+        self.latencia_media = 0.0
+        self._frames_desde_cambio = 0
+        self._reiniciar_ventana()
+
+    @property
+    def tam_imagen(self):
+        return self.escalera[self._indice_imgsz]
+
+    def _reiniciar_ventana(self):
+        self._inicio_ventana = time.perf_counter()
+        self._frames = 0
+        self._inferencias = 0
+        self._tiempo_inferencia = 0.0
+
+    # Registrar cada frame mostrado; `latencia` (segundos) solo si el frame pasó por el detector.
+    # Returns: bool: True si cambió el salto o el imgsz
+    def registrar_frame(self, latencia=None):
+        self._frames += 1
+        self._frames_desde_cambio += 1
+        if latencia is not None:
+            self._inferencias += 1
+            self._tiempo_inferencia += latencia
+        if self._frames < self.frames_ventana:
+            return False
+        duracion = time.perf_counter() - self._inicio_ventana
+        self.fps_medidos = self._frames / duracion if duracion > 0 else 0.0
+        if self._inferencias:
+            self.latencia_media = self._tiempo_inferencia / self._inferencias
+        fraccion_inferida = self._inferencias / float(self._frames)
+        self._reiniciar_ventana()
+        if self._frames_desde_cambio < self.frames_permanencia or self.latencia_media == 0:
+            return False
+        return self._evaluar(fraccion_inferida)
+
+    # Predice (fps, latencia) para otro salto/imgsz a partir de la última ventana
+    def _predecir(self, fraccion_inferida, salto, indice_imgsz):
+        latencia = self.latencia_media * (self.escalera[indice_imgsz] / float(self.tam_imagen)) ** 2
+        tiempo_frame = 1.0 / self.fps_medidos if self.fps_medidos > 0 else 0.0
+        # El resto del pipeline (captura, tracking, dibujo) no depende del detector
+        tiempo_resto = max(tiempo_frame - self.latencia_media * fraccion_inferida, 0.0)
+        fraccion = fraccion_inferida * (self.salto + 1) / float(salto + 1)
+        tiempo = tiempo_resto + latencia * fraccion
+        return (1.0 / tiempo if tiempo > 0 else float('inf')), latencia
+
+    def _cumple(self, fps, latencia, margen):
+        fps_ok = not self.fps_objetivo or fps >= self.fps_objetivo * (1 + margen)
+        latencia_ok = not self.latencia_objetivo or latencia <= self.latencia_objetivo * (1 - margen)
+        return fps_ok and latencia_ok
+
+    def _evaluar(self, fraccion_inferida):
+        ultimo_imgsz = len(self.escalera) - 1
+        latencia_excedida = self.latencia_objetivo and self.latencia_media > self.latencia_objetivo * (1 + self.histeresis)
+        fps_bajos = self.fps_objetivo and self.fps_medidos < self.fps_objetivo * (1 - self.histeresis)
+        if latencia_excedida and self._indice_imgsz < ultimo_imgsz:
+            # El salto no acorta una inferencia: solo un imgsz menor ayuda
+            return self._aplicar(self.salto, self._indice_imgsz + 1)
+        if fps_bajos:
+            if self.salto < self.salto_maximo:
+                return self._aplicar(self.salto + 1, self._indice_imgsz)
+            if self._indice_imgsz < ultimo_imgsz:
+                return self._aplicar(self.salto, self._indice_imgsz + 1)
+            return False
+        if latencia_excedida or fps_bajos:
+            return False
+        # Recuperar calidad en orden inverso, solo si la predicción deja margen
+        if self._indice_imgsz > 0 and self._cumple(*self._predecir(fraccion_inferida, self.salto, self._indice_imgsz - 1), self.histeresis):
+            return self._aplicar(self.salto, self._indice_imgsz - 1)
+        if self.fps_objetivo and self.salto > 0 and self._indice_imgsz == 0 and self._cumple(*self._predecir(fraccion_inferida, self.salto - 1, 0), self.histeresis):
+            return self._aplicar(self.salto - 1, 0)
+        return False
+
+    def _aplicar(self, salto, indice_imgsz):
+        self.salto = salto
+        self._indice_imgsz = indice_imgsz
+        self.cambios += 1
+        self._frames_desde_cambio = 0
+        return True
+
+    # Descripción corta de la configuración actual (panel y logs)
+    def describir(self):
+        return f"salto {self.salto} / {self.tam_imagen}px"
@@ -0,0 +1,147 @@
+# Detecciones y tracks en formato columnar (arreglos NumPy).
+# Detector, trackers, zonas y FiltroGeometrico intercambian un único objeto Detecciones
+# con un arreglo por campo en lugar de un dict por caja: la salida del modelo se copia
+# a CPU una sola vez y las operaciones por caja (escala, centros, áreas, solapamiento con
+# zonas) se resuelven vectorizadas. Iterarlo devuelve los dicts de siempre
+# ({bbox, conf, cls, label, track_id, lost}) para el código que aún usa esa interfaz.
+import cv2
+import numpy as np
+from src.escalado import _factores
+
+SIN_TRACK = -1  # track_id de una detección que aún no pasó por el tracker
+
+class Detecciones:
+
+    """
+    Args:   xyxy (np.ndarray): (N, 4) cajas [x1, y1, x2, y2]
+            conf (np.ndarray): (N,) confianzas
+            cls (np.ndarray): (N,) ids de clase
+            track_id (np.ndarray): (N,) ids de track (SIN_TRACK si no hay tracker)
+            perdidos (np.ndarray): (N,) frames consecutivos sin emparejar (solo tracks)
+            nombres (dict): id de clase -> etiqueta (el dict names del modelo)
+    """
+    def __init__(self, xyxy, conf, cls=None, track_id=None, perdidos=None, nombres=None):
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        cantidad = len(self.xyxy)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(cantidad)
+        self.cls = np.zeros(cantidad, dtype=np.int32) if cls is None else np.asarray(cls, dtype=np.int32).reshape(cantidad)
+        self.track_id = np.full(cantidad, SIN_TRACK, dtype=np.int64) if track_id is None else np.asarray(track_id, dtype=np.int64).reshape(cantidad)
+        self.perdidos = np.zeros(cantidad, dtype=np.int32) if perdidos is None else np.asarray(perdidos, dtype=np.int32).reshape(cantidad)
+        self.nombres = nombres or {}
+
+    @classmethod
+    def vacias(cls, nombres=None):
+        return cls(np.empty((0, 4)), np.empty(0), nombres=nombres)
+
+    # Desde un resultado de Ultralytics: una sola copia GPU -> CPU por campo
+    @classmethod
+    def desde_resultado(cls, resultado, nombres=None):
+        cajas = resultado.boxes
+        if cajas is None or len(cajas) == 0:
+            return cls.vacias(nombres)
+        return cls(cajas.xyxy.cpu().numpy(), cajas.conf.cpu().numpy(), cajas.cls.cpu().numpy(), nombres=nombres)
+
+    # Desde la lista de dicts del formato anterior
+    @classmethod
+    def desde_diccionarios(cls, diccionarios):
+        if isinstance(diccionarios, Detecciones):
+            return diccionarios
+        if not diccionarios:
+            return cls.vacias()
+        return cls(
+            [d['bbox'] for d in diccionarios],
+            [d.get('conf', 0.0) for d in diccionarios],
+            [d.get('cls', 0) for d in diccionarios],
+            [d.get('track_id', SIN_TRACK) for d in diccionarios],
+            [d.get('lost', 0) for d in diccionarios],
+        )
+
+    def __len__(self):
+        return len(self.xyxy)
+
+    # Un entero devuelve el dict de esa caja; una máscara, slice o lista de índices, otras Detecciones
+    def __getitem__(self, indice):
+        if isinstance(indice, (int, np.integer)):
+            return self._diccionario(int(indice))
+        return Detecciones(self.xyxy[indice], self.conf[indice], self.cls[indice], self.track_id[indice], self.perdidos[indice], self.nombres)
+
+    def __iter__(self):
+        return (self._diccionario(i) for i in range(len(self)))
+
+    def _diccionario(self, i):
+        id_clase = int(self.cls[i])
+        diccionario = {'bbox': self.xyxy[i].tolist(), 'conf': float(self.conf[i]), 'cls': id_clase,
+                       'label': self.nombres.get(id_clase, str(id_clase))}
+        if self.track_id[i] != SIN_TRACK:
+            diccionario['track_id'] = int(self.track_id[i])
+            diccionario['lost'] = int(self.perdidos[i])
+        return diccionario
+
+    def a_diccionarios(self):
+        return list(self)
+
+    # Une las detecciones de varias regiones o tiles de un mismo frame
+    @classmethod
+    def concatenar(cls, partes, nombres=None):
+        partes = [parte for parte in partes if len(parte)]
+        if not partes:
+            return cls.vacias(nombres)
+        return cls(np.concatenate([p.xyxy for p in partes]), np.concatenate([p.conf for p in partes]),
+                   np.concatenate([p.cls for p in partes]), np.concatenate([p.track_id for p in partes]),
+                   np.concatenate([p.perdidos for p in partes]), nombres or partes[0].nombres)
+
+    # Copia con las cajas trasladadas (de coordenadas de un recorte a las del frame)
+    def desplazar(self, dx, dy):
+        xyxy = self.xyxy + np.array([dx, dy, dx, dy], dtype=np.float32)
+        return Detecciones(xyxy, self.conf, self.cls, self.track_id, self.perdidos, self.nombres)
+
+    # Copia con las cajas escaladas por `factor` (float o tupla (fx, fy), ver escalado.py)
+    def escalar(self, factor):
+        fx, fy = _factores(factor)
+        if fx == 1.0 and fy == 1.0:
+            return self
+        xyxy = self.xyxy * np.array([fx, fy, fx, fy], dtype=np.float32)
+        return Detecciones(xyxy, self.conf, self.cls, self.track_id, self.perdidos, self.nombres)
+
+    # Returns: (N, 2) enteros con el centro de cada caja
+    def centros(self):
+        return ((self.xyxy[:, :2] + self.xyxy[:, 2:]) / 2).astype(np.int32)
+
+    def anchos(self):
+        return self.xyxy[:, 2] - self.xyxy[:, 0]
+
+    def altos(self):
+        return self.xyxy[:, 3] - self.xyxy[:, 1]
+
+    # Fracción de cada caja cubierta por la máscara de zonas, usando su imagen integral
+    # (ver integral_mascara): cuatro lecturas por caja en lugar de recorrer sus píxeles.
+    def solapamiento(self, integral):
+        if len(self) == 0 or integral is None:
+            return np.zeros(len(self), dtype=np.float32)
+        alto, ancho = integral.shape[0] - 1, integral.shape[1] - 1
+        cajas = self.xyxy.astype(np.int32)
+        x1 = np.clip(cajas[:, 0], 0, ancho)
+        y1 = np.clip(cajas[:, 1], 0, alto)
+        x2 = np.clip(cajas[:, 2], 0, ancho)
+        y2 = np.clip(cajas[:, 3], 0, alto)
+        area = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+        dentro = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+        return np.where(area > 0, dentro / np.maximum(area, 1), 0.0).astype(np.float32)
+
+# Imagen integral de una máscara de zonas (píxeles != 0 cuentan como zona)
+def integral_mascara(mascara):
+    return cv2.integral((mascara > 0).astype(np.uint8))
+
+# IoU entre todas las cajas de `a` (N, 4) y `b` (M, 4). Returns: (N, M)
+def iou_matriz(a, b):
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    interseccion = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = np.clip(a[:, 2] - a[:, 0], 0, None) * np.clip(a[:, 3] - a[:, 1], 0, None)
+    area_b = np.clip(b[:, 2] - b[:, 0], 0, None) * np.clip(b[:, 3] - b[:, 1], 0, None)
+    union = area_a[:, None] + area_b[None, :] - interseccion
+    return np.where(union > 0, interseccion / np.where(union > 0, union, 1), 0.0)
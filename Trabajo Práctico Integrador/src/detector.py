@@ -1,10 +1,20 @@
 # Detector modular usando Ultralytics YOLO.
 # Esta clase carga un modelo Ultralytics y expone un método detect(frame)
 # que devuelve detecciones filtradas para la clase 'person'.
+# detectar_columnas(frame) devuelve lo mismo como Detecciones (arreglos NumPy).
 # Se soporta pasar una ruta a pesos personalizados (por ejemplo, tu YOLOv11.pt).
+# backend='onnx' u 'openvino' exporta los pesos una vez (ver src/exportacion.py) e infiere
+# con ese runtime en CPU; la salida es la misma que con 'pytorch'. 'openvino_int8' además
+# cuantiza a INT8 calibrando con datos_calibracion (ver quant_tool.py).
+# detectar_mosaico(frame) infiere por tiles solapados en un solo lote (ver src/mosaico.py).
 
+import os
+import time
 from ultralytics import YOLO
 import numpy as np
+from src.detecciones import Detecciones
+from src.exportacion import FORMATOS_EXPORTACION, obtener_modelo_exportado
+from src.mosaico import SOLAPAMIENTO_DEFECTO, TAMANO_TILE_DEFECTO, generar_tiles, nms_entre_tiles, tiles_en_rectangulos
 
 #region Constantes
 
@@ -13,17 +23,30 @@ TAMANO_IMAGEN = 640  # Tamaño de imagen para inferencia
 ETIQUETA_PERSONA = 'person'
 UMBRAL_CONFIANZA_DEFECTO = 0.3
 YOLO_DEFAULT_WEIGHTS = 'yolov8n.pt'  # Modelo ligero por defecto
+MULTIPLO_STRIDE = 32  # imgsz debe ser múltiplo del stride máximo del modelo
+BACKEND_DEFECTO = 'pytorch'
+BACKEND_INT8 = 'openvino_int8'
+BACKENDS = (BACKEND_DEFECTO,) + FORMATOS_EXPORTACION + (BACKEND_INT8,)
 
 #endregion
 
 class Detector:
     
     # Si pesos es None se carga un modelo ligero por defecto
-    def __init__(self, pesos: str = None, dispositivo: str = DISPOSITIVO_POR_DEFECTO, umbral_confianza: float = UMBRAL_CONFIANZA_DEFECTO, tam_imagen: int = TAMANO_IMAGEN):
+    # backend: 'pytorch' (eager), 'onnx' (ONNX Runtime), 'openvino' u 'openvino_int8'
+    # datos_calibracion: .yaml generado con quant_tool.py calibrate (requerido por 'openvino_int8')
+    def __init__(self, pesos: str = None, dispositivo: str = DISPOSITIVO_POR_DEFECTO, umbral_confianza: float = UMBRAL_CONFIANZA_DEFECTO, tam_imagen: int = TAMANO_IMAGEN, backend: str = BACKEND_DEFECTO, datos_calibracion: str = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend no soportado: {backend} (opciones: {', '.join(BACKENDS)})")
+        if backend == BACKEND_INT8 and not datos_calibracion:
+            raise ValueError("El backend openvino_int8 requiere datos de calibración (quant_tool.py calibrate)")
         self.pesos = pesos or YOLO_DEFAULT_WEIGHTS
         self.dispositivo = dispositivo
+        self.backend = backend
+        self.datos_calibracion = datos_calibracion
         self.umbral_confianza = umbral_confianza
         self.tam_imagen = tam_imagen
+        self.metricas_mosaico = {}  # Última llamada a detectar_mosaico (tiles y latencias en ms)
         self.modelo = None
         self._cargar_modelo()
 
@@ -31,34 +54,106 @@ class Detector:
     # Forzar a CPU si no hay hardware compatible (CUDA)
     def _cargar_modelo(self):
         self.modelo = YOLO(self.pesos)
+        # Id de la clase 'person' para filtrar dentro del modelo (classes=[id]); None si el modelo no la tiene
+        self.clases_persona = [id_clase for id_clase, nombre in self.modelo.names.items() if nombre.lower() == ETIQUETA_PERSONA] or None
+        if self.backend != BACKEND_DEFECTO and self.pesos.endswith('.pt'):
+            # Los pesos por defecto se descargan al cargarlos: se exporta el archivo que quedó en disco
+            ruta_pesos = self.pesos if os.path.exists(self.pesos) else self.modelo.ckpt_path
+            if self.backend == BACKEND_INT8:
+                ruta_modelo = obtener_modelo_exportado(ruta_pesos, 'openvino', self.tam_imagen, datos_calibracion=self.datos_calibracion)
+            else:
+                ruta_modelo = obtener_modelo_exportado(ruta_pesos, self.backend, self.tam_imagen)
+            self.modelo = YOLO(ruta_modelo, task='detect')
+            return
         try:
             self.modelo.to(self.dispositivo)
         except Exception:
             pass
 
+    # Clase y confianza se filtran en el propio predict (antes del NMS), no caja por caja en Python
+    def _predecir(self, fuente, tam_imagen=None):
+        return self.modelo.predict(fuente, verbose=False, imgsz=tam_imagen or self.tam_imagen, half=False,
+                                   conf=self.umbral_confianza, classes=self.clases_persona)
+
     # Ejecuta inferencia y devuelve lista de detections:
     # [{bbox: [x1,y1,x2,y2], conf: float, cls: int, label: str}]
     # Solo devuelve detecciones con label 'person' para este proyecto.
     def detectar(self, frame: np.ndarray):
-        resultados = self.modelo.predict(frame, verbose=False, imgsz=self.tam_imagen, half=False)  
-        salida = []
+        return self.detectar_columnas(frame).a_diccionarios()
+
+    # Igual que detectar() pero en formato columnar (ver src/detecciones.py)
+    def detectar_columnas(self, frame: np.ndarray) -> Detecciones:
+        resultados = self._predecir(frame)
         if len(resultados) == 0:
-            return salida
-        resultado = resultados[0]
-        cajas = resultado.boxes
-        # cajas.xyxy, cajas.conf, cajas.cls
-        for i in range(len(cajas)):
-            confianza = float(cajas.conf[i])
-            id_clase = int(cajas.cls[i])
-            etiqueta = self.modelo.names.get(id_clase, str(id_clase))
-            if confianza < self.umbral_confianza:
-                continue
-            # Algunos modelos usan diferentes nombres; dejamos solo 'person'
-            if etiqueta.lower() != ETIQUETA_PERSONA and etiqueta.lower() != ETIQUETA_PERSONA.lower():
-                continue
-            xyxy = cajas.xyxy[i].cpu().numpy().tolist()
-            salida.append({'bbox': [float(x) for x in xyxy], 'conf': confianza, 'cls': id_clase, 'label': etiqueta})
-        return salida
+            return Detecciones.vacias(self.modelo.names)
+        return self._convertir_resultado(resultados[0])
+
+    # Infiere solo dentro de `rectangulos` [(x, y, ancho, alto)] (p.ej. GestorZonas.rectangulos_zonas)
+    # y devuelve las cajas en coordenadas del frame. Cada recorte usa su propio imgsz: su lado mayor
+    # redondeado al stride, sin pasar de tam_imagen, así un recorte chico no se amplía inútilmente.
+    def detectar_regiones(self, frame: np.ndarray, rectangulos) -> Detecciones:
+        partes = []
+        for x, y, ancho, alto in rectangulos:
+            tam_imagen = min(self.tam_imagen, -(-max(ancho, alto) // MULTIPLO_STRIDE) * MULTIPLO_STRIDE)
+            resultados = self._predecir(frame[y:y + alto, x:x + ancho], tam_imagen)
+            if len(resultados):
+                partes.append(self._convertir_resultado(resultados[0]).desplazar(x, y))
+        return Detecciones.concatenar(partes, self.modelo.names)
+
+    # Infiere por tiles solapados de tam_tile píxeles (imgsz = tam_tile) en un solo lote, más una pasada
+    # global del frame completo para las personas más grandes que un tile, y fusiona las cajas repetidas
+    # con NMS entre tiles. Con `rectangulos` solo se infieren los tiles que los tocan.
+    def detectar_mosaico(self, frame: np.ndarray, tam_tile: int = TAMANO_TILE_DEFECTO, solapamiento: float = SOLAPAMIENTO_DEFECTO, rectangulos=None, pasada_global: bool = True) -> Detecciones:
+        alto, ancho = frame.shape[:2]
+        tiles = generar_tiles(ancho, alto, tam_tile, solapamiento)
+        tiles_totales = len(tiles)
+        if rectangulos is not None:
+            tiles = tiles_en_rectangulos(tiles, rectangulos)
+        if len(tiles) == 1 and tiles[0][2:] == (ancho, alto):
+            pasada_global = False
+        fuentes = [frame[y:y + tile_alto, x:x + tile_ancho] for x, y, tile_ancho, tile_alto in tiles]
+        if pasada_global:
+            fuentes.append(frame)
+        if not fuentes:
+            self.metricas_mosaico = {'tiles': 0, 'tiles_totales': tiles_totales, 'latencia_lote_ms': 0.0, 'latencia_tile_ms': 0.0, 'cajas_repetidas': 0}
+            return Detecciones.vacias(self.modelo.names)
+        tam_imagen = -(-tam_tile // MULTIPLO_STRIDE) * MULTIPLO_STRIDE
+        inicio = time.perf_counter()
+        resultados = self._predecir(fuentes, tam_imagen)
+        duracion = (time.perf_counter() - inicio) * 1000
+        partes = [self._convertir_resultado(resultado).desplazar(x, y) for resultado, (x, y, _, _) in zip(resultados, tiles)]
+        if pasada_global:
+            partes.append(self._convertir_resultado(resultados[-1]))
+        detecciones = Detecciones.concatenar(partes, self.modelo.names)
+        # Tile o pasada de la que sale cada caja (concatenar conserva el orden)
+        origen = np.repeat(np.arange(len(partes)), [len(parte) for parte in partes])
+        cantidad = len(detecciones)
+        if cantidad > 1:
+            detecciones = detecciones[nms_entre_tiles(detecciones.xyxy, detecciones.conf, detecciones.cls, origen)]
+        self.metricas_mosaico = {
+            'tiles': len(tiles),
+            'tiles_totales': tiles_totales,
+            'latencia_lote_ms': duracion,
+            'latencia_tile_ms': duracion / len(fuentes),
+            'cajas_repetidas': cantidad - len(detecciones),
+        }
+        return detecciones
+
+    # Ejecuta una sola inferencia para varios frames (ver PlanificadorLotes).
+    # Returns: lista con las detecciones de cada frame, en el mismo orden
+    def detectar_lote(self, frames):
+        return [detecciones.a_diccionarios() for detecciones in self.detectar_lote_columnas(frames)]
+
+    def detectar_lote_columnas(self, frames):
+        if not frames:
+            return []
+        return [self._convertir_resultado(resultado) for resultado in self._predecir(list(frames))]
+
+    def _convertir_resultado(self, resultado):
+        # Algunos modelos usan diferentes nombres; sin clase 'person' no hay nada que devolver
+        if self.clases_persona is None:
+            return Detecciones.vacias(self.modelo.names)
+        return Detecciones.desde_resultado(resultado, self.modelo.names)
 
 if __name__ == '__main__':
     print('Detector module')
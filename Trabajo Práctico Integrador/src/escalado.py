@@ -0,0 +1,89 @@
+# Reducción de resolución en la captura para trabajar a tamaño de inferencia.
+# La detección, el tracking y las zonas operan sobre un frame reducido; el frame
+# completo queda accesible (sin copias) solo para visualización o evidencia.
+import cv2
+
+class CapturaEscalada:
+
+    """
+    Envuelve una captura y entrega frames reducidos para que el lado mayor no supere lado_maximo.
+    Args:   captura: Objeto compatible con cv2.VideoCapture
+            lado_maximo (int): Lado mayor del frame reducido (normalmente el imgsz del detector)
+    Atributos:
+            escala (float): Factor frame_reducido / frame_completo (1.0 si no se reduce)
+                            (las funciones de este módulo también aceptan una tupla (fx, fy))
+    """
+    def __init__(self, captura, lado_maximo):
+        self.captura = captura
+        self.lado_maximo = lado_maximo
+        self.escala = 1.0
+        self._frame_completo = None
+        self._buffer_reducido = None
+
+    def isOpened(self):
+        return self.captura.isOpened()
+
+    # Lee un frame de la fuente y devuelve su versión reducida.
+    # Returns: tuple: (success, frame_reducido)
+    def read(self):
+        return self._reducir(*self.captura.read())
+
+    # Avanza la fuente sin decodificar ni reducir (frames salteados)
+    def grab(self):
+        return self.captura.grab()
+
+    # Decodifica el frame del último grab() y devuelve su versión reducida
+    def retrieve(self):
+        return self._reducir(*self.captura.retrieve())
+
+    def _reducir(self, ret, frame):
+        if not ret or frame is None:
+            self._frame_completo = None
+            return False, None
+        self._frame_completo = frame
+        alto, ancho = frame.shape[:2]
+        self.escala = min(1.0, self.lado_maximo / float(max(alto, ancho)))
+        if self.escala >= 1.0:
+            return True, frame
+        tamano = (max(1, round(ancho * self.escala)), max(1, round(alto * self.escala)))
+        if self._buffer_reducido is None or self._buffer_reducido.shape[1::-1] != tamano:
+            self._buffer_reducido = None
+        self._buffer_reducido = cv2.resize(frame, tamano, dst=self._buffer_reducido, interpolation=cv2.INTER_AREA)
+        return True, self._buffer_reducido
+
+    # Devuelve el frame a resolución original correspondiente al último read()
+    def obtener_frame_completo(self):
+        return self._frame_completo
+
+    def release(self):
+        self.captura.release()
+
+    def get(self, propId):
+        return self.captura.get(propId)
+
+    def set(self, propId, value):
+        return self.captura.set(propId, value)
+
+    def __getattr__(self, nombre):
+        # Exponer atributos propios de la captura envuelta (p.ej. frames_descartados)
+        return getattr(self.captura, nombre)
+
+# Los factores de escala pueden ser un float (uniforme) o una tupla (fx, fy)
+def _factores(factor):
+    return factor if isinstance(factor, tuple) else (factor, factor)
+
+# Factor que deshace `factor` (de frame reducido a frame completo)
+def escala_inversa(factor):
+    fx, fy = _factores(factor)
+    return (1.0 / fx, 1.0 / fy) if isinstance(factor, tuple) else 1.0 / fx
+
+# Escala un bbox [x1, y1, x2, y2] por un factor
+def escalar_bbox(bbox, factor):
+    fx, fy = _factores(factor)
+    x1, y1, x2, y2 = bbox
+    return [float(x1) * fx, float(y1) * fy, float(x2) * fx, float(y2) * fy]
+
+# Escala los puntos de un polígono [(x, y), ...] por un factor
+def escalar_poligono(poligono, factor):
+    fx, fy = _factores(factor)
+    return [(int(round(x * fx)), int(round(y * fy))) for x, y in poligono]
@@ -0,0 +1,85 @@
+# Exportación de pesos .pt a runtimes de CPU (ONNX Runtime u OpenVINO) con caché en disco.
+# La exportación tarda de segundos a minutos, así que se hace una sola vez por combinación
+# de pesos (hash del archivo), imgsz, formato y versión de Ultralytics; las siguientes
+# ejecuciones cargan directamente el modelo exportado. YOLO() carga el resultado con la
+# misma API de predict, así que el Detector no cambia su formato de salida.
+# OpenVINO admite además cuantización INT8 post-entrenamiento (NNCF), calibrada con frames
+# de nuestras propias grabaciones (ver quant_tool.py calibrate); el conjunto de calibración
+# también forma parte de la clave de caché.
+import hashlib
+import json
+import os
+import shutil
+
+FORMATOS_EXPORTACION = ('onnx', 'openvino')
+CARPETA_CACHE_DEFECTO = 'modelos_exportados'
+ARCHIVO_MARCA = 'exportacion.json'  # Se escribe al terminar: una carpeta sin él es una exportación interrumpida
+TAMANO_BLOQUE_HASH = 1 << 20
+
+# Hash SHA-256 del archivo de pesos (leído por bloques)
+def hash_archivo(ruta):
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(TAMANO_BLOQUE_HASH), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+# Hash de un conjunto de calibración: el .yaml más el nombre y tamaño de cada imagen
+def hash_calibracion(ruta_yaml):
+    sha = hashlib.sha256()
+    sha.update(hash_archivo(ruta_yaml).encode())
+    carpeta = os.path.dirname(os.path.abspath(ruta_yaml))
+    for raiz, _, archivos in sorted(os.walk(carpeta)):
+        for nombre in sorted(archivos):
+            sha.update(f"{nombre}:{os.path.getsize(os.path.join(raiz, nombre))}".encode())
+    return sha.hexdigest()
+
+# Carpeta de caché para una combinación pesos/imgsz/formato/versión (y calibración si es INT8)
+def clave_exportacion(ruta_pesos, formato, tam_imagen, version, datos_calibracion=None):
+    nombre = os.path.splitext(os.path.basename(ruta_pesos))[0]
+    clave = f"{nombre}_{hash_archivo(ruta_pesos)[:16]}_{tam_imagen}_{formato}"
+    if datos_calibracion:
+        clave += f"_int8_{hash_calibracion(datos_calibracion)[:12]}"
+    return f"{clave}_v{version}"
+
+# Devuelve la ruta del modelo exportado para `ruta_pesos`, exportándolo si no está en caché.
+# Args: ruta_pesos (str): Archivo .pt
+#       formato (str): 'onnx' u 'openvino'
+#       tam_imagen (int): imgsz para el que se exporta
+#       carpeta_cache (str): Carpeta donde se guardan las exportaciones
+#       datos_calibracion (str): .yaml de calibración; si se indica, se cuantiza a INT8 (solo OpenVINO)
+# Returns: str: archivo .onnx o carpeta *_openvino_model cargable con YOLO()
+def obtener_modelo_exportado(ruta_pesos, formato, tam_imagen, carpeta_cache=CARPETA_CACHE_DEFECTO, datos_calibracion=None):
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f"Formato de exportación no soportado: {formato} (opciones: {', '.join(FORMATOS_EXPORTACION)})")
+    if datos_calibracion and formato != 'openvino':
+        raise ValueError("La cuantización INT8 solo está disponible con OpenVINO")
+    if datos_calibracion and not os.path.exists(datos_calibracion):
+        raise FileNotFoundError(f"No existe el conjunto de calibración: {datos_calibracion} (generarlo con quant_tool.py calibrate)")
+    import ultralytics
+    from ultralytics import YOLO
+    carpeta = os.path.join(carpeta_cache, clave_exportacion(ruta_pesos, formato, tam_imagen, ultralytics.__version__, datos_calibracion))
+    ruta_marca = os.path.join(carpeta, ARCHIVO_MARCA)
+    if os.path.exists(ruta_marca):
+        with open(ruta_marca, encoding='utf-8') as archivo:
+            ruta_modelo = os.path.join(carpeta, json.load(archivo)['modelo'])
+        if os.path.exists(ruta_modelo):
+            print(f"[Detector] Usando exportación {formato} en caché: {ruta_modelo}")
+            return ruta_modelo
+    shutil.rmtree(carpeta, ignore_errors=True)
+    os.makedirs(carpeta)
+    # Ultralytics exporta junto al .pt: se copia a la carpeta de caché para no ensuciar la original
+    copia_pesos = os.path.join(carpeta, os.path.basename(ruta_pesos))
+    shutil.copy2(ruta_pesos, copia_pesos)
+    precision = 'INT8' if datos_calibracion else 'FP32'
+    print(f"[Detector] Exportando {ruta_pesos} a {formato} {precision} (imgsz {tam_imagen}); solo la primera vez...")
+    # dynamic=True admite lotes de cualquier tamaño (detectar_lote / PlanificadorLotes)
+    opciones = {'int8': True, 'data': os.path.abspath(datos_calibracion), 'fraction': 1.0} if datos_calibracion else {}
+    ruta_modelo = YOLO(copia_pesos).export(format=formato, imgsz=tam_imagen, dynamic=True, half=False, verbose=False, **opciones)
+    os.remove(copia_pesos)
+    with open(ruta_marca, 'w', encoding='utf-8') as archivo:
+        json.dump({'modelo': os.path.basename(ruta_modelo), 'pesos': os.path.abspath(ruta_pesos),
+                   'formato': formato, 'imgsz': tam_imagen, 'ultralytics': ultralytics.__version__,
+                   'calibracion': os.path.abspath(datos_calibracion) if datos_calibracion else None}, archivo, indent=2)
+    print(f"[Detector] Exportación guardada en {ruta_modelo}")
+    return ruta_modelo
@@ -8,9 +8,12 @@ import numpy as np
 import time
 from collections import defaultdict, deque
 from typing import Dict, List, Tuple
+from src.detecciones import Detecciones
 
 SEGUNDOS_SIN_ACTUALIZAR_PARA_ELIMINAR = 30
 TIEMPO_MINIMO_EN_ZONA_POR_DEFECTO = 2.0  # Segundos mínimos en zona antes de alertar
+RELACION_ASPECTO_MINIMA = 0.5  # Alto / ancho mínimo razonable para una persona (no muy ancha)
+RELACION_ASPECTO_MAXIMA = 5.0  # Alto / ancho máximo razonable para una persona (no muy alta)
 
 class FiltroGeometrico:
     """Filtro geométrico avanzado para validar intrusiones reales."""
@@ -20,7 +23,8 @@ class FiltroGeometrico:
                  area_minima_bbox: int = 2000,
                  confianza_minima: float = 0.25,
                  longitud_trayectoria: int = 10,
-                 umbral_movimiento_minimo: float = 5.0):
+                 umbral_movimiento_minimo: float = 5.0,
+                 reloj=time.time):
         """
         Args:
             tiempo_minimo_en_zona: Segundos mínimos que una persona debe estar en zona antes de alertar
@@ -28,12 +32,15 @@ class FiltroGeometrico:
             confianza_minima: Confianza mínima para considerar detección válida
             longitud_trayectoria: Número de posiciones a mantener en historial
             umbral_movimiento_minimo: Píxeles mínimos de movimiento para considerar "en movimiento"
+            reloj: Función que devuelve el tiempo actual en segundos (time.time o un RelojMedios
+                   para que los tiempos en zona sigan al video al reprocesar grabaciones)
         """
         self.tiempo_minimo_en_zona = tiempo_minimo_en_zona
         self.area_minima_bbox = area_minima_bbox
         self.confianza_minima = confianza_minima
         self.longitud_trayectoria = longitud_trayectoria
         self.umbral_movimiento_minimo = umbral_movimiento_minimo
+        self.reloj = reloj
         
         # Historial de tracks en zonas: {id_track: timestamp_primera_detección}
         self.tiempo_entrada_zona_track: Dict[int, float] = {}
@@ -64,7 +71,7 @@ class FiltroGeometrico:
             return False
         # Validar aspect ratio razonable para una persona (no muy ancho ni muy alto)
         relacion_aspecto = alto / ancho if ancho > 0 else 0
-        if relacion_aspecto < 0.5 or relacion_aspecto > 5.0:
+        if relacion_aspecto < RELACION_ASPECTO_MINIMA or relacion_aspecto > RELACION_ASPECTO_MAXIMA:
             self.estadisticas['filtered_by_size'] += 1
             return False
         return True
@@ -82,7 +89,7 @@ class FiltroGeometrico:
     # Args: id_track: ID del track
     #       centro: (x, y) centro del bbox
     def actualizar_trayectoria(self, id_track: int, centro: Tuple[int, int]):
-        marca_tiempo = time.time()
+        marca_tiempo = self.reloj()
         self.trayectorias_track[id_track].append((centro[0], centro[1], marca_tiempo))
     
     # Calcula el movimiento total en la trayectoria reciente.
@@ -117,7 +124,7 @@ class FiltroGeometrico:
     #       esta_en_zona: Si actualmente está en zona
     # Returns: True si ha estado suficiente tiempo en zona para generar alerta
     def validar_tiempo_en_zona(self, id_track: int, esta_en_zona: bool) -> bool:
-        tiempo_actual = time.time()
+        tiempo_actual = self.reloj()
         if esta_en_zona:
             # Registrar entrada si es la primera vez
             if id_track not in self.tiempo_entrada_zona_track:
@@ -158,17 +165,41 @@ class FiltroGeometrico:
                 'movement': float  # Movimiento total
             }
         """
+        tamano_valido = self.validar_tamano_deteccion(bounding_box=bbox)
+        return self._validar(id_track, centro, tamano_valido, tamano_valido and self.validar_confianza(confianza), esta_en_zona)
+
+    # Valida todos los tracks de un frame. Tamaño, aspecto y confianza se evalúan vectorizados;
+    # el tiempo en zona y la trayectoria mantienen estado por track.
+    # Args: tracks: Detecciones con track_id (coordenadas del frame completo)
+    #       esta_en_zona: (N,) bool, si cada track está en zona restringida
+    # Returns: Lista con el Dict de validar_intrusion() de cada track, en el mismo orden
+    def validar_intrusiones(self, tracks: Detecciones, esta_en_zona: np.ndarray) -> List[Dict]:
+        anchos, altos = tracks.anchos(), tracks.altos()
+        relacion_aspecto = np.where(anchos > 0, altos / np.where(anchos > 0, anchos, 1), 0)
+        tamano_valido = (anchos * altos >= self.area_minima_bbox) & (relacion_aspecto >= RELACION_ASPECTO_MINIMA) & (relacion_aspecto <= RELACION_ASPECTO_MAXIMA)
+        confianza_valida = tracks.conf >= self.confianza_minima
+        self.estadisticas['filtered_by_size'] += int(np.count_nonzero(~tamano_valido))
+        self.estadisticas['filtered_by_confidence'] += int(np.count_nonzero(tamano_valido & ~confianza_valida))
+        centros = tracks.centros()
+        return [
+            self._validar(int(tracks.track_id[i]), (int(centros[i, 0]), int(centros[i, 1])),
+                          bool(tamano_valido[i]), bool(tamano_valido[i] and confianza_valida[i]), bool(esta_en_zona[i]))
+            for i in range(len(tracks))
+        ]
+
+    # Filtros con estado (trayectoria, tiempo en zona, movimiento) a partir de los resultados de tamaño y confianza
+    def _validar(self, id_track: int, centro: Tuple[int, int], tamano_valido: bool, confianza_valida: bool, esta_en_zona: bool) -> Dict:
         self.estadisticas['total_detections'] += 1
         
         # Actualizar trayectoria siempre
         self.actualizar_trayectoria(id_track, centro)
         
         # Filtro 1: Validar tamaño del bbox
-        if not self.validar_tamano_deteccion(bounding_box=bbox):
+        if not tamano_valido:
             return {'is_valid': False, 'reason': 'bbox_too_small', 'time_in_zone': 0.0, 'movement': 0.0}
         
         # Filtro 2: Validar confianza
-        if not self.validar_confianza(confianza):
+        if not confianza_valida:
             return {'is_valid': False, 'reason': 'low_confidence', 'time_in_zone': 0.0, 'movement': 0.0}
         
         # Si no está en zona, no hay intrusión
@@ -179,7 +210,7 @@ class FiltroGeometrico:
         tiempo_valido = self.validar_tiempo_en_zona(id_track, esta_en_zona)
         tiempo_en_zona = 0.0
         if id_track in self.tiempo_entrada_zona_track:
-            tiempo_en_zona = time.time() - self.tiempo_entrada_zona_track[id_track]
+            tiempo_en_zona = self.reloj() - self.tiempo_entrada_zona_track[id_track]
         if not tiempo_valido:
             return {'is_valid': False, 'reason': 'insufficient_time_in_zone', 'time_in_zone': tiempo_en_zona, 'movement': self.calcular_movimiento(id_track)}
         
@@ -202,7 +233,7 @@ class FiltroGeometrico:
             if id_track in self.tiempo_entrada_zona_track:
                 del self.tiempo_entrada_zona_track[id_track]
         # Limpiar trayectorias muy antiguas (más de 30 segundos sin actualizar)
-        tiempo_actual = time.time()
+        tiempo_actual = self.reloj()
         tracks_a_eliminar = []
         for id_track, trayectoria in self.trayectorias_track.items():
             if trayectoria and len(trayectoria) > 0:
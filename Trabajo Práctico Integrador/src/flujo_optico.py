@@ -0,0 +1,114 @@
+# Propagación de cajas por flujo óptico en los frames salteados.
+# Sin esto, con --skip_frames los tracks se reutilizan tal cual entre dos inferencias: las
+# cajas quedan congeladas y luego saltan, y alguien que corre puede cruzar el borde de una
+# zona evaluado con coordenadas viejas. Tras cada inferencia se eligen unos pocos puntos
+# dentro de cada caja (goodFeaturesToTrack, con grilla de respaldo); en cada frame salteado
+# se siguen con Lucas-Kanade piramidal (con verificación ida y vuelta) y la caja se traslada
+# con la mediana del desplazamiento de sus puntos válidos. Cuesta una fracción de una
+# inferencia, lo que permite subir el salto de frames.
+import cv2
+import numpy as np
+from src.detecciones import Detecciones
+
+PUNTOS_POR_CAJA = 12  # Puntos seguidos por caja
+PUNTOS_MINIMOS = 3  # Con menos puntos válidos la caja no se mueve
+MARGEN_INTERIOR = 0.2  # Fracción de cada lado descartada: el borde de la caja suele ser fondo
+ANCHO_MAXIMO = 640  # El flujo se calcula sobre el frame reducido a este ancho
+ERROR_IDA_VUELTA = 1.0  # Píxeles (del frame reducido) de error admitido al volver al origen
+PARAMETROS_LK = dict(winSize=(15, 15), maxLevel=2, criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+class PropagadorFlujo:
+
+    """
+    Args:   puntos_por_caja (int): Puntos seguidos dentro de cada caja
+            ancho_maximo (int): Ancho al que se reduce el frame antes de calcular el flujo
+    Atributos:
+            cajas_propagadas (int): Cajas movidas con al menos PUNTOS_MINIMOS puntos válidos
+            cajas_sin_puntos (int): Cajas que quedaron en su lugar por falta de puntos válidos
+    """
+    def __init__(self, puntos_por_caja=PUNTOS_POR_CAJA, ancho_maximo=ANCHO_MAXIMO):
+        self.puntos_por_caja = puntos_por_caja
+        self.ancho_maximo = ancho_maximo
+        self.cajas_propagadas = 0
+        self.cajas_sin_puntos = 0
+        self._gris = None
+        self._puntos = None
+        self._duenos = None
+        self._reduccion = 1.0
+
+    def _preparar(self, frame):
+        alto, ancho = frame.shape[:2]
+        self._reduccion = min(1.0, self.ancho_maximo / float(ancho))
+        if self._reduccion < 1.0:
+            frame = cv2.resize(frame, (int(round(ancho * self._reduccion)), int(round(alto * self._reduccion))), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+    # Puntos dentro de cada caja (coordenadas del frame reducido) y el índice de la caja de cada uno
+    def _elegir_puntos(self, gris, tracks):
+        alto, ancho = gris.shape[:2]
+        puntos, duenos = [], []
+        for i, (x1, y1, x2, y2) in enumerate(tracks.xyxy * self._reduccion):
+            margen_x, margen_y = (x2 - x1) * MARGEN_INTERIOR, (y2 - y1) * MARGEN_INTERIOR
+            x1, x2 = int(max(x1 + margen_x, 0)), int(min(x2 - margen_x, ancho))
+            y1, y2 = int(max(y1 + margen_y, 0)), int(min(y2 - margen_y, alto))
+            if x2 - x1 < 2 or y2 - y1 < 2:
+                continue
+            esquinas = cv2.goodFeaturesToTrack(gris[y1:y2, x1:x2], self.puntos_por_caja, 0.01, 3)
+            if esquinas is not None and len(esquinas) >= PUNTOS_MINIMOS:
+                locales = esquinas.reshape(-1, 2)
+            else:
+                # Zonas lisas sin esquinas: grilla regular
+                lado = max(2, int(np.sqrt(self.puntos_por_caja)))
+                xs, ys = np.meshgrid(np.linspace(0, x2 - x1 - 1, lado), np.linspace(0, y2 - y1 - 1, lado))
+                locales = np.stack([xs.ravel(), ys.ravel()], axis=1)
+            puntos.append(locales + np.array([x1, y1], dtype=np.float32))
+            duenos.append(np.full(len(locales), i, dtype=np.int32))
+        if not puntos:
+            return None, None
+        return np.concatenate(puntos).astype(np.float32).reshape(-1, 1, 2), np.concatenate(duenos)
+
+    # Tras cada inferencia: toma el frame y los tracks como referencia
+    def inicializar(self, frame, tracks):
+        self._gris = self._preparar(frame)
+        self._puntos, self._duenos = self._elegir_puntos(self._gris, tracks) if len(tracks) else (None, None)
+
+    # En un frame salteado: devuelve los tracks trasladados según el flujo desde el frame anterior
+    def propagar(self, frame, tracks):
+        if self._gris is None or self._puntos is None or len(tracks) == 0:
+            return tracks
+        gris = self._preparar(frame)
+        if gris.shape != self._gris.shape:
+            self.inicializar(frame, tracks)
+            return tracks
+        siguientes, estado, _ = cv2.calcOpticalFlowPyrLK(self._gris, gris, self._puntos, None, **PARAMETROS_LK)
+        vuelta, estado_vuelta, _ = cv2.calcOpticalFlowPyrLK(gris, self._gris, siguientes, None, **PARAMETROS_LK)
+        error = np.linalg.norm((vuelta - self._puntos).reshape(-1, 2), axis=1)
+        validos = (estado.ravel() == 1) & (estado_vuelta.ravel() == 1) & (error < ERROR_IDA_VUELTA)
+        desplazamientos = (siguientes - self._puntos).reshape(-1, 2)
+        deltas = np.zeros((len(tracks), 2), dtype=np.float32)
+        for i in range(len(tracks)):
+            propios = validos & (self._duenos == i)
+            if np.count_nonzero(propios) >= PUNTOS_MINIMOS:
+                deltas[i] = np.median(desplazamientos[propios], axis=0) / self._reduccion
+                self.cajas_propagadas += 1
+            else:
+                self.cajas_sin_puntos += 1
+        # Los puntos perdidos no se reemplazan hasta la próxima inferencia
+        self._gris = gris
+        self._puntos = siguientes[validos].reshape(-1, 1, 2)
+        self._duenos = self._duenos[validos]
+        if not len(self._puntos):
+            self._puntos = None
+        xyxy = tracks.xyxy + np.tile(deltas, 2)
+        return Detecciones(xyxy, tracks.conf, tracks.cls, tracks.track_id, tracks.perdidos, tracks.nombres)
+
+    # Porcentaje de cajas que pudieron propagarse
+    def obtener_tasa_exito(self) -> float:
+        total = self.cajas_propagadas + self.cajas_sin_puntos
+        return self.cajas_propagadas / total * 100 if total else 0.0
+
+    # Olvida el frame de referencia (p.ej. tras reconectar)
+    def reiniciar(self):
+        self._gris = None
+        self._puntos = None
+        self._duenos = None
@@ -0,0 +1,127 @@
+# Hub de capturas compartidas: una sola decodificación por fuente en vivo.
+# Cada fuente queda a cargo de un SupervisorReconexion (un hilo que la abre, la lee y la
+# libera) y cada consumidor recibe una SuscripcionCaptura compatible con cv2.VideoCapture
+# que lee los frames a su propio ritmo. Con conteo de referencias: la fuente se libera
+# cuando se va el último consumidor. Evita varias sesiones RTSP contra la misma cámara
+# y los errores de "dispositivo ocupado" en webcams.
+import threading
+from src.reconexion import SupervisorReconexion
+
+class _FuenteCompartida:
+
+    def __init__(self, clave, fuente):
+        self.clave = clave
+        self.fuente = fuente
+        self.consumidores = 0
+
+class SuscripcionCaptura:
+
+    """
+    Args:   hub (HubCapturas): Hub que administra la fuente
+            compartida (_FuenteCompartida): Fuente y contador de consumidores
+            copiar (bool): Entregar copias de los frames. Los frames son compartidos entre
+                           consumidores: quien dibuje sobre ellos debe pedir copias.
+    Atributos:
+            frames_descartados (int): Frames que la fuente publicó y este consumidor no llegó a leer
+    """
+    def __init__(self, hub, compartida, copiar=False):
+        self.hub = hub
+        self.compartida = compartida
+        self.fuente = compartida.fuente
+        self.copiar = copiar
+        self.secuencia_leida = 0
+        self.frames_descartados = 0
+        self._frame = None
+        self._liberada = False
+
+    def isOpened(self):
+        return not self._liberada and self.fuente.isOpened()
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    # Espera un frame más nuevo que el último leído por este consumidor
+    def grab(self):
+        if self._liberada:
+            return False
+        secuencia, frame = self.fuente.esperar_frame(self.secuencia_leida)
+        if frame is None:
+            return False
+        if self.secuencia_leida:
+            self.frames_descartados += secuencia - self.secuencia_leida - 1
+        self.secuencia_leida = secuencia
+        self._frame = frame
+        return True
+
+    def retrieve(self):
+        if self._frame is None:
+            return False, None
+        return True, self._frame.copy() if self.copiar else self._frame
+
+    # Último frame publicado por la fuente, sin esperar (ver CapturaDual)
+    def ultimo_frame(self):
+        frame = self.fuente.ultimo_frame()
+        return frame.copy() if self.copiar and frame is not None else frame
+
+    # Abandona la fuente; si era el último consumidor, el hub la cierra
+    def release(self):
+        if not self._liberada:
+            self._liberada = True
+            self.hub._liberar(self.compartida)
+
+    def get(self, propId):
+        return self.fuente.get(propId)
+
+    # Las propiedades afectan a todos los consumidores de la fuente
+    def set(self, propId, value):
+        return self.fuente.set(propId, value)
+
+    def __getattr__(self, nombre):
+        # Estado de reconexión y métricas de la fuente compartida
+        return getattr(self.fuente, nombre)
+
+class HubCapturas:
+
+    """
+    Atributos:
+            aperturas (int): Fuentes abiertas desde el inicio (una por sesión de decodificación)
+    """
+    def __init__(self):
+        self._fuentes = {}
+        self._lock = threading.Lock()
+        self.aperturas = 0
+
+    # Suscribe un consumidor a la fuente `clave`, abriéndola con `fabrica` si nadie la usa.
+    # Args: clave (str): Identificador de la fuente (p.ej. la URL o el índice de webcam)
+    #       fabrica (callable): Función sin argumentos que abre la captura
+    #       max_reintentos (int): Ver SupervisorReconexion
+    #       copiar (bool): Ver SuscripcionCaptura
+    # Returns: SuscripcionCaptura
+    def abrir(self, clave, fabrica, max_reintentos=0, copiar=False):
+        with self._lock:
+            compartida = self._fuentes.get(clave)
+            # Una fuente que agotó sus reintentos se reemplaza; sus consumidores la liberan luego
+            if compartida is None or not compartida.fuente.isOpened():
+                compartida = _FuenteCompartida(clave, SupervisorReconexion(fabrica, max_reintentos=max_reintentos))
+                self._fuentes[clave] = compartida
+                self.aperturas += 1
+                print(f'[Hub] Fuente abierta: {clave}')
+            compartida.consumidores += 1
+            return SuscripcionCaptura(self, compartida, copiar)
+
+    def _liberar(self, compartida):
+        with self._lock:
+            compartida.consumidores -= 1
+            if compartida.consumidores > 0:
+                return
+            if self._fuentes.get(compartida.clave) is compartida:
+                del self._fuentes[compartida.clave]
+        compartida.fuente.release()
+        print(f'[Hub] Fuente cerrada: {compartida.clave}')
+
+    # Consumidores por fuente abierta
+    def obtener_estado(self):
+        with self._lock:
+            return {clave: compartida.consumidores for clave, compartida in self._fuentes.items()}
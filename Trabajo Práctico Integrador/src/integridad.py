@@ -0,0 +1,79 @@
+# Verificación barata de integridad de frames.
+# La pérdida de paquetes en RTSP produce frames "manchados": macrobloques grises planos
+# o filas que se repiten hacia abajo desde el punto donde se cortó la decodificación.
+# Se detectan sobre una miniatura en escala de grises antes de llegar al detector,
+# evitando inferencias inútiles y cambios de ID en el tracker.
+import cv2
+import numpy as np
+
+TAMANO_MINIATURA = (128, 96)  # (ancho, alto) de la miniatura analizada
+TAMANO_BLOQUE = 8  # Lado (px de miniatura) de los bloques evaluados por uniformidad
+UMBRAL_FILA_REPETIDA = 0.5  # Diferencia media (0-255) entre filas consecutivas para considerarlas repetidas
+UMBRAL_BLOQUE_PLANO = 1.0  # Desvío estándar máximo (0-255) de un bloque sin textura
+FRACCION_CORRUPTA_DEFECTO = 0.25  # Fracción del frame afectada a partir de la cual se descarta
+
+class VerificadorIntegridad:
+
+    """
+    Args:   fraccion_maxima (float): Fracción del alto (filas repetidas) o de los bloques (planos)
+                                     a partir de la cual el frame se considera corrupto
+            tamano_miniatura (tuple): (ancho, alto) de la miniatura analizada
+    Atributos:
+            frames_corruptos (int): Frames descartados por la verificación
+            ultimo_motivo (str): Motivo del último descarte ('filas_repetidas' o 'bloques_planos')
+    """
+    def __init__(self, fraccion_maxima=FRACCION_CORRUPTA_DEFECTO, tamano_miniatura=TAMANO_MINIATURA):
+        self.fraccion_maxima = fraccion_maxima
+        self.tamano_miniatura = tamano_miniatura
+        self.frames_evaluados = 0
+        self.frames_corruptos = 0
+        self.ultimo_motivo = None
+
+    # Submuestreo sin promediar: conserva el ruido de sensor que distingue una zona lisa real
+    # de una mancha de decodificación (píxeles exactamente iguales)
+    def _miniatura(self, frame):
+        miniatura = cv2.resize(frame, self.tamano_miniatura, interpolation=cv2.INTER_NEAREST)
+        if miniatura.ndim == 3:
+            miniatura = cv2.cvtColor(miniatura, cv2.COLOR_BGR2GRAY)
+        return miniatura
+
+    # Racha más larga de filas consecutivas (casi) idénticas, como fracción del alto.
+    # Una cámara real tiene ruido de sensor: filas exactamente repetidas indican mancha.
+    def _fraccion_filas_repetidas(self, miniatura):
+        diferencias = np.abs(np.diff(miniatura.astype(np.int16), axis=0)).mean(axis=1)
+        racha = racha_maxima = 0
+        for repetida in diferencias < UMBRAL_FILA_REPETIDA:
+            racha = racha + 1 if repetida else 0
+            racha_maxima = max(racha_maxima, racha)
+        return racha_maxima / float(len(diferencias))
+
+    # Fracción de bloques sin ninguna textura (relleno gris de macrobloques perdidos)
+    def _fraccion_bloques_planos(self, miniatura):
+        alto, ancho = miniatura.shape[:2]
+        filas, columnas = alto // TAMANO_BLOQUE, ancho // TAMANO_BLOQUE
+        bloques = miniatura[:filas * TAMANO_BLOQUE, :columnas * TAMANO_BLOQUE].reshape(
+            filas, TAMANO_BLOQUE, columnas, TAMANO_BLOQUE)
+        desvios = bloques.std(axis=(1, 3))
+        return np.count_nonzero(desvios < UMBRAL_BLOQUE_PLANO) / float(desvios.size)
+
+    # Indica si el frame parece decodificado correctamente
+    def frame_valido(self, frame) -> bool:
+        self.frames_evaluados += 1
+        if frame is None or frame.size == 0:
+            self.ultimo_motivo = 'vacio'
+        else:
+            miniatura = self._miniatura(frame)
+            if self._fraccion_filas_repetidas(miniatura) >= self.fraccion_maxima:
+                self.ultimo_motivo = 'filas_repetidas'
+            elif self._fraccion_bloques_planos(miniatura) >= self.fraccion_maxima:
+                self.ultimo_motivo = 'bloques_planos'
+            else:
+                return True
+        self.frames_corruptos += 1
+        return False
+
+    # Porcentaje de frames evaluados que se descartaron por corruptos
+    def obtener_tasa_corruptos(self) -> float:
+        if self.frames_evaluados == 0:
+            return 0.0
+        return self.frames_corruptos / self.frames_evaluados * 100
@@ -0,0 +1,44 @@
+# Marcas de tiempo incrustadas en los píxeles del frame.
+# stream_server.py dibuja en la franja superior el instante de captura (ms desde epoch)
+# como celdas blanco/negro; el cliente lo lee al recibir el frame y obtiene la latencia
+# extremo a extremo (codificación + red + buffers + decodificación). La franja usa
+# posiciones relativas al ancho, así sobrevive a JPEG y a reescalados.
+import time
+import numpy as np
+
+BITS_MARCA = 48  # Milisegundos desde epoch (alcanza hasta el año ~10000)
+CELDAS_FRANJA = 64  # Celdas en que se divide el ancho; las primeras BITS_MARCA llevan datos
+UMBRAL_BIT = 127  # Intensidad media a partir de la cual una celda es un 1
+
+def _geometria(ancho):
+    lado = max(ancho // CELDAS_FRANJA, 1)
+    return lado, ancho / float(CELDAS_FRANJA)
+
+# Dibuja `milisegundos` (por defecto el instante actual) en la franja superior del frame
+def incrustar_marca_tiempo(frame, milisegundos=None):
+    if milisegundos is None:
+        milisegundos = int(time.time() * 1000)
+    alto_franja, ancho_celda = _geometria(frame.shape[1])
+    for bit in range(BITS_MARCA):
+        x1 = int(round(bit * ancho_celda))
+        x2 = int(round((bit + 1) * ancho_celda))
+        frame[:alto_franja, x1:x2] = 255 if (milisegundos >> bit) & 1 else 0
+    return milisegundos
+
+# Lee la marca incrustada con incrustar_marca_tiempo (ms desde epoch)
+def leer_marca_tiempo(frame):
+    alto_franja, ancho_celda = _geometria(frame.shape[1])
+    margen = alto_franja // 4
+    milisegundos = 0
+    for bit in range(BITS_MARCA):
+        # Se muestrea el centro de la celda para tolerar bordes borrosos por JPEG
+        x1 = int(bit * ancho_celda + ancho_celda / 4)
+        x2 = max(int((bit + 1) * ancho_celda - ancho_celda / 4), x1 + 1)
+        celda = frame[margen:max(alto_franja - margen, margen + 1), x1:x2]
+        if np.mean(celda) > UMBRAL_BIT:
+            milisegundos |= 1 << bit
+    return milisegundos
+
+# Latencia (s) entre la marca incrustada y el instante actual (mismo reloj: misma máquina)
+def latencia_marca_tiempo(frame):
+    return time.time() - leer_marca_tiempo(frame) / 1000.0
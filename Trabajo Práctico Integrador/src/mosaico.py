@@ -0,0 +1,50 @@
+# Inferencia por mosaico (tiles) para personas chicas y lejanas en streams de alta resolución.
+# El frame se divide en tiles solapados de tam_tile píxeles que se infieren a su resolución
+# nativa (imgsz = tam_tile) en un solo lote, en lugar de reducir todo el frame a imgsz. Se
+# puede limitar a los tiles que tocan las zonas. Una pasada global (el frame completo en el
+# mismo lote) conserva a las personas cercanas, más grandes que un tile. Las cajas repetidas
+# entre tiles vecinos se fusionan con un NMS que usa intersección sobre el área menor: una
+# persona cortada por el borde de un tile queda contenida en la caja completa del vecino.
+# Solo se comparan cajas de orígenes distintos (tile o pasada global): dentro de una misma
+# pasada el NMS del modelo ya decidió, y dos personas solapadas (un chico delante de un
+# adulto, una fila) deben seguir siendo dos.
+import numpy as np
+
+TAMANO_TILE_DEFECTO = 640  # Lado del tile en píxeles del frame (también su imgsz)
+SOLAPAMIENTO_DEFECTO = 0.2  # Fracción del tile compartida con su vecino
+UMBRAL_NMS_TILES = 0.6  # Intersección / área menor a partir de la cual dos cajas son la misma persona
+
+# Tiles [(x, y, ancho, alto)] que cubren un frame de ancho x alto.
+# El último de cada fila/columna se alinea al borde, así todos tienen el mismo tamaño.
+def generar_tiles(ancho, alto, tam_tile=TAMANO_TILE_DEFECTO, solapamiento=SOLAPAMIENTO_DEFECTO):
+    paso = max(1, int(tam_tile * (1 - solapamiento)))
+    def posiciones(lado):
+        if lado <= tam_tile:
+            return [0]
+        inicios = list(range(0, lado - tam_tile, paso))
+        return inicios + [lado - tam_tile]
+    tile_ancho, tile_alto = min(tam_tile, ancho), min(tam_tile, alto)
+    return [(x, y, tile_ancho, tile_alto) for y in posiciones(alto) for x in posiciones(ancho)]
+
+# Tiles que se solapan con al menos uno de los rectángulos (p.ej. GestorZonas.rectangulos_zonas)
+def tiles_en_rectangulos(tiles, rectangulos):
+    return [(x, y, ancho, alto) for x, y, ancho, alto in tiles
+            if any(x < rx + rancho and rx < x + ancho and y < ry + ralto and ry < y + alto for rx, ry, rancho, ralto in rectangulos)]
+
+# NMS por clase con intersección sobre el área menor entre cajas de distinto `origen` (índice del
+# tile o pasada de cada caja); conserva la caja de mayor confianza.
+# Returns: índices de las cajas que quedan, ordenados por confianza
+def nms_entre_tiles(xyxy, conf, cls, origen, umbral=UMBRAL_NMS_TILES):
+    orden = np.argsort(-conf)
+    areas = np.clip(xyxy[:, 2] - xyxy[:, 0], 0, None) * np.clip(xyxy[:, 3] - xyxy[:, 1], 0, None)
+    conservados = []
+    while len(orden):
+        i = orden[0]
+        conservados.append(i)
+        resto = orden[1:]
+        ancho = np.clip(np.minimum(xyxy[i, 2], xyxy[resto, 2]) - np.maximum(xyxy[i, 0], xyxy[resto, 0]), 0, None)
+        alto = np.clip(np.minimum(xyxy[i, 3], xyxy[resto, 3]) - np.maximum(xyxy[i, 1], xyxy[resto, 1]), 0, None)
+        menor = np.maximum(np.minimum(areas[i], areas[resto]), 1e-6)
+        repetida = (ancho * alto / menor >= umbral) & (cls[resto] == cls[i]) & (origen[resto] != origen[i])
+        orden = resto[~repetida]
+    return np.array(conservados, dtype=np.int64)
@@ -0,0 +1,116 @@
+# Compuerta de movimiento delante del detector.
+# Sustracción de fondo MOG2 sobre una miniatura en escala de grises, evaluada solo dentro
+# de las zonas más un margen: si nada se mueve allí y no quedan tracks vivos, el frame no
+# pasa por YOLO. A diferencia de DetectorCambios (diferencia global contra una referencia),
+# el modelo de fondo absorbe cambios lentos de iluminación y ruido del sensor, y el
+# movimiento lejos de las zonas no abre la compuerta.
+import cv2
+import numpy as np
+from src.escalado import escalar_poligono
+
+ANCHO_ANALISIS = 160  # Ancho de la miniatura analizada (el alto mantiene la proporción)
+FRACCION_MOVIMIENTO_DEFECTO = 0.005  # Fracción del área vigilada en movimiento para abrir la compuerta
+HISTORIA_FONDO = 300  # Frames que recuerda el modelo de fondo
+UMBRAL_VARIANZA = 25  # Umbral de MOG2: más alto, menos sensible al ruido
+VALOR_PRIMER_PLANO = 255  # MOG2 marca las sombras con 127: no cuentan como movimiento
+
+class DetectorMovimiento:
+
+    """
+    Args:   fraccion_minima (float): Fracción (0-1) del área vigilada que debe moverse para abrir la compuerta
+            margen (int): Píxeles (del frame completo) alrededor de cada zona que también se vigilan
+            ancho_analisis (int): Ancho de la miniatura sobre la que corre MOG2
+    Atributos:
+            frames_evaluados (int): Frames que pasaron por la compuerta
+            aperturas_movimiento (int): Frames enviados al detector porque hubo movimiento
+            aperturas_tracks (int): Frames enviados al detector sin movimiento, porque había tracks vivos
+            cierres (int): Frames que no llegaron al detector
+    """
+    def __init__(self, fraccion_minima=FRACCION_MOVIMIENTO_DEFECTO, margen=0, ancho_analisis=ANCHO_ANALISIS):
+        self.fraccion_minima = fraccion_minima
+        self.margen = margen
+        self.ancho_analisis = ancho_analisis
+        self.frames_evaluados = 0
+        self.aperturas_movimiento = 0
+        self.aperturas_tracks = 0
+        self.cierres = 0
+        self._zonas = []
+        self._escala = 1.0
+        self._mascara = None
+        self._forma = None
+        self._nucleo = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self.reiniciar()
+
+    # Zonas en coordenadas del frame completo y escala del frame que se analizará (ver escalado.py).
+    # Si cambian, el próximo frame rehace la máscara y el modelo de fondo.
+    def establecer_zonas(self, zonas, escala=1.0):
+        if list(zonas) == self._zonas and escala == self._escala:
+            return
+        self._zonas = list(zonas)
+        self._escala = escala
+        self._forma = None
+
+    def _miniatura(self, frame):
+        alto, ancho = frame.shape[:2]
+        tamano = (self.ancho_analisis, max(1, round(alto * self.ancho_analisis / float(ancho))))
+        miniatura = cv2.resize(frame, tamano, interpolation=cv2.INTER_AREA)
+        if miniatura.ndim == 3:
+            miniatura = cv2.cvtColor(miniatura, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(miniatura, (3, 3), 0)
+
+    # Área vigilada a tamaño de miniatura: zonas dilatadas en el margen (None = todo el frame)
+    def _construir_mascara(self, frame, miniatura):
+        if not self._zonas:
+            return None
+        alto, ancho = frame.shape[:2]
+        mascara = np.zeros((alto, ancho), dtype=np.uint8)
+        for poligono in self._zonas:
+            cv2.fillPoly(mascara, [np.array(escalar_poligono(poligono, self._escala), dtype=np.int32)], 255)
+        mascara = cv2.resize(mascara, miniatura.shape[1::-1], interpolation=cv2.INTER_NEAREST)
+        escala_x = self._escala[0] if isinstance(self._escala, tuple) else self._escala
+        radio = int(round(self.margen * escala_x * miniatura.shape[1] / float(ancho)))
+        if radio > 0:
+            mascara = cv2.dilate(mascara, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * radio + 1, 2 * radio + 1)))
+        return mascara
+
+    # Actualiza el modelo de fondo e indica si hay movimiento en el área vigilada
+    def hay_movimiento(self, frame) -> bool:
+        miniatura = self._miniatura(frame)
+        if self._forma != miniatura.shape:
+            # Otra resolución: el modelo de fondo anterior no sirve
+            self.reiniciar()
+            self._forma = miniatura.shape
+            self._mascara = self._construir_mascara(frame, miniatura)
+        primer_plano = self._sustractor.apply(miniatura)
+        primer_plano = cv2.morphologyEx((primer_plano == VALOR_PRIMER_PLANO).astype(np.uint8), cv2.MORPH_OPEN, self._nucleo)
+        if self._mascara is not None:
+            primer_plano[self._mascara == 0] = 0
+            area = cv2.countNonZero(self._mascara)
+        else:
+            area = primer_plano.size
+        return area > 0 and cv2.countNonZero(primer_plano) >= self.fraccion_minima * area
+
+    # Decide si el frame pasa al detector: hay movimiento en las zonas o quedan tracks vivos
+    # (una persona quieta dentro de la zona sigue siendo una intrusión que hay que seguir).
+    def debe_detectar(self, frame, hay_tracks=False) -> bool:
+        self.frames_evaluados += 1
+        if self.hay_movimiento(frame):
+            self.aperturas_movimiento += 1
+            return True
+        if hay_tracks:
+            self.aperturas_tracks += 1
+            return True
+        self.cierres += 1
+        return False
+
+    # Porcentajes de frames evaluados: (abiertos por movimiento, abiertos por tracks, cerrados)
+    def obtener_tasas(self):
+        if self.frames_evaluados == 0:
+            return 0.0, 0.0, 0.0
+        total = float(self.frames_evaluados)
+        return self.aperturas_movimiento / total * 100, self.aperturas_tracks / total * 100, self.cierres / total * 100
+
+    # Descarta el modelo de fondo (p.ej. tras reconectar o si cambia la resolución)
+    def reiniciar(self):
+        self._sustractor = cv2.createBackgroundSubtractorMOG2(history=HISTORIA_FONDO, varThreshold=UMBRAL_VARIANZA, detectShadows=True)
+        self._forma = None
@@ -125,4 +125,14 @@ def dibujar_panel_estadisticas(frame, estadisticas, posicion="top-right"):
     cv2.rectangle(frame, punto_esquina_superior_izquierda_rectangulo, punto_esquina_inferior_derecha_rectangulo, COLOR_TUPLA_BLANCO, GROSOR_DOS_PIXELES)
     dibujar_estadisticas(frame, estadisticas, x_inicio, y_inicio)
 
+def dibujar_aviso(frame, texto, color=COLOR_TUPLA_CIAN):
+    h, w = frame.shape[:2]
+    (tw, th), _ = cv2.getTextSize(texto, cv2.FONT_HERSHEY_SIMPLEX, ESCALA_FUENTE_CIEN_PORCIENTO, GROSOR_DOS_PIXELES)
+    x_inicio = max((w - tw) // 2 - 20, 0)
+    y_inicio = max((h - th) // 2 - 20, 0)
+    overlay = frame.copy()
+    cv2.rectangle(overlay, (x_inicio, y_inicio), (x_inicio + tw + 40, y_inicio + th + 40), COLOR_TUPLA_NEGRO, GROSOR_RELLENO_COMPLETO)
+    cv2.addWeighted(overlay, TRANSPARENCIA_SETENTA_PORCIENTO, frame, 0.3, 0, frame)
+    cv2.putText(frame, texto, (x_inicio + 20, y_inicio + th + 20), cv2.FONT_HERSHEY_SIMPLEX, ESCALA_FUENTE_CIEN_PORCIENTO, color, GROSOR_DOS_PIXELES, cv2.LINE_AA)
+
 # endregion
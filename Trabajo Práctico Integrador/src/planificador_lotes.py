@@ -0,0 +1,149 @@
+# Planificador de micro-lotes delante del Detector.
+# Varios productores (cámaras, tiles) envían frames; un hilo los agrupa hasta completar
+# tamano_lote_maximo o hasta que vence espera_maxima desde la llegada del primero, ejecuta
+# una sola inferencia con Detector.detectar_lote() y devuelve a cada productor su resultado.
+# El costo fijo por llamada a predict se reparte entre los frames del lote, a cambio de
+# hasta espera_maxima de latencia adicional por solicitud.
+import collections
+import queue
+import threading
+import time
+
+TAMANO_LOTE_MAXIMO_DEFECTO = 4
+ESPERA_MAXIMA_DEFECTO = 0.010  # Segundos que el primer frame del lote espera a los siguientes
+VENTANA_METRICAS = 200  # Solicitudes recientes usadas para las métricas de latencia
+
+class SolicitudDeteccion:
+
+    """
+    Frame pendiente de detección; esperar() bloquea hasta que el lote que lo contiene termine.
+    Atributos:
+            espera_cola (float): Segundos desde enviar() hasta que su lote empezó la inferencia
+            latencia (float): Segundos desde enviar() hasta tener el resultado
+    """
+    def __init__(self, frame):
+        self.frame = frame
+        self.llegada = time.perf_counter()
+        self.espera_cola = 0.0
+        self.latencia = 0.0
+        self._listo = threading.Event()
+        self._resultado = None
+        self._error = None
+
+    def _completar(self, resultado=None, error=None):
+        self._resultado = resultado
+        self._error = error
+        self.latencia = time.perf_counter() - self.llegada
+        self._listo.set()
+
+    # Returns: lista de detecciones (mismo formato que Detector.detectar)
+    def esperar(self, timeout=None):
+        if not self._listo.wait(timeout):
+            raise TimeoutError('La detección no terminó a tiempo')
+        if self._error is not None:
+            raise self._error
+        return self._resultado
+
+class PlanificadorLotes:
+
+    """
+    Args:   detector (Detector): Detector con detectar_lote()
+            tamano_lote_maximo (int): Frames máximos por inferencia
+            espera_maxima (float): Segundos máximos que se retiene un lote incompleto
+    Expone detectar(frame) como el Detector, así puede reemplazarlo en cada productor.
+    """
+    def __init__(self, detector, tamano_lote_maximo=TAMANO_LOTE_MAXIMO_DEFECTO, espera_maxima=ESPERA_MAXIMA_DEFECTO):
+        self.detector = detector
+        self.tamano_lote_maximo = max(1, tamano_lote_maximo)
+        self.espera_maxima = espera_maxima
+        self.lotes = 0
+        self.frames = 0
+        self._tamanos = collections.deque(maxlen=VENTANA_METRICAS)
+        self._esperas = collections.deque(maxlen=VENTANA_METRICAS)
+        self._latencias = collections.deque(maxlen=VENTANA_METRICAS)
+        self._inferencias = collections.deque(maxlen=VENTANA_METRICAS)
+        self._lock_metricas = threading.Lock()
+        self._cola = queue.Queue()
+        self._activo = True
+        self._hilo = threading.Thread(target=self._bucle_lotes, daemon=True)
+        self._hilo.start()
+
+    # Encola un frame y devuelve la solicitud sin bloquear (varios tiles desde un mismo hilo)
+    def enviar(self, frame):
+        if not self._activo:
+            raise RuntimeError('El planificador está detenido')
+        solicitud = SolicitudDeteccion(frame)
+        self._cola.put(solicitud)
+        return solicitud
+
+    # Interfaz del Detector: encola y espera el resultado
+    def detectar(self, frame):
+        return self.enviar(frame).esperar()
+
+    # Junta solicitudes hasta completar el lote o vencer la espera del primero
+    def _armar_lote(self, primera):
+        lote = [primera]
+        limite = primera.llegada + self.espera_maxima
+        while len(lote) < self.tamano_lote_maximo:
+            restante = limite - time.perf_counter()
+            try:
+                solicitud = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if solicitud is None:
+                self._cola.put(None)
+                break
+            lote.append(solicitud)
+        return lote
+
+    def _bucle_lotes(self):
+        while True:
+            primera = self._cola.get()
+            if primera is None:
+                return
+            lote = self._armar_lote(primera)
+            inicio = time.perf_counter()
+            for solicitud in lote:
+                solicitud.espera_cola = inicio - solicitud.llegada
+            try:
+                resultados = self.detector.detectar_lote([solicitud.frame for solicitud in lote])
+            except Exception as e:
+                for solicitud in lote:
+                    solicitud._completar(error=e)
+                continue
+            duracion = time.perf_counter() - inicio
+            for solicitud, resultado in zip(lote, resultados):
+                solicitud._completar(resultado)
+            self._registrar(lote, duracion)
+
+    def _registrar(self, lote, duracion):
+        with self._lock_metricas:
+            self.lotes += 1
+            self.frames += len(lote)
+            self._tamanos.append(len(lote))
+            self._inferencias.append(duracion)
+            for solicitud in lote:
+                self._esperas.append(solicitud.espera_cola)
+                self._latencias.append(solicitud.latencia)
+
+    # Métricas recientes para ajustar rendimiento contra latencia (tiempos en ms)
+    def obtener_metricas(self):
+        with self._lock_metricas:
+            latencias = sorted(self._latencias)
+            return {
+                'lotes': self.lotes,
+                'frames': self.frames,
+                'tamano_lote_medio': sum(self._tamanos) / len(self._tamanos) if self._tamanos else 0.0,
+                'espera_cola_media_ms': sum(self._esperas) / len(self._esperas) * 1000 if self._esperas else 0.0,
+                'inferencia_media_ms': sum(self._inferencias) / len(self._inferencias) * 1000 if self._inferencias else 0.0,
+                'latencia_p50_ms': latencias[len(latencias) // 2] * 1000 if latencias else 0.0,
+                'latencia_p95_ms': latencias[min(int(len(latencias) * 0.95), len(latencias) - 1)] * 1000 if latencias else 0.0,
+            }
+
+    # Procesa lo pendiente y detiene el hilo
+    def detener(self):
+        if not self._activo:
+            return
+        self._activo = False
+        self._cola.put(None)
+        self._hilo.join()
@@ -0,0 +1,106 @@
+# Pool de modelos compartido por el proceso.
+# Cargar un Detector lee los pesos del disco, inicializa el modelo (y exporta si el backend
+# lo requiere): segundos cada vez que se inicia una detección. El pool conserva una instancia
+# por combinación pesos/imgsz/backend (y calibración INT8), precargada y con una inferencia
+# de calentamiento, y la devuelve en los siguientes inicios. Las instancias se comparten:
+# pensadas para un único consumidor a la vez (el hilo de detección del dashboard).
+import collections
+import threading
+import time
+import numpy as np
+from src.detector import BACKEND_DEFECTO, TAMANO_IMAGEN, UMBRAL_CONFIANZA_DEFECTO, YOLO_DEFAULT_WEIGHTS, Detector
+
+TAMANO_MAXIMO_POOL = 3  # Modelos retenidos; al superarlo se libera el usado hace más tiempo
+
+class _EntradaPool:
+
+    def __init__(self, clave):
+        self.clave = clave
+        self.detector = None
+        self.lock = threading.Lock()
+        self.tiempo_carga = 0.0
+        self.tiempo_calentamiento = 0.0
+        self.usos = 0
+
+class PoolModelos:
+
+    """
+    Args:   tamano_maximo (int): Cantidad de modelos distintos que se mantienen cargados
+    Atributos:
+            aciertos (int): Pedidos resueltos con un modelo ya cargado
+            cargas (int): Modelos cargados desde disco
+    """
+    def __init__(self, tamano_maximo=TAMANO_MAXIMO_POOL):
+        self.tamano_maximo = max(1, tamano_maximo)
+        self.aciertos = 0
+        self.cargas = 0
+        self._entradas = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    # Devuelve el Detector para la combinación pedida, cargándolo (y calentándolo) si no está en el pool.
+    # La confianza no forma parte de la clave: se ajusta sobre la instancia reutilizada.
+    def obtener(self, pesos=None, tam_imagen=TAMANO_IMAGEN, backend=BACKEND_DEFECTO, datos_calibracion=None, umbral_confianza=UMBRAL_CONFIANZA_DEFECTO):
+        detector = self._cargar(pesos, tam_imagen, backend, datos_calibracion, contar_uso=True)
+        # Restablecer lo que la detección anterior pudo cambiar (p.ej. el control adaptativo)
+        detector.umbral_confianza = umbral_confianza
+        detector.tam_imagen = tam_imagen
+        detector.metricas_mosaico = {}
+        return detector
+
+    # Carga y calienta un modelo sin usarlo todavía (al iniciar el servidor o al cambiar la configuración)
+    def precargar(self, pesos=None, tam_imagen=TAMANO_IMAGEN, backend=BACKEND_DEFECTO, datos_calibracion=None):
+        self._cargar(pesos, tam_imagen, backend, datos_calibracion, contar_uso=False)
+
+    def _cargar(self, pesos, tam_imagen, backend, datos_calibracion, contar_uso):
+        clave = (pesos or YOLO_DEFAULT_WEIGHTS, int(tam_imagen), backend, datos_calibracion or None)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                entrada = self._entradas[clave] = _EntradaPool(clave)
+            self._entradas.move_to_end(clave)
+            self._liberar_sobrantes()
+        # Lock por entrada: quien pide un modelo que se está precargando espera esa carga
+        with entrada.lock:
+            if entrada.detector is None:
+                inicio = time.perf_counter()
+                detector = Detector(pesos=clave[0], tam_imagen=clave[1], backend=backend, datos_calibracion=clave[3])
+                entrada.tiempo_carga = time.perf_counter() - inicio
+                inicio = time.perf_counter()
+                detector.detectar_columnas(np.zeros((clave[1], clave[1], 3), dtype=np.uint8))
+                entrada.tiempo_calentamiento = time.perf_counter() - inicio
+                entrada.detector = detector
+                with self._lock:
+                    self.cargas += 1
+                print(f"[Pool] {clave[0]} ({backend}, imgsz {clave[1]}) cargado en {entrada.tiempo_carga:.1f}s "
+                      f"+ calentamiento {entrada.tiempo_calentamiento:.1f}s")
+            elif contar_uso:
+                with self._lock:
+                    self.aciertos += 1
+                print(f"[Pool] Reutilizando {clave[0]} ({backend}, imgsz {clave[1]})")
+            if contar_uso:
+                entrada.usos += 1
+            return entrada.detector
+
+    # Libera los modelos usados hace más tiempo por encima de tamano_maximo (se llama con _lock tomado)
+    def _liberar_sobrantes(self):
+        while len(self._entradas) > self.tamano_maximo:
+            clave, _ = self._entradas.popitem(last=False)
+            print(f"[Pool] Liberando {clave[0]} ({clave[2]}, imgsz {clave[1]})")
+
+    # Estado para /api/status: aciertos, cargas y tiempos por modelo
+    def obtener_estado(self):
+        with self._lock:
+            return {
+                'hits': self.aciertos,
+                'loads': self.cargas,
+                'models': [{
+                    'weights': entrada.clave[0],
+                    'imgsz': entrada.clave[1],
+                    'backend': entrada.clave[2],
+                    'calib_data': entrada.clave[3],
+                    'loaded': entrada.detector is not None,
+                    'load_seconds': round(entrada.tiempo_carga, 2),
+                    'warmup_seconds': round(entrada.tiempo_calentamiento, 2),
+                    'uses': entrada.usos,
+                } for entrada in self._entradas.values()],
+            }
@@ -0,0 +1,163 @@
+# Supervisor de reconexión para streams RTSP/HTTP.
+# Un hilo es dueño de la captura: la abre, la lee y, si falla, la reabre con espera
+# exponencial y jitter. El bucle principal nunca se bloquea reconectando: read()
+# devuelve (False, None) mientras tanto y `reconectando` indica el estado.
+import random
+import time
+from src.captura_hilo import TIMEOUT_CIERRE_HILO, CapturaHilo
+
+ESPERA_INICIAL_DEFECTO = 1.0  # Segundos de espera tras el primer intento fallido
+ESPERA_MAXIMA_DEFECTO = 30.0  # Tope de la espera exponencial
+JITTER_DEFECTO = 0.25  # Variación aleatoria relativa (+/-25%) para no sincronizar reintentos
+TIMEOUT_LECTURA_SUPERVISOR = 0.5  # read() vuelve rápido para que la UI siga viva durante una caída
+
+class SupervisorReconexion(CapturaHilo):
+
+    """
+    Args:   fabrica (callable): Función sin argumentos que abre y devuelve una captura nueva
+            max_reintentos (int): Intentos de apertura consecutivos fallidos antes de rendirse (0 = infinito)
+            espera_inicial (float): Espera (s) tras el primer intento fallido
+            espera_maxima (float): Espera máxima (s) entre intentos
+            jitter (float): Variación aleatoria relativa aplicada a cada espera
+            timeout_lectura (float): Segundos que read() espera un frame nuevo
+    Atributos:
+            reconectando (bool): True mientras no hay captura entregando frames
+            reconexiones (int): Reconexiones exitosas tras una caída
+            intentos_fallidos (int): Aperturas fallidas acumuladas
+    """
+    def __init__(self, fabrica, max_reintentos=0, espera_inicial=ESPERA_INICIAL_DEFECTO,
+                 espera_maxima=ESPERA_MAXIMA_DEFECTO, jitter=JITTER_DEFECTO,
+                 timeout_lectura=TIMEOUT_LECTURA_SUPERVISOR):
+        self.fabrica = fabrica
+        self.max_reintentos = max_reintentos
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.jitter = jitter
+        self.captura = None
+        self.reconectando = True
+        self.reconexiones = 0
+        self.intentos_fallidos = 0
+        self.ultima_latencia_reconexion = 0.0
+        self.tiempo_caida_total = 0.0
+        self._conectado_alguna_vez = False
+        self._inicio_caida = time.time()
+        self._inicializar_estado(timeout_lectura)
+        self._activo = True
+        self._hilo.start()
+
+    # Espera exponencial con jitter para el intento fallido número `intentos`
+    def _calcular_espera(self, intentos):
+        espera = min(self.espera_maxima, self.espera_inicial * (2 ** (intentos - 1)))
+        return max(0.0, espera * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    # Duerme hasta `segundos` pero despierta enseguida si se libera el supervisor
+    def _esperar(self, segundos):
+        with self._condicion:
+            self._condicion.wait_for(lambda: not self._activo, timeout=segundos)
+
+    def _registrar_caida(self):
+        with self._condicion:
+            self.reconectando = True
+            self._inicio_caida = time.time()
+        print('[Reconexion] Stream caído, reconectando en segundo plano...')
+
+    def _registrar_recuperacion(self):
+        duracion = time.time() - self._inicio_caida
+        self.ultima_latencia_reconexion = duracion
+        if self._conectado_alguna_vez:
+            self.reconexiones += 1
+            self.tiempo_caida_total += duracion
+            print(f'[Reconexion] Stream recuperado en {duracion:.1f}s')
+        self._conectado_alguna_vez = True
+        self.reconectando = False
+
+    # Abre una captura nueva; una excepción de la fábrica cuenta como apertura fallida (None)
+    def _abrir(self):
+        try:
+            return self.fabrica()
+        except Exception as e:
+            print(f'[Reconexion] Error abriendo la fuente: {e}')
+            return None
+
+    # El hilo es dueño de la captura: la abre, la lee y la libera al terminar.
+    # Cualquier salida del hilo (incluida una excepción) se informa como fin de la fuente.
+    def _bucle_lectura(self):
+        intentos = 0
+        try:
+            while self._activo:
+                if self.captura is None:
+                    captura = self._abrir()
+                    if not self._activo:
+                        if captura is not None:
+                            captura.release()
+                        return
+                    if captura is not None and captura.isOpened():
+                        self.captura = captura
+                        intentos = 0
+                        continue
+                    if captura is not None:
+                        captura.release()
+                    intentos += 1
+                    self.intentos_fallidos += 1
+                    if self.max_reintentos and intentos >= self.max_reintentos:
+                        print(f'[Reconexion] Máximo de reintentos alcanzado ({self.max_reintentos})')
+                        return
+                    espera = self._calcular_espera(intentos)
+                    print(f'[Reconexion] Intento {intentos} fallido, reintentando en {espera:.1f}s')
+                    self._esperar(espera)
+                    continue
+                try:
+                    ret, frame = self.captura.read()
+                except Exception as e:
+                    # Una lectura que falla con excepción es una caída más: se reabre con espera
+                    print(f'[Reconexion] Error leyendo la fuente: {e}')
+                    ret, frame = False, None
+                if not ret:
+                    self.captura.release()
+                    self.captura = None
+                    if not self.reconectando:
+                        self._registrar_caida()
+                    continue
+                with self._condicion:
+                    if self.reconectando:
+                        self._registrar_recuperacion()
+                    self._publicar_frame(frame)
+        finally:
+            if self.captura is not None:
+                self.captura.release()
+                self.captura = None
+            with self._condicion:
+                self._fin_fuente = True
+                self._condicion.notify_all()
+
+    # True mientras el supervisor siga intentando (aunque esté reconectando)
+    def isOpened(self):
+        return self._activo and not self._fin_fuente
+
+    # Detiene el supervisor; el hilo libera la captura al salir
+    def release(self):
+        with self._condicion:
+            self._activo = False
+            self._condicion.notify_all()
+        if self._hilo.is_alive():
+            self._hilo.join(timeout=TIMEOUT_CIERRE_HILO)
+
+    def get(self, propId):
+        captura = self.captura
+        return captura.get(propId) if captura is not None else 0
+
+    def set(self, propId, value):
+        captura = self.captura
+        return captura.set(propId, value) if captura is not None else False
+
+    # Métricas de disponibilidad del stream
+    def obtener_metricas(self):
+        caida_actual = time.time() - self._inicio_caida if self.reconectando and self._conectado_alguna_vez else 0.0
+        return {
+            'reconectando': self.reconectando,
+            'reconexiones': self.reconexiones,
+            'intentos_fallidos': self.intentos_fallidos,
+            'ultima_latencia_reconexion': self.ultima_latencia_reconexion,
+            'tiempo_caida_total': self.tiempo_caida_total + caida_actual,
+            'caida_actual': caida_actual,
+        }
@@ -0,0 +1,146 @@
+# Reproducción acelerada de archivos de video para reanalizar grabaciones.
+# Un hilo decodifica por adelantado hacia una cola acotada (sin descartar frames) y el
+# bucle principal consume tan rápido como lo permita la CPU. Toda la lógica temporal
+# (tiempo en zona, cooldown de alertas) se rige por un reloj de medios que avanza con
+# la marca de tiempo de cada frame (CAP_PROP_POS_MSEC), así las alertas coinciden con
+# las de una corrida en vivo sin importar la velocidad de procesamiento.
+import queue
+import threading
+import time
+import cv2
+from src.captura_hilo import TIMEOUT_CIERRE_HILO
+
+TAMANO_COLA_DEFECTO = 64  # Frames decodificados por adelantado (memoria acotada)
+FPS_RESPALDO = 30.0  # FPS asumidos si el contenedor no informa marcas de tiempo ni FPS
+ESPERA_COLA = 0.5  # Segundos entre comprobaciones de que el hilo decodificador siga vivo
+
+class RelojMedios:
+
+    """
+    Reloj que devuelve el tiempo del video en lugar del tiempo de pared.
+    Se pasa como `reloj` a FiltroGeometrico y Alertas (reemplaza a time.time).
+    Atributos:
+            segundos (float): Marca de tiempo del último frame entregado
+    """
+    def __init__(self):
+        self.segundos = 0.0
+
+    def actualizar(self, milisegundos):
+        self.segundos = milisegundos / 1000.0
+
+    def __call__(self):
+        return self.segundos
+
+class CapturaReproduccion:
+
+    """
+    Args:   ruta (str): Archivo de video
+            reloj (RelojMedios): Reloj a actualizar con cada frame leído (opcional)
+            tamano_cola (int): Frames decodificados por adelantado
+    Atributos:
+            posicion_ms (float): Marca de tiempo del último frame leído
+            frames_leidos (int): Frames entregados por read()/grab()
+    """
+    def __init__(self, ruta, reloj=None, tamano_cola=TAMANO_COLA_DEFECTO):
+        self.captura = cv2.VideoCapture(ruta)
+        self.reloj = reloj
+        self.posicion_ms = 0.0
+        self.frames_leidos = 0
+        self.inicio = time.time()
+        fps = self.captura.get(cv2.CAP_PROP_FPS)
+        self._fps = fps if fps and fps > 0 else FPS_RESPALDO
+        self._cola = queue.Queue(maxsize=tamano_cola)
+        self._frame = None
+        self._fin = False
+        self._activo = self.captura.isOpened()
+        self._hilo = threading.Thread(target=self._bucle_decodificacion, daemon=True)
+        if self._activo:
+            self._hilo.start()
+
+    # Marca de tiempo del frame recién decodificado; si el contenedor no la informa se deriva del índice
+    def _marca_tiempo(self, indice):
+        posicion = self.captura.get(cv2.CAP_PROP_POS_MSEC)
+        if posicion > 0 or indice == 0:
+            return posicion
+        return indice * 1000.0 / self._fps
+
+    # Encola (frame, marca_ms); si la cola está llena espera en lugar de descartar
+    def _encolar(self, elemento):
+        while self._activo:
+            try:
+                self._cola.put(elemento, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    # El marcador de fin se encola siempre (también si la decodificación falla), así grab() termina
+    def _bucle_decodificacion(self):
+        indice = 0
+        try:
+            while self._activo:
+                ret, frame = self.captura.read()
+                if not ret:
+                    break
+                if not self._encolar((frame, self._marca_tiempo(indice))):
+                    return
+                indice += 1
+        finally:
+            self._encolar(None)
+
+    def isOpened(self):
+        return self._activo and not self._fin
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    # Toma el siguiente frame de la cola y avanza el reloj de medios
+    def grab(self):
+        if self._fin or not self._activo:
+            return False
+        elemento = self._siguiente()
+        if elemento is None:
+            self._fin = True
+            self._frame = None
+            return False
+        self._frame, self.posicion_ms = elemento
+        self.frames_leidos += 1
+        if self.reloj is not None:
+            self.reloj.actualizar(self.posicion_ms)
+        return True
+
+    # Siguiente elemento de la cola; None si terminó o si el hilo decodificador ya no existe
+    def _siguiente(self):
+        while True:
+            try:
+                return self._cola.get(timeout=ESPERA_COLA)
+            except queue.Empty:
+                if not self._hilo.is_alive() and self._cola.empty():
+                    return None
+
+    def retrieve(self):
+        return self._frame is not None, self._frame
+
+    # Segundos de video procesados por segundo de pared
+    def obtener_velocidad(self):
+        transcurrido = time.time() - self.inicio
+        return (self.posicion_ms / 1000.0) / transcurrido if transcurrido > 0 else 0.0
+
+    def release(self):
+        self._activo = False
+        # Vaciar la cola para destrabar al hilo si estaba esperando lugar
+        while not self._cola.empty():
+            self._cola.get_nowait()
+        if self._hilo.is_alive():
+            self._hilo.join(timeout=TIMEOUT_CIERRE_HILO)
+        self.captura.release()
+
+    def get(self, propId):
+        if propId == cv2.CAP_PROP_POS_MSEC:
+            return self.posicion_ms
+        return self.captura.get(propId)
+
+    def set(self, propId, value):
+        return False
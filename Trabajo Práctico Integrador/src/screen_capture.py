@@ -3,10 +3,33 @@
 import cv2
 import mss
 import numpy as np
+import os
+import threading
 import time
+from src.captura_dual import CapturaDual
+from src.captura_hilo import CapturaHilo
+from src.clips import CapturaClip
+from src.reconexion import SupervisorReconexion
 
 LIMITE_FPS_POR_DEFECTO = 30  # Límite de FPS para captura de pantalla
 TIMEOUT_RTSP_DEFECTO = 10000  # Timeout por defecto para RTSP en ms
+VARIABLE_OPCIONES_FFMPEG = 'OPENCV_FFMPEG_CAPTURE_OPTIONS'
+PERFIL_RTSP_DEFECTO = 'default'
+
+# Opciones de FFmpeg por perfil de ingesta (se suman a rtsp_transport)
+PERFILES_RTSP = {
+    'default': {},
+    'low_latency': {
+        'fflags': 'nobuffer',  # No acumular paquetes antes de decodificar
+        'flags': 'low_delay',  # Decodificador en modo de bajo retardo
+        'max_delay': '0',  # Sin espera de reordenamiento en el demuxer (microsegundos)
+        'probesize': '32',  # Analizar el mínimo de bytes al abrir
+        'analyzeduration': '0',  # No analizar duración al abrir
+    },
+}
+
+# OPENCV_FFMPEG_CAPTURE_OPTIONS es global al proceso: se protege mientras se abre cada stream
+_lock_opciones_ffmpeg = threading.Lock()
 
 # Clase que captura la pantalla y la presenta como fuente de video.
 # Compatible con la interfaz de cv2.VideoCapture.
@@ -17,8 +40,14 @@ class ScreenCapture:
     Args:   indice_monitor (int): Índice del monitor a capturar (1 = principal)
             region (dict): Región específica {'left': x, 'top': y, 'width': w, 'height': h}
             limite_fps (int): Límite de FPS para la captura (0 = sin límite)
+            reutilizar_buffer (bool): Convierte cada captura sobre un único buffer BGR preasignado.
+                                      El frame devuelto se sobrescribe en el siguiente read():
+                                      solo para un consumidor que termina con cada frame antes
+                                      de leer el siguiente (o que usa frame.copy() para conservarlo).
+            recorte (tuple): (x, y, w, h) relativo al monitor/región; solo se captura esa parte.
+                             El desplazamiento aplicado queda en self.desplazamiento.
     """
-    def __init__(self, indice_monitor=1, region=None, limite_fps=LIMITE_FPS_POR_DEFECTO):
+    def __init__(self, indice_monitor=1, region=None, limite_fps=LIMITE_FPS_POR_DEFECTO, reutilizar_buffer=False, recorte=None):
         self.sct = mss.mss()
         self.indice_monitor = indice_monitor
         self.region = region
@@ -26,15 +55,22 @@ class ScreenCapture:
         self._esta_abierto = True
         self._tiempo_frame = 1.0 / limite_fps if limite_fps > 0 else 0
         self._ultimo_tiempo_captura = 0
+        self.reutilizar_buffer = reutilizar_buffer
+        self._buffer_bgr = None
         # Obtener información del monitor
         if region is None:
             self.monitor = self.sct.monitors[indice_monitor]
         else:
             self.monitor = region
+        # Desplazamiento (x, y) del frame capturado respecto del monitor/región completo
+        self.desplazamiento = (0, 0)
+        if recorte is not None:
+            self.monitor, self.desplazamiento = _recortar_region(self.monitor, recorte)
         print(f"[ScreenCapture] Inicializado")
         print(f"  - Monitor: {indice_monitor}")
         print(f"  - Región: {self.monitor}")
         print(f"  - FPS Límite: {limite_fps if limite_fps > 0 else 'Sin límite'}")
+        print(f"  - Buffer reutilizable: {'SI' if reutilizar_buffer else 'NO'}")
     
     def isOpened(self):
         return self._esta_abierto
@@ -42,19 +78,33 @@ class ScreenCapture:
     # Lee un frame de la pantalla.
     # Returns: tuple: (success, frame) donde success es bool y frame es numpy array
     def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    # Avanza un frame respetando el límite de FPS sin capturar píxeles (frames salteados)
+    def grab(self):
+        if not self._esta_abierto:
+            return False
+        # Controlar FPS si está configurado
+        if self.limite_fps > 0:
+            tiempo_actual = time.time()
+            transcurrido = tiempo_actual - self._ultimo_tiempo_captura
+            if transcurrido < self._tiempo_frame:
+                tiempo_espera = self._tiempo_frame - transcurrido
+                time.sleep(tiempo_espera)
+            self._ultimo_tiempo_captura = time.time()
+        return True
+
+    # Captura la pantalla y la convierte a BGR
+    def retrieve(self):
         if not self._esta_abierto:
             return False, None
         try:
-            # Controlar FPS si está configurado
-            if self.limite_fps > 0:
-                tiempo_actual = time.time()
-                transcurrido = tiempo_actual - self._ultimo_tiempo_captura
-                if transcurrido < self._tiempo_frame:
-                    tiempo_espera = self._tiempo_frame - transcurrido
-                    time.sleep(tiempo_espera)
-                self._ultimo_tiempo_captura = time.time()
             # Capturar pantalla
             captura = self.sct.grab(self.monitor)
+            if self.reutilizar_buffer:
+                return True, self._convertir_en_buffer(captura)
             # Convertir a formato OpenCV (BGR)
             frame = np.array(captura)
             frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
@@ -63,6 +113,16 @@ class ScreenCapture:
             print(f"[ScreenCapture ERROR] {e}")
             return False, None
     
+    # Convierte la captura BGRA de mss a BGR sin asignaciones por frame:
+    # vista de NumPy sobre la memoria de mss + cvtColor directo al buffer preasignado.
+    def _convertir_en_buffer(self, captura):
+        alto, ancho = captura.height, captura.width
+        bgra = np.frombuffer(captura.raw, dtype=np.uint8).reshape(alto, ancho, 4)
+        if self._buffer_bgr is None or self._buffer_bgr.shape[:2] != (alto, ancho):
+            self._buffer_bgr = np.empty((alto, ancho, 3), dtype=np.uint8)
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=self._buffer_bgr)
+        return self._buffer_bgr
+
     # Libera los recursos de captura
     def release(self):
         self._esta_abierto = False
@@ -94,6 +154,86 @@ class ScreenCapture:
     def set(self, propId, value):
         return False
 
+# Construye el valor de OPENCV_FFMPEG_CAPTURE_OPTIONS ('clave;valor|clave;valor')
+def construir_opciones_ffmpeg(url, transporte_rtsp='tcp', perfil=PERFIL_RTSP_DEFECTO):
+    if perfil not in PERFILES_RTSP:
+        raise ValueError(f"Perfil RTSP desconocido: {perfil} (disponibles: {', '.join(PERFILES_RTSP)})")
+    opciones = {}
+    if str(url).lower().startswith('rtsp://'):
+        opciones['rtsp_transport'] = transporte_rtsp.lower()
+    opciones.update(PERFILES_RTSP[perfil])
+    return '|'.join(f'{clave};{valor}' for clave, valor in opciones.items())
+
+# Abre un stream con FFmpeg aplicando las opciones indicadas solo durante la apertura
+def _abrir_con_opciones_ffmpeg(url, opciones, parametros):
+    if not opciones:
+        return cv2.VideoCapture(url, cv2.CAP_FFMPEG, parametros)
+    with _lock_opciones_ffmpeg:
+        anterior = os.environ.get(VARIABLE_OPCIONES_FFMPEG)
+        os.environ[VARIABLE_OPCIONES_FFMPEG] = opciones
+        try:
+            return cv2.VideoCapture(url, cv2.CAP_FFMPEG, parametros)
+        finally:
+            if anterior is None:
+                del os.environ[VARIABLE_OPCIONES_FFMPEG]
+            else:
+                os.environ[VARIABLE_OPCIONES_FFMPEG] = anterior
+
+# Convierte el código FOURCC numérico de OpenCV a texto ('MJPG', 'YUYV', ...)
+def _decodificar_fourcc(valor):
+    codigo = int(valor)
+    return ''.join(chr((codigo >> 8 * i) & 0xFF) for i in range(4)).strip('\x00')
+
+# Formato que la captura está entregando realmente.
+# Returns: dict: {'fourcc', 'ancho', 'alto', 'fps'}
+def obtener_formato_captura(captura):
+    return {
+        'fourcc': _decodificar_fourcc(captura.get(cv2.CAP_PROP_FOURCC)),
+        'ancho': int(captura.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'alto': int(captura.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'fps': captura.get(cv2.CAP_PROP_FPS),
+    }
+
+# Solicita formato de píxel, resolución y fps a una webcam e informa lo que el driver concedió.
+# El orden importa en V4L2/DirectShow: primero FOURCC, luego resolución y al final fps.
+# La resolución concedida se verifica con un frame real (algunos drivers informan la pedida).
+# Returns: dict: formato efectivo (ver obtener_formato_captura)
+def negociar_formato_webcam(captura, fourcc=None, resolucion=None, fps=None):
+    if fourcc:
+        if len(fourcc) != 4:
+            raise ValueError(f"FOURCC inválido: {fourcc} (se esperan 4 caracteres, p.ej. MJPG o YUYV)")
+        captura.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    if resolucion:
+        ancho, alto = resolucion
+        captura.set(cv2.CAP_PROP_FRAME_WIDTH, ancho)
+        captura.set(cv2.CAP_PROP_FRAME_HEIGHT, alto)
+    if fps:
+        captura.set(cv2.CAP_PROP_FPS, fps)
+    formato = obtener_formato_captura(captura)
+    ret, frame = captura.read()
+    if ret and frame is not None:
+        formato['alto'], formato['ancho'] = frame.shape[:2]
+    print(f"[Webcam] Concedido: {formato['fourcc'] or '?'} {formato['ancho']}x{formato['alto']} @ {formato['fps']:.1f} fps")
+    if fourcc and formato['fourcc'] and formato['fourcc'] != fourcc:
+        print(f"[Webcam] Advertencia: se pidió {fourcc} y el driver entrega {formato['fourcc']}")
+    if resolucion and (formato['ancho'], formato['alto']) != tuple(resolucion):
+        print(f"[Webcam] Advertencia: se pidió {resolucion[0]}x{resolucion[1]} y el driver entrega {formato['ancho']}x{formato['alto']}")
+    if fps and formato['fps'] and abs(formato['fps'] - fps) >= 1:
+        print(f"[Webcam] Advertencia: se pidieron {fps} fps y el driver entrega {formato['fps']:.1f}")
+    return formato
+
+# Intersecta un recorte (x, y, w, h) relativo al monitor con sus límites.
+# Returns: (region_absoluta_mss, (dx, dy))
+def _recortar_region(monitor, recorte):
+    x, y, w, h = recorte
+    x1 = min(max(int(x), 0), monitor['width'] - 1)
+    y1 = min(max(int(y), 0), monitor['height'] - 1)
+    x2 = min(int(x + w), monitor['width'])
+    y2 = min(int(y + h), monitor['height'])
+    region = {'left': monitor['left'] + x1, 'top': monitor['top'] + y1,
+              'width': max(x2 - x1, 1), 'height': max(y2 - y1, 1)}
+    return region, (x1, y1)
+
 """
 Factory function para crear fuente de captura.
 Retorna ScreenCapture si argumento_fuente es 'screen', sino cv2.VideoCapture normal.
@@ -102,6 +242,21 @@ Args:
     argumento_fuente: Argumento de fuente ('screen', 'screen:1', '0', 'video.mp4', 'rtsp://...', etc.)
     transporte_rtsp: Protocolo de transporte para RTSP ('tcp' o 'udp')
     timeout: Timeout en milisegundos para streams RTSP
+    en_hilo: Si es True, las fuentes en vivo (RTSP/HTTP/webcam) se decodifican en un hilo
+             y read() devuelve siempre el frame más reciente (ver CapturaHilo)
+    recorte: (x, y, w, h) relativo al monitor; solo aplica a fuentes 'screen' (ver ScreenCapture)
+    reconectar: Si es True, los streams RTSP/HTTP quedan a cargo de un SupervisorReconexion
+                que reabre la conexión en segundo plano con espera exponencial
+    max_reintentos: Aperturas fallidas consecutivas antes de rendirse (0 = infinito)
+    perfil_rtsp: Perfil de ingesta FFmpeg para streams ('default' o 'low_latency', ver PERFILES_RTSP)
+    fuente_evidencia: Fuente del stream principal para modo dual (ver CapturaDual). argumento_fuente
+                      pasa a ser el substream de detección; las zonas se definen sobre fuente_evidencia.
+    fourcc: Formato de píxel solicitado a la webcam ('MJPG', 'YUYV', ...; ver negociar_formato_webcam)
+    resolucion: (ancho, alto) solicitado a la webcam
+    fps_camara: FPS solicitados a la webcam
+    reutilizar_buffer: Solo fuentes 'screen' (ver ScreenCapture). Activarlo solo con un único consumidor
+                       que lee y procesa en el mismo hilo (main.py); con HubCapturas u otro hilo publicando
+                       los frames el buffer se sobrescribiría mientras lo leen.
 
 Returns: Objeto compatible con cv2.VideoCapture
 
@@ -111,10 +266,23 @@ Ejemplos:
     'screen:2' -> ScreenCapture del monitor 2
     'screen:region:100,100,800,600' -> Región específica (x,y,w,h)
     '0' -> cv2.VideoCapture(0) - webcam
+    '0' + fourcc='MJPG', resolucion=(1280, 720) -> webcam con formato negociado
     'video.mp4' -> cv2.VideoCapture('video.mp4')
+    'clip.npy' -> CapturaClip (frames crudos mapeados en memoria, ver clip_tool.py)
     'rtsp://...' -> cv2.VideoCapture optimizado para RTSP
+    '.../Channels/102' + fuente_evidencia='.../Channels/101' -> CapturaDual
 """
-def crear_fuente_pantalla(argumento_fuente, transporte_rtsp='tcp', timeout=TIMEOUT_RTSP_DEFECTO):
+def crear_fuente_pantalla(argumento_fuente, transporte_rtsp='tcp', timeout=TIMEOUT_RTSP_DEFECTO, en_hilo=False, recorte=None,
+                          reconectar=False, max_reintentos=0, perfil_rtsp=PERFIL_RTSP_DEFECTO, fuente_evidencia=None,
+                          fourcc=None, resolucion=None, fps_camara=None, reutilizar_buffer=False):
+    if fuente_evidencia is not None:
+        opciones = dict(transporte_rtsp=transporte_rtsp, timeout=timeout, reconectar=reconectar,
+                        max_reintentos=max_reintentos, perfil_rtsp=perfil_rtsp)
+        print(f'[INFO] Modo dual: detección en {argumento_fuente}, evidencia en {fuente_evidencia}')
+        captura_deteccion = crear_fuente_pantalla(argumento_fuente, en_hilo=en_hilo, **opciones)
+        # El stream principal en vivo se decodifica en su propio hilo (último frame gana)
+        captura_evidencia = crear_fuente_pantalla(fuente_evidencia, en_hilo=True, **opciones)
+        return CapturaDual(captura_deteccion, captura_evidencia)
     fuente_str = str(argumento_fuente).lower()
     if fuente_str.startswith('screen'):
         partes = fuente_str.split(':')
@@ -124,33 +292,34 @@ def crear_fuente_pantalla(argumento_fuente, transporte_rtsp='tcp', timeout=TIMEO
             if len(coordenadas) == 4:
                 x, y, w, h = map(int, coordenadas)
                 region = {'left': x, 'top': y, 'width': w, 'height': h}
-                return ScreenCapture(indice_monitor=1, region=region)
+                return ScreenCapture(indice_monitor=1, region=region, reutilizar_buffer=reutilizar_buffer, recorte=recorte)
         # screen:N (monitor específico)
         elif len(partes) == 2:
             try:
                 indice_monitor = int(partes[1])
-                return ScreenCapture(indice_monitor=indice_monitor)
+                return ScreenCapture(indice_monitor=indice_monitor, reutilizar_buffer=reutilizar_buffer, recorte=recorte)
             except ValueError:
                 pass
         # screen (monitor principal)
-        return ScreenCapture(indice_monitor=1)
+        return ScreenCapture(indice_monitor=1, reutilizar_buffer=reutilizar_buffer, recorte=recorte)
     # Fuente RTSP (URL con rtsp://)
     if fuente_str.startswith('rtsp://') or fuente_str.startswith('http://'):
+        if reconectar:
+            # El supervisor ya decodifica en su propio hilo (último frame gana)
+            return SupervisorReconexion(
+                lambda: crear_fuente_pantalla(argumento_fuente, transporte_rtsp=transporte_rtsp, timeout=timeout, perfil_rtsp=perfil_rtsp),
+                max_reintentos=max_reintentos,
+            )
         print(f'[INFO] Conectando a stream: {argumento_fuente}')
-        print(f'[INFO] Transporte: {transporte_rtsp.upper()}, Timeout: {timeout}ms')
-        captura = cv2.VideoCapture(argumento_fuente, cv2.CAP_FFMPEG)
+        print(f'[INFO] Transporte: {transporte_rtsp.upper()}, Perfil: {perfil_rtsp}, Timeout: {timeout}ms')
+        # Transporte y perfil se pasan a FFmpeg vía OPENCV_FFMPEG_CAPTURE_OPTIONS.
+        # Al definir la variable OpenCV deja de forzar TCP, por eso rtsp_transport va siempre explícito.
+        opciones = construir_opciones_ffmpeg(argumento_fuente, transporte_rtsp, perfil_rtsp)
+        # Los timeouts deben pasarse al abrir: fijarlos después no afecta la apertura
+        parametros = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout, cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout]
+        captura = _abrir_con_opciones_ffmpeg(argumento_fuente, opciones, parametros)
         # Configuración optimizada para RTSP
         captura.set(cv2.CAP_PROP_BUFFERSIZE, 0)  # Sin buffer para baja latencia
-        captura.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout)
-        captura.set(cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout)
-        # Opciones FFMPEG para baja latencia
-        if transporte_rtsp.lower() == 'tcp':
-            # TCP es más confiable pero puede tener más latencia
-            pass  # OpenCV usa TCP por defecto con FFMPEG
-        elif transporte_rtsp.lower() == 'udp':
-            # UDP es más rápido pero menos confiable
-            # Nota: OpenCV no expone directamente rtsp_transport en CAP_PROP
-            print('[WARNING] UDP transport no completamente soportado en OpenCV, usando TCP')
         if captura.isOpened():
             print('[SUCCESS] Stream RTSP conectado exitosamente')
             # Mostrar info del stream
@@ -160,10 +329,27 @@ def crear_fuente_pantalla(argumento_fuente, transporte_rtsp='tcp', timeout=TIMEO
             print(f'[INFO] Resolución: {width}x{height}, FPS: {fps:.1f}')
         else:
             print('[ERROR] No se pudo conectar al stream RTSP')
-        return captura
+        return _envolver_en_hilo(captura) if en_hilo else captura
+    # Clip crudo grabado con clip_tool.py: frames servidos desde el mapeo, sin decodificar
+    if fuente_str.endswith('.npy'):
+        return CapturaClip(argumento_fuente)
     # Fuente normal (webcam o archivo)
-    if fuente_str.isdigit(): return cv2.VideoCapture(int(fuente_str))
-    else: return cv2.VideoCapture(argumento_fuente)
+    if fuente_str.isdigit():
+        captura = cv2.VideoCapture(int(fuente_str))
+        if captura.isOpened() and (fourcc or resolucion or fps_camara):
+            negociar_formato_webcam(captura, fourcc, resolucion, fps_camara)
+        return _envolver_en_hilo(captura) if en_hilo else captura
+    # Los archivos de video no se envuelven: el hilo los consumiría a velocidad de decodificación
+    if en_hilo:
+        print('[INFO] Captura en hilo ignorada para archivos de video')
+    return cv2.VideoCapture(argumento_fuente)
+
+# Envuelve una captura abierta en CapturaHilo (último frame gana)
+def _envolver_en_hilo(captura):
+    if not captura.isOpened():
+        return captura
+    print('[INFO] Captura en hilo activada (se conserva solo el frame más reciente)')
+    return CapturaHilo(captura)
 
 # Lista todos los monitores disponibles
 def listar_monitores():
@@ -2,14 +2,16 @@
 # Zonas se guardan/recuperan en JSON con lista de polígonos (Lista de puntos X,Y).
 import json
 import os
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from src.constantes import ARCHIVO_ZONAS, ETIQUETA_NOMBRES_ZONAS, ETIQUETA_ZONAS
+from src.escalado import _factores, escalar_poligono
 
 #region Constantes
 
 MODO_APERTURA_ESCRITURA_ARCHIVO = 'w'
 MODO_APERTURA_LECTURA_ARCHIVO = 'r'
 UTF8 = 'utf-8'
+FRACCION_MAXIMA_RECORTES = 0.8  # Por encima de esta fracción del frame conviene una sola inferencia completa
 
 #endregion
 
@@ -48,3 +50,60 @@ class GestorZonas:
         if indice < len(self.nombres_zonas):
             return self.nombres_zonas[indice]
         return f"Zona {indice + 1}: Área Restringida"
+
+    # Rectángulo (x, y, ancho, alto) que contiene todas las zonas, ampliado en `margen` píxeles.
+    # Retorna None si no hay zonas. No recorta a los límites del frame.
+    def rectangulo_envolvente(self, margen: int = 0) -> Optional[Tuple[int, int, int, int]]:
+        puntos = [punto for zona in self.zonas for punto in zona]
+        if not puntos:
+            return None
+        xs = [int(p[0]) for p in puntos]
+        ys = [int(p[1]) for p in puntos]
+        x1, y1 = max(min(xs) - margen, 0), max(min(ys) - margen, 0)
+        x2, y2 = max(xs) + margen, max(ys) + margen
+        return x1, y1, x2 - x1, y2 - y1
+
+    # Rectángulos (x, y, ancho, alto) alrededor de cada zona, ampliados en `margen` píxeles (del frame
+    # completo), recortados al frame y fusionados cuando se solapan, en coordenadas de un frame
+    # ancho x alto a la `escala` dada. Son las regiones donde vale la pena inferir: una persona lejos
+    # de todas las zonas nunca alcanza el solapamiento mínimo con ellas.
+    # Retorna None si no hay zonas o si los rectángulos cubren casi todo el frame.
+    def rectangulos_zonas(self, margen: int, ancho: int, alto: int, escala=1.0) -> Optional[List[Tuple[int, int, int, int]]]:
+        fx, fy = _factores(escala)
+        margen_x, margen_y = int(round(margen * fx)), int(round(margen * fy))
+        rectangulos = []
+        for zona in self.zonas:
+            puntos = escalar_poligono(zona, escala)
+            x1 = max(min(p[0] for p in puntos) - margen_x, 0)
+            y1 = max(min(p[1] for p in puntos) - margen_y, 0)
+            x2 = min(max(p[0] for p in puntos) + margen_x, ancho)
+            y2 = min(max(p[1] for p in puntos) + margen_y, alto)
+            if x2 > x1 and y2 > y1:
+                rectangulos.append((x1, y1, x2, y2))
+        rectangulos = fusionar_rectangulos(rectangulos)
+        if not rectangulos or sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in rectangulos) > FRACCION_MAXIMA_RECORTES * ancho * alto:
+            return None
+        return [(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in rectangulos]
+
+    # Desplaza todas las zonas en memoria (p.ej. al capturar solo una región del frame).
+    # No modifica el archivo de zonas.
+    def desplazar(self, dx: int, dy: int):
+        self.zonas = [[(int(p[0]) + dx, int(p[1]) + dy) for p in zona] for zona in self.zonas]
+
+# Fusiona rectángulos (x1, y1, x2, y2) que se solapan hasta que no quede ningún par solapado
+def fusionar_rectangulos(rectangulos):
+    rectangulos = list(rectangulos)
+    fusionado = True
+    while fusionado:
+        fusionado = False
+        for i in range(len(rectangulos)):
+            for j in range(i + 1, len(rectangulos)):
+                a, b = rectangulos[i], rectangulos[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rectangulos[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del rectangulos[j]
+                    fusionado = True
+                    break
+            if fusionado:
+                break
+    return rectangulos
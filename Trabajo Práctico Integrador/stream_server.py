@@ -0,0 +1,164 @@
+"""Servidor MJPEG/HTTP local que reemplaza a una cámara IP para pruebas.
+Ejecutar:   python stream_server.py --source video.mp4 --port 8080
+            python stream_server.py --source synthetic --fps 25 --timestamps --disconnect_every 20 --refuse_for 5
+Consumir:   python main.py --source http://127.0.0.1:8080/video
+            python latency_tool.py --source http://127.0.0.1:8080/video --e2e 30
+Fallas inyectables (por cliente; un cliente es la IP más el parámetro ?client= de la URL, así
+varios consumidores en la misma máquina usan p.ej. .../video?client=main y .../video?client=latencia):
+- Congelamientos: deja de enviar durante --stall_duration s cada --stall_every s (la conexión sigue abierta)
+- Cortes: cierra la conexión cada --disconnect_every s y rechaza reconexiones durante --refuse_for s
+- Ancho de banda: limita el envío a --bandwidth_kbps kilobytes/s
+- Marcas de tiempo: incrusta el instante de captura en cada frame (ver src/marcas_tiempo.py)
+"""
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import cv2
+import numpy as np
+from src.marcas_tiempo import incrustar_marca_tiempo
+
+#region Constantes
+
+LIMITE = 'frame'  # Separador multipart entre frames
+TAMANO_BLOQUE_ENVIO = 4096  # Bytes por escritura cuando se limita el ancho de banda
+ANCHO_SINTETICO = 640
+ALTO_SINTETICO = 480
+
+#endregion
+
+#region Funciones Auxiliares
+
+# Frames sintéticos: fondo con ruido leve, un rectángulo en movimiento y el número de frame
+def generar_frames_sinteticos(ancho, alto):
+    generador = np.random.default_rng(0)
+    numero = 0
+    while True:
+        frame = generador.integers(90, 110, size=(alto, ancho, 3), dtype=np.uint8)
+        x = int((numero * 4) % max(ancho - 80, 1))
+        cv2.rectangle(frame, (x, alto // 2 - 80), (x + 60, alto // 2 + 80), (40, 160, 40), -1)
+        cv2.putText(frame, f"Frame {numero}", (10, alto - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        numero += 1
+        yield frame
+
+# Frames de un archivo de video, en bucle
+def generar_frames_video(ruta):
+    captura = cv2.VideoCapture(ruta)
+    try:
+        while captura.isOpened():
+            ret, frame = captura.read()
+            if not ret:
+                captura.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = captura.read()
+                if not ret:
+                    return
+            yield frame
+    finally:
+        captura.release()
+
+def crear_generador(opciones):
+    if opciones.source == 'synthetic':
+        return generar_frames_sinteticos(opciones.width, opciones.height)
+    return generar_frames_video(opciones.source)
+
+#endregion
+
+#region Funciones Principales
+
+class ManejadorMJPEG(BaseHTTPRequestHandler):
+
+    opciones = None
+    rechazar_hasta = {}  # Cliente -> instante hasta el que se rechazan sus conexiones tras un corte
+    lock = threading.Lock()
+
+    def log_message(self, formato, *args):
+        pass
+
+    # Escribe respetando el ancho de banda configurado (0 = sin límite)
+    def _escribir(self, datos):
+        limite = self.opciones.bandwidth_kbps * 1024
+        if not limite:
+            self.wfile.write(datos)
+            return
+        for inicio in range(0, len(datos), TAMANO_BLOQUE_ENVIO):
+            bloque = datos[inicio:inicio + TAMANO_BLOQUE_ENVIO]
+            self.wfile.write(bloque)
+            time.sleep(len(bloque) / float(limite))
+
+    # Identifica al cliente por IP y ?client= (la ventana de rechazo de uno no afecta a otro)
+    def _cliente(self):
+        nombre = parse_qs(urlparse(self.path).query).get('client', [''])[0]
+        return f"{self.client_address[0]}/{nombre}" if nombre else self.client_address[0]
+
+    def do_GET(self):
+        cliente = self._cliente()
+        with ManejadorMJPEG.lock:
+            rechazado = time.time() < ManejadorMJPEG.rechazar_hasta.get(cliente, 0.0)
+        if rechazado:
+            print(f"[Servidor] Conexión rechazada de {cliente} (corte simulado)")
+            self.send_error(503, 'Corte simulado')
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={LIMITE}')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        print(f"[Servidor] Cliente conectado: {cliente}")
+        opciones = self.opciones
+        intervalo = 1.0 / opciones.fps
+        inicio = time.time()
+        proximo_congelamiento = inicio + opciones.stall_every if opciones.stall_every else None
+        try:
+            for frame in crear_generador(opciones):
+                ahora = time.time()
+                if opciones.disconnect_every and ahora - inicio >= opciones.disconnect_every:
+                    with ManejadorMJPEG.lock:
+                        ManejadorMJPEG.rechazar_hasta[cliente] = ahora + opciones.refuse_for
+                    print(f"[Servidor] Corte simulado tras {ahora - inicio:.1f}s (rechazo {opciones.refuse_for}s)")
+                    break
+                if proximo_congelamiento and ahora >= proximo_congelamiento:
+                    print(f"[Servidor] Congelamiento simulado de {opciones.stall_duration}s")
+                    time.sleep(opciones.stall_duration)
+                    proximo_congelamiento = time.time() + opciones.stall_every
+                if opciones.timestamps:
+                    incrustar_marca_tiempo(frame)
+                _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, opciones.quality])
+                datos = jpeg.tobytes()
+                encabezado = f'--{LIMITE}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(datos)}\r\n\r\n'
+                self._escribir(encabezado.encode() + datos + b'\r\n')
+                espera = intervalo - (time.time() - ahora)
+                if espera > 0:
+                    time.sleep(espera)
+        except (BrokenPipeError, ConnectionResetError):
+            print(f"[Servidor] Cliente desconectado: {cliente}")
+
+def main(args):
+    ManejadorMJPEG.opciones = args
+    servidor = ThreadingHTTPServer((args.host, args.port), ManejadorMJPEG)
+    servidor.daemon_threads = True
+    print(f"[Servidor] MJPEG en http://{args.host}:{args.port}/video (fuente: {args.source}, {args.fps} fps)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor MJPEG/HTTP local con fallas inyectables para probar reconexión y latencia")
+    parser.add_argument("--source", default="synthetic", help="Archivo de video (en bucle) o 'synthetic'")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección de escucha (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Puerto (default: 8080)")
+    parser.add_argument("--fps", type=float, default=25.0, help="FPS enviados (default: 25)")
+    parser.add_argument("--quality", type=int, default=80, help="Calidad JPEG 1-100 (default: 80)")
+    parser.add_argument("--width", type=int, default=ANCHO_SINTETICO, help="Ancho de los frames sintéticos")
+    parser.add_argument("--height", type=int, default=ALTO_SINTETICO, help="Alto de los frames sintéticos")
+    parser.add_argument("--timestamps", action="store_true", help="Incrustar el instante de captura en cada frame")
+    parser.add_argument("--stall_every", type=float, default=0, help="Segundos entre congelamientos (0=nunca)")
+    parser.add_argument("--stall_duration", type=float, default=3.0, help="Duración de cada congelamiento en s")
+    parser.add_argument("--disconnect_every", type=float, default=0, help="Segundos de envío antes de cortar la conexión (0=nunca)")
+    parser.add_argument("--refuse_for", type=float, default=0, help="Segundos rechazando las conexiones del cliente cortado (IP + ?client=)")
+    parser.add_argument("--bandwidth_kbps", type=float, default=0, help="Límite de ancho de banda en KB/s (0=sin límite)")
+    main(parser.parse_args())
+
+#endregion
@@ -20,12 +20,21 @@ from pathlib import Path
 
 # Importar módulos existentes SIN modificarlos
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from src.detector import Detector
+from src.detecciones import Detecciones, integral_mascara
 from src.zonas import GestorZonas
 from src.alertas import Alertas
+from src.cambios import DetectorCambios
+from src.control_adaptativo import ControladorAdaptativo
+from src.movimiento import DetectorMovimiento
 from src.utils import ContadorFPS
 from src.filtro_geometrico import FiltroGeometrico
-from src.screen_capture import crear_fuente_pantalla, listar_monitores
+from src.flujo_optico import PropagadorFlujo
+from src.screen_capture import crear_fuente_pantalla, listar_monitores, obtener_formato_captura
+from src.integridad import VerificadorIntegridad
+from src.captura_dual import CapturaDual
+from src.hub_capturas import HubCapturas
+from src.pool_modelos import PoolModelos
+from src.escalado import CapturaEscalada, escala_inversa, escalar_poligono
 from src.overlay import dibujar_bounding_box, dibujar_zona
 
 # Importar trackers
@@ -66,13 +75,28 @@ system_state = {
         'source_type': 'webcam',
         'source_value': '0',
         'rtsp_url': '',
+        'rtsp_url_main': '',
         'rtsp_transport': 'tcp',
+        'rtsp_profile': 'default',
         'video_file': '',
         'screen_monitor': '0',
+        'webcam_fourcc': '',
+        'webcam_width': 0,
+        'webcam_height': 0,
+        'webcam_fps': 0,
         'weights': 'yolov8n.pt',
         'conf': 0.53,
         'imgsz': 640,
+        'backend': 'pytorch',
+        'calib_data': '',
         'skip_frames': 0,
+        'decode_skip': False,
+        'flow_propagation': False,
+        'adaptive': False,
+        'target_fps': 0,
+        'target_latency': 0,
+        'max_skip': 4,
+        'imgsz_ladder': [],
         'tracker': 'bytetrack',
         'use_geometric_filter': True,
         'min_time_zone': 2.0,
@@ -81,9 +105,23 @@ system_state = {
         'longitud_trayectoria': 10,
         'umbral_movimiento_minimo': 2.0,
         'zone_overlap_ratio': 0.30,
+        'zone_roi': False,
+        'tiled': False,
+        'tile_size': 640,
+        'tile_overlap': 0.2,
+        'tile_zones_only': False,
+        'roi_margin': 80,
         'cooldown': 10,
         'timeout': 10000,
-        'max_retries': 3
+        'max_retries': 3,
+        'downscale_capture': False,
+        'skip_unchanged': False,
+        'change_threshold': 2.0,
+        'motion_gate': False,
+        'motion_fraction': 0.005,
+        'motion_margin': 80,
+        'check_integrity': False,
+        'corrupt_fraction': 0.25
     },
     'stats': {
         'fps': 0,
@@ -92,10 +130,44 @@ system_state = {
         'alerts': 0,
         'in_zone': 0,
         'filtered': 0,
-        'tracks_active': 0
+        'tracks_active': 0,
+        'dropped_frames': 0,
+        'unchanged_skip_rate': 0,
+        'motion_open_rate': 0,
+        'motion_closed_rate': 0,
+        'flow_success_rate': 0,
+        'tiles': 0,
+        'tile_latency_ms': 0,
+        'adaptive_skip': 0,
+        'adaptive_imgsz': 0,
+        'detector_latency_ms': 0,
+        'corrupted_frames': 0,
+        'reconnecting': False,
+        'reconnects': 0,
+        'outage_seconds': 0,
+        'last_reconnect_latency': 0
     }
 }
 
+# Una sola decodificación por fuente en vivo, compartida por detección y editor de zonas
+capture_hub = HubCapturas()
+
+# Modelos precargados y reutilizados entre inicios (clave: pesos, imgsz, backend)
+model_pool = PoolModelos()
+
+def preload_model():
+    """Cargar y calentar en segundo plano el modelo de la configuración actual"""
+    config = system_state['config']
+    try:
+        model_pool.precargar(
+            pesos=config['weights'],
+            tam_imagen=config['imgsz'],
+            backend=config.get('backend', 'pytorch'),
+            datos_calibracion=config.get('calib_data') or None
+        )
+    except Exception as e:
+        print(f'⚠ Error precargando modelo: {e}')
+
 def load_config():
     """Cargar configuración desde archivo"""
     config_path = Path(__file__).parent / 'config.json'
@@ -158,6 +230,9 @@ def api_config():
         new_config = request.json
         system_state['config'].update(new_config)
         save_config()
+        # Un modelo distinto se precarga ya, así el próximo inicio no espera la carga
+        if any(key in new_config for key in ('weights', 'imgsz', 'backend', 'calib_data')):
+            threading.Thread(target=preload_model, daemon=True).start()
         return jsonify({'status': 'ok', 'config': system_state['config']})
 
 @app.route('/api/zones', methods=['GET', 'POST'])
@@ -187,7 +262,9 @@ def api_status():
     return jsonify({
         'running': system_state['running'],
         'paused': system_state['paused'],
-        'stats': system_state['stats']
+        'stats': system_state['stats'],
+        'capture_hub': {'sources': capture_hub.obtener_estado(), 'opened': capture_hub.aperturas},
+        'model_pool': model_pool.obtener_estado()
     })
 
 @app.route('/api/monitors')
@@ -473,31 +550,61 @@ def handle_pause():
 
 # ==================== LÓGICA DE DETECCIÓN ====================
 
-def bbox_center(b):
-    """Calcular centro de bbox"""
-    x1, y1, x2, y2 = b
-    return int((x1+x2)/2), int((y1+y2)/2)
+def update_stream_stats(cap):
+    """Copiar métricas del supervisor de reconexión a las estadísticas"""
+    if not hasattr(cap, 'obtener_metricas'):
+        return
+    metrics = cap.obtener_metricas()
+    system_state['stats']['reconnecting'] = metrics['reconectando']
+    system_state['stats']['reconnects'] = metrics['reconexiones']
+    system_state['stats']['outage_seconds'] = round(metrics['tiempo_caida_total'], 1)
+    system_state['stats']['last_reconnect_latency'] = round(metrics['ultima_latencia_reconexion'], 1)
 
+def webcam_format_options(config):
+    """Formato solicitado a la webcam (vacío = el del driver)"""
+    width, height = config.get('webcam_width', 0), config.get('webcam_height', 0)
+    return {
+        'fourcc': config.get('webcam_fourcc') or None,
+        'resolucion': (width, height) if width and height else None,
+        'fps_camara': config.get('webcam_fps') or None,
+    }
 
-def bbox_zone_overlap_ratio(bbox, zone_mask):
-    """Calcula el porcentaje de solapamiento del bbox con la mascara de zonas.
+def resolve_source(config, for_zones=False):
+    """Fuente configurada; el editor de zonas usa el stream principal en modo dual"""
+    source_type = config['source_type']
+    if source_type == 'webcam':
+        return int(config['source_value'])
+    if source_type == 'rtsp':
+        return (config.get('rtsp_url_main') if for_zones else None) or config['rtsp_url']
+    if source_type == 'video':
+        return config['video_file']
+    if source_type == 'screen':
+        monitor = config.get('screen_monitor', '0')
+        return f'screen:{monitor}' if monitor != '0' else 'screen'
+    return 0
 
-    Devuelve un float entre 0.0 y 1.0.
+def open_capture(config, source, copy_frames=False):
+    """
+    Suscribe a la fuente en el hub de capturas: detección y editor de zonas comparten una
+    sola decodificación por fuente en vivo. Los archivos de video se abren por separado
+    (cada consumidor avanza a su ritmo). copy_frames: el consumidor dibuja sobre los frames.
     """
-    if zone_mask is None:
-        return 0.0
-    height, width = zone_mask.shape[:2]
-    x1 = max(int(bbox[0]), 0)
-    y1 = max(int(bbox[1]), 0)
-    x2 = min(int(bbox[2]), width)
-    y2 = min(int(bbox[3]), height)
-    box_width = x2 - x1
-    box_height = y2 - y1
-    if box_width <= 0 or box_height <= 0:
-        return 0.0
-    bbox_area = float(box_width * box_height)
-    zone_area = float(np.count_nonzero(zone_mask[y1:y2, x1:x2]))
-    return zone_area / bbox_area if bbox_area > 0 else 0.0
+    source_type = config['source_type']
+    if source_type == 'video':
+        return crear_fuente_pantalla(source)
+    
+    def factory():
+        if source_type == 'rtsp':
+            return crear_fuente_pantalla(
+                source,
+                transporte_rtsp=config.get('rtsp_transport', 'tcp'),
+                timeout=config.get('timeout', 10000),
+                perfil_rtsp=config.get('rtsp_profile', 'default')
+            )
+        # Sin buffer reutilizable: el supervisor publica cada frame a todos los suscriptores
+        return crear_fuente_pantalla(source, reutilizar_buffer=False, **webcam_format_options(config))
+    
+    return capture_hub.abrir(str(source), factory, max_reintentos=config.get('max_retries', 3), copiar=copy_frames)
 
 def run_detection():
     """
@@ -507,12 +614,16 @@ def run_detection():
     try:
         config = system_state['config']
         
-        # Inicializar componentes
-        print(f'[Detector] Cargando modelo {config["weights"]}...')
-        system_state['detector'] = Detector(
+        # Las métricas de reconexión son de esta corrida: no arrastrar las de una detección anterior
+        system_state['stats'].update({'reconnecting': False, 'reconnects': 0, 'outage_seconds': 0, 'last_reconnect_latency': 0})
+        
+        # Inicializar componentes (el modelo sale del pool: solo se carga si cambió la configuración)
+        system_state['detector'] = model_pool.obtener(
             pesos=config['weights'],
             umbral_confianza=config['conf'],
-            tam_imagen=config['imgsz']
+            tam_imagen=config['imgsz'],
+            backend=config.get('backend', 'pytorch'),
+            datos_calibracion=config.get('calib_data') or None
         )
         
         # Inicializar tracker
@@ -552,46 +663,85 @@ def run_detection():
         # Inicializar FPS counter
         system_state['fps_counter'] = ContadorFPS()
         
+        # Detector de cambios para omitir inferencia en frames estáticos
+        change_detector = DetectorCambios(umbral=config.get('change_threshold', 2.0)) if config.get('skip_unchanged', False) else None
+        
+        # Compuerta de movimiento: el detector solo corre si algo se mueve en las zonas o quedan tracks vivos
+        motion_gate = DetectorMovimiento(
+            fraccion_minima=config.get('motion_fraction', 0.005),
+            margen=config.get('motion_margin', 80)
+        ) if config.get('motion_gate', False) else None
+        
+        # Control adaptativo de salto/imgsz: reemplaza skip_frames / imgsz fijos si hay un objetivo
+        adaptive = None
+        skip_frames = config['skip_frames']
+        if config.get('adaptive', False):
+            if config.get('target_fps', 0) > 0 or config.get('target_latency', 0) > 0:
+                adaptive = ControladorAdaptativo(
+                    fps_objetivo=config.get('target_fps', 0),
+                    latencia_objetivo=config.get('target_latency', 0),
+                    salto_inicial=skip_frames,
+                    salto_maximo=config.get('max_skip', 4),
+                    escalera_imgsz=config.get('imgsz_ladder', []),
+                    tam_imagen=config['imgsz']
+                )
+            else:
+                socketio.emit('log', {'message': '⚠ adaptive requiere target_fps o target_latency; se ignora', 'level': 'warning'})
+        
+        # Propagación por flujo óptico de las cajas en los frames salteados
+        flow_propagator = PropagadorFlujo() if config.get('flow_propagation', False) else None
+        if flow_propagator is not None and config.get('decode_skip', False):
+            # Con decode_skip los frames salteados solo se avanzan con grab(): no hay imagen para el flujo
+            socketio.emit('log', {'message': '⚠ flow_propagation no aplica con decode_skip; se ignora', 'level': 'warning'})
+            flow_propagator = None
+        
+        # Verificador de integridad para descartar frames manchados antes del detector
+        integrity_checker = VerificadorIntegridad(fraccion_maxima=config.get('corrupt_fraction', 0.25)) if config.get('check_integrity', False) else None
+        
         # Determinar source
         source_type = config['source_type']
-        if source_type == 'webcam':
-            source = int(config['source_value'])
-        elif source_type == 'rtsp':
-            source = config['rtsp_url']
-        elif source_type == 'video':
-            source = config['video_file']
-        elif source_type == 'screen':
-            monitor = config.get('screen_monitor', '0')
-            source = f'screen:{monitor}' if monitor != '0' else 'screen'
-        else:
-            source = 0
+        source = resolve_source(config)
         
         print(f'[Source] Abriendo: {source}')
         
-        # Crear captura de video
-        if source_type == 'rtsp':
-            system_state['cap'] = crear_fuente_pantalla(
-                source,
-                transporte_rtsp=config.get('rtsp_transport', 'tcp'),
-                timeout=config.get('timeout', 10000)
+        # Crear captura de video (el frame que se dibuja se pide copiado: el original es compartido)
+        if source_type == 'rtsp' and config.get('rtsp_url_main'):
+            system_state['cap'] = CapturaDual(
+                open_capture(config, source),
+                open_capture(config, config['rtsp_url_main'], copy_frames=True)
             )
         else:
-            system_state['cap'] = crear_fuente_pantalla(source)
+            system_state['cap'] = open_capture(config, source, copy_frames=True)
         
         if not system_state['cap'].isOpened():
             socketio.emit('log', {'message': f'✗ Error: No se pudo abrir {source}', 'level': 'error'})
             system_state['running'] = False
             return
         
+        # El formato concedido por la webcam se informa con el primer frame (la abre el hub)
+        format_reported = source_type != 'webcam'
+        
+        # Reducir a tamaño de inferencia en la captura (el frame original solo se usa para el stream).
+        # Con adaptive queda fija en el imgsz inicial (el mayor escalón) a propósito: cambiar la escala
+        # en marcha dejaría al tracker con cajas en coordenadas viejas; el detector reduce a su imgsz actual.
+        if config.get('downscale_capture', False) and not (source_type == 'rtsp' and config.get('rtsp_url_main')):
+            system_state['cap'] = CapturaEscalada(system_state['cap'], config['imgsz'])
+        
         print('[Sistema] ✓ Detección iniciada')
         socketio.emit('log', {'message': '✓ Sistema operativo', 'level': 'success'})
         
         # Variables de procesamiento
         frame_count = 0
-        last_dets = []
-        last_tracks = []
+        # Una fuente compartida del hub puede traer reconexiones previas: solo cuentan las nuevas
+        update_stream_stats(system_state['cap'])
+        last_reconnect_count = system_state['stats']['reconnects']
+        last_dets = Detecciones.vacias()
+        last_tracks = Detecciones.vacias()
         total_alerts = 0
         zone_mask = None
+        zone_integral = None
+        zone_rois = None
+        zone_mask_scale = 1.0
         last_zone_count = 0
         
         # Loop principal
@@ -600,89 +750,165 @@ def run_detection():
                 time.sleep(0.1)
                 continue
             
+            # Con decode_skip los frames salteados solo avanzan la fuente (grab), sin decodificar ni transmitir
+            # La ventana del controlador puede cerrarse en cualquier frame (también en los salteados):
+            # salto e imgsz se copian una vez por iteración, antes de cualquier inferencia
+            if adaptive is not None:
+                skip_frames = adaptive.salto
+                system_state['detector'].tam_imagen = adaptive.tam_imagen
+            if config.get('decode_skip', False) and skip_frames > 0 and (frame_count + 1) % (skip_frames + 1) != 0:
+                if system_state['cap'].grab():
+                    system_state['fps_counter'].registrar_tiempo()
+                    if adaptive is not None:
+                        adaptive.registrar_frame()
+                    frame_count += 1
+                    continue
+            
             ret, frame = system_state['cap'].read()
             if not ret:
+                # Fuentes en vivo: el supervisor del hub reconecta en segundo plano; el loop sigue publicando el estado
+                if source_type != 'video' and system_state['cap'].isOpened():
+                    if system_state['cap'].reconectando and not system_state['stats']['reconnecting']:
+                        socketio.emit('log', {'message': '⚠ Stream caído, reconectando...', 'level': 'warning'})
+                    update_stream_stats(system_state['cap'])
+                    socketio.emit('status', {'running': True, 'paused': False, 'stats': system_state['stats']})
+                    continue
                 print('[Source] Frame perdido o fin del video')
-                if source_type in ['video', 'rtsp']:
-                    # Intentar reconexión para streams
+                if source_type == 'video':
                     time.sleep(1)
                     continue
                 else:
                     break
             
+            # Toda fuente en vivo (RTSP, webcam, pantalla) corre bajo un SupervisorReconexion del hub.
+            # La conexión inicial no es una reconexión: solo cuenta si aumentó el contador del supervisor.
+            update_stream_stats(system_state['cap'])
+            if system_state['stats']['reconnects'] > last_reconnect_count:
+                last_reconnect_count = system_state['stats']['reconnects']
+                socketio.emit('log', {'message': '✓ Fuente reconectada', 'level': 'success'})
+                zone_mask = None
+                if change_detector is not None:
+                    change_detector.reiniciar()
+                if motion_gate is not None:
+                    motion_gate.reiniciar()
+                if flow_propagator is not None:
+                    flow_propagator.reiniciar()
+            
+            if not format_reported:
+                format_reported = True
+                granted = obtener_formato_captura(system_state['cap'])
+                socketio.emit('log', {
+                    'message': f"Webcam: {granted['fourcc'] or '?'} {granted['ancho']}x{granted['alto']} @ {granted['fps']:.0f} fps",
+                    'level': 'info'
+                })
+            
+            # Frames corruptos (pérdida de paquetes) no llegan al detector ni al tracker
+            if integrity_checker is not None and not integrity_checker.frame_valido(frame):
+                system_state['stats']['corrupted_frames'] = integrity_checker.frames_corruptos
+                continue
+            
             system_state['fps_counter'].registrar_tiempo()
             frame_count += 1
 
+            # 'frame' es el frame de inferencia; 'display_frame' el que se dibuja y transmite
+            if hasattr(system_state['cap'], 'obtener_frame_completo'):
+                scale = system_state['cap'].escala
+                display_frame = system_state['cap'].obtener_frame_completo()
+            else:
+                scale = 1.0
+                display_frame = frame
+
             # Construir/reconstruir máscara combinada de zonas según tamaño del frame
-            if (zone_mask is None) or (zone_mask.shape[0] != frame.shape[0]) or (zone_mask.shape[1] != frame.shape[1]) or (last_zone_count != len(system_state['zones_manager'].zonas)):
+            if (zone_mask is None) or (zone_mask.shape[0] != frame.shape[0]) or (zone_mask.shape[1] != frame.shape[1]) or (last_zone_count != len(system_state['zones_manager'].zonas)) or (zone_mask_scale != scale):
                 if system_state['zones_manager'].zonas:
                     height, width = frame.shape[:2]
                     zone_mask = np.zeros((height, width), dtype=np.uint8)
                     for poly in system_state['zones_manager'].zonas:
-                        cv2.fillPoly(zone_mask, [np.array(poly, dtype=np.int32)], 255)
+                        cv2.fillPoly(zone_mask, [np.array(escalar_poligono(poly, scale), dtype=np.int32)], 255)
+                    zone_integral = integral_mascara(zone_mask)
+                    if config.get('zone_roi', False) or config.get('tile_zones_only', False):
+                        zone_rois = system_state['zones_manager'].rectangulos_zonas(config.get('roi_margin', 80), width, height, scale)
                     last_zone_count = len(system_state['zones_manager'].zonas)
+                    zone_mask_scale = scale
                 else:
                     zone_mask = None
+                    zone_integral = None
+                    zone_rois = None
                     last_zone_count = 0
+                if motion_gate is not None:
+                    motion_gate.establecer_zonas(system_state['zones_manager'].zonas, scale)
             
-            # Skip frames según configuración
-            if config['skip_frames'] > 0 and frame_count % (config['skip_frames'] + 1) != 0:
+            # Skip frames según configuración; frames sin cambios reutilizan las detecciones anteriores
+            is_skipped_frame = skip_frames > 0 and frame_count % (skip_frames + 1) != 0
+            is_unchanged_frame = not is_skipped_frame and change_detector is not None and not change_detector.hay_cambio(frame)
+            is_static_frame = (not is_skipped_frame and not is_unchanged_frame and motion_gate is not None
+                               and not motion_gate.debe_detectar(frame, hay_tracks=len(last_tracks) > 0))
+            detector_latency = None
+            if is_skipped_frame and flow_propagator is not None:
+                # Las cajas siguen al contenido en lugar de quedar congeladas hasta la próxima inferencia
+                dets = last_dets
+                tracks = flow_propagator.propagar(frame, last_tracks)
+                last_tracks = tracks
+            elif is_skipped_frame or is_unchanged_frame or is_static_frame:
                 dets = last_dets
                 tracks = last_tracks
             else:
                 # Detectar personas
-                dets = system_state['detector'].detectar(frame)
+                detection_start = time.perf_counter()
+                if config.get('tiled', False):
+                    dets = system_state['detector'].detectar_mosaico(
+                        frame,
+                        config.get('tile_size', 640),
+                        config.get('tile_overlap', 0.2),
+                        zone_rois if config.get('tile_zones_only', False) else None
+                    )
+                elif zone_rois is not None:
+                    dets = system_state['detector'].detectar_regiones(frame, zone_rois)
+                else:
+                    dets = system_state['detector'].detectar_columnas(frame)
+                detector_latency = time.perf_counter() - detection_start
                 last_dets = dets
                 
                 # Tracking
-                tracks = system_state['tracker'].actualizar(dets)
+                tracks = system_state['tracker'].actualizar_columnas(dets)
                 last_tracks = tracks
+                if flow_propagator is not None:
+                    flow_propagator.inicializar(frame, tracks)
+            if adaptive is not None and adaptive.registrar_frame(detector_latency):
+                socketio.emit('log', {'message': f'Adaptativo: {adaptive.fps_medidos:.1f} FPS -> {adaptive.describir()}', 'level': 'info'})
             
             # Dibujar zonas
             for zone_idx, poly in enumerate(system_state['zones_manager'].zonas):
                 zone_name = system_state['zones_manager'].obtener_nombre_zona(zone_idx)
-                dibujar_zona(frame, poly, color=(0, 0, 255), nombre_zona=zone_name)
+                dibujar_zona(display_frame, poly, color=(0, 0, 255), nombre_zona=zone_name)
             
             # Procesar tracks
             current_in_zone = set()
-            active_track_ids = [t['track_id'] for t in tracks]
+            active_track_ids = tracks.track_id.tolist()
             filtered_count = 0
             
-            for t in tracks:
-                bid = t['track_id']
-                bbox = t['bbox']
-                x, y = bbox_center(bbox)
-                
-                # Buscar confianza
-                conf = t.get('conf', 0.0)
-                if conf == 0.0:
-                    for d in dets:
-                        db = d['bbox']
-                        if abs(db[0]-bbox[0]) < 5 and abs(db[1]-bbox[1]) < 5:
-                            conf = d['conf']
-                            break
-                
-                # Verificar zona usando solapamiento bbox/mascara de zonas (más eficiente que pointPolygonTest)
-                inside = False
-                if system_state['zones_manager'].zonas and zone_mask is not None:
-                    overlap_ratio = bbox_zone_overlap_ratio(bbox, zone_mask)
-                    inside = overlap_ratio >= config.get('zone_overlap_ratio', 0.30)
-                
-                # Filtrado geométrico
-                is_valid_intrusion = False
-                if config['use_geometric_filter'] and system_state['geo_filter']:
-                    validation_result = system_state['geo_filter'].validar_intrusion(
-                        id_track=bid,
-                        bbox=bbox,
-                        confianza=conf,
-                        centro=(x, y),
-                        esta_en_zona=inside
-                    )
-                    is_valid_intrusion = validation_result['is_valid']
-                    if not is_valid_intrusion and inside:
-                        filtered_count += 1
-                else:
-                    is_valid_intrusion = inside
+            # Coordenadas en el frame original para filtro geométrico y dibujo
+            full_tracks = tracks.escalar(escala_inversa(scale))
+            
+            # Verificar zona usando solapamiento bbox/mascara de zonas (imagen integral, todos los tracks a la vez)
+            if system_state['zones_manager'].zonas and zone_integral is not None:
+                inside_all = tracks.solapamiento(zone_integral) >= config.get('zone_overlap_ratio', 0.30)
+            else:
+                inside_all = np.zeros(len(tracks), dtype=bool)
+            
+            # Filtrado geométrico
+            if config['use_geometric_filter'] and system_state['geo_filter']:
+                validation_results = system_state['geo_filter'].validar_intrusiones(full_tracks, inside_all)
+                valid_all = [result['is_valid'] for result in validation_results]
+                filtered_count = sum(1 for valid, inside in zip(valid_all, inside_all) if inside and not valid)
+            else:
+                valid_all = inside_all.tolist()
+            
+            for i, bid in enumerate(active_track_ids):
+                full_bbox = full_tracks.xyxy[i]
+                conf = float(tracks.conf[i])
+                inside = bool(inside_all[i])
+                is_valid_intrusion = valid_all[i]
                 
                 if is_valid_intrusion:
                     current_in_zone.add(bid)
@@ -698,7 +924,7 @@ def run_detection():
                     color = (0, 255, 0)  # Verde
                     label = f'ID:{bid} ({conf:.2f})'
                 
-                dibujar_bounding_box(frame, bbox, etiqueta=label, color=color, grosor=2)
+                dibujar_bounding_box(display_frame, full_bbox, etiqueta=label, color=color, grosor=2)
                 
                 # tracking point removed to match CLI visuals (only bounding box + flash)
                 
@@ -730,9 +956,24 @@ def run_detection():
             system_state['stats']['in_zone'] = len(current_in_zone)
             system_state['stats']['filtered'] = filtered_count
             system_state['stats']['tracks_active'] = len(tracks)
+            system_state['stats']['dropped_frames'] = getattr(system_state['cap'], 'frames_descartados', 0)
+            system_state['stats']['unchanged_skip_rate'] = round(change_detector.obtener_tasa_omision(), 1) if change_detector else 0
+            if config.get('tiled', False) and system_state['detector'].metricas_mosaico:
+                system_state['stats']['tiles'] = system_state['detector'].metricas_mosaico['tiles']
+                system_state['stats']['tile_latency_ms'] = round(system_state['detector'].metricas_mosaico['latencia_tile_ms'], 1)
+            if flow_propagator is not None:
+                system_state['stats']['flow_success_rate'] = round(flow_propagator.obtener_tasa_exito(), 1)
+            if adaptive is not None:
+                system_state['stats']['adaptive_skip'] = adaptive.salto
+                system_state['stats']['adaptive_imgsz'] = adaptive.tam_imagen
+                system_state['stats']['detector_latency_ms'] = round(adaptive.latencia_media * 1000, 1)
+            if motion_gate is not None:
+                motion_rate, tracks_rate, closed_rate = motion_gate.obtener_tasas()
+                system_state['stats']['motion_open_rate'] = round(motion_rate + tracks_rate, 1)
+                system_state['stats']['motion_closed_rate'] = round(closed_rate, 1)
             
             # Convertir frame a JPEG para streaming
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+            _, buffer = cv2.imencode('.jpg', display_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
             frame_base64 = base64.b64encode(buffer).decode('utf-8')
             
             # Emitir frame y stats vía WebSocket
@@ -775,34 +1016,17 @@ def handle_start_zones_stream():
     zones_stream_active[session_id] = True
     
     def stream_worker():
+        cap = None
         try:
             config = system_state['config']
             
-            # Determinar source
-            source_type = config['source_type']
-            if source_type == 'webcam':
-                source = int(config['source_value'])
-            elif source_type == 'rtsp':
-                source = config['rtsp_url']
-            elif source_type == 'video':
-                source = config['video_file']
-            elif source_type == 'screen':
-                monitor = config.get('screen_monitor', '1')
-                source = f'screen:{monitor}'
-            else:
-                source = 0
+            # Las zonas se definen sobre el stream principal cuando hay modo dual
+            source = resolve_source(config, for_zones=True)
             
             print(f'[Zones] Iniciando stream desde: {source}')
             
-            # Crear captura
-            if source_type == 'rtsp':
-                cap = crear_fuente_pantalla(
-                    source,
-                    transporte_rtsp=config.get('rtsp_transport', 'tcp'),
-                    timeout=config.get('timeout', 10000)
-                )
-            else:
-                cap = crear_fuente_pantalla(source)
+            # Suscribirse a la fuente (comparte la decodificación si la detección ya la usa)
+            cap = open_capture(config, source)
             
             if not cap.isOpened():
                 socketio.emit('stream_error', {'message': 'No se pudo abrir la fuente de video'}, room=session_id)
@@ -815,6 +1039,10 @@ def handle_start_zones_stream():
                 ret, frame = cap.read()
                 
                 if not ret or frame is None:
+                    # La fuente en vivo puede estar abriendo o reconectando
+                    if cap.isOpened() and config['source_type'] != 'video':
+                        socketio.sleep(0.1)
+                        continue
                     break
                 
                 # Convertir a JPEG y codificar en base64
@@ -831,7 +1059,6 @@ def handle_start_zones_stream():
                 # Control de frame rate (~15 FPS)
                 socketio.sleep(0.066)
             
-            cap.release()
             print(f'[Zones] Stream detenido para sesión {session_id}')
             
         except Exception as e:
@@ -840,6 +1067,9 @@ def handle_start_zones_stream():
             traceback.print_exc()
             socketio.emit('stream_error', {'message': f'Error en stream: {str(e)}'}, room=session_id)
         finally:
+            # Siempre liberar la suscripción: si no, el hub mantiene la cámara abierta
+            if cap is not None:
+                cap.release()
             zones_stream_active[session_id] = False
     
     # Iniciar thread de streaming
@@ -858,41 +1088,25 @@ def handle_stop_zones_stream():
 @socketio.on('capture_background')
 def handle_capture_background():
     """Captura un frame de la fuente configurada para usar como fondo del editor de zonas"""
+    cap = None
     try:
         config = system_state['config']
-        
-        # Determinar source
-        source_type = config['source_type']
-        if source_type == 'webcam':
-            source = int(config['source_value'])
-        elif source_type == 'rtsp':
-            source = config['rtsp_url']
-        elif source_type == 'video':
-            source = config['video_file']
-        elif source_type == 'screen':
-            monitor = config.get('screen_monitor', '0')
-            source = f'screen:{monitor}' if monitor != '0' else 'screen'
-        else:
-            source = 0
+        source = resolve_source(config, for_zones=True)
         
         print(f'[Zones] Capturando frame de fondo desde: {source}')
         
-        # Crear captura temporal
-        if source_type == 'rtsp':
-            cap = crear_fuente_pantalla(
-                source,
-                transporte_rtsp=config.get('rtsp_transport', 'tcp'),
-                timeout=config.get('timeout', 10000)
-            )
-        else:
-            cap = crear_fuente_pantalla(source)
+        # Suscripción temporal (si la fuente ya está abierta no se reabre)
+        cap = open_capture(config, source)
         
         if not cap.isOpened():
             emit('background_error', {'message': 'No se pudo abrir la fuente de video'})
             return
         
-        # Capturar frame
+        # Capturar frame (una fuente recién abierta puede tardar en entregar el primero)
+        deadline = time.time() + config.get('timeout', 10000) / 1000.0
         ret, frame = cap.read()
+        while not ret and cap.isOpened() and time.time() < deadline:
+            ret, frame = cap.read()
         cap.release()
         
         if not ret or frame is None:
@@ -916,6 +1130,9 @@ def handle_capture_background():
         import traceback
         traceback.print_exc()
         emit('background_error', {'message': f'Error al capturar: {str(e)}'})
+    finally:
+        if cap is not None:
+            cap.release()
 
 # ==================== INICIO ====================
 
@@ -923,6 +1140,9 @@ if __name__ == '__main__':
     # Cargar configuración guardada
     load_config()
     
+    # Precargar y calentar el modelo configurado mientras arranca el servidor
+    threading.Thread(target=preload_model, daemon=True).start()
+    
     print('='*70)
     print('🌐 DASHBOARD WEB - Sistema de Detección de Intrusiones')
     print('='*70)
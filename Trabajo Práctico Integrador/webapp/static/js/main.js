@@ -20,6 +20,12 @@ const statTracks = document.getElementById('stat-tracks');
 const statInZone = document.getElementById('stat-in-zone');
 const statFiltered = document.getElementById('stat-filtered');
 const statAlerts = document.getElementById('stat-alerts');
+const statUnchanged = document.getElementById('stat-unchanged');
+const statCorrupted = document.getElementById('stat-corrupted');
+const statMotion = document.getElementById('stat-motion');
+const statAdaptive = document.getElementById('stat-adaptive');
+const statFlow = document.getElementById('stat-flow');
+const statTiles = document.getElementById('stat-tiles');
 
 // Estado
 let isRunning = false;
@@ -160,6 +166,24 @@ function updateStats(stats) {
     statInZone.textContent = stats.in_zone;
     statFiltered.textContent = stats.filtered;
     statAlerts.textContent = stats.alerts;
+    if (stats.unchanged_skip_rate !== undefined) {
+        statUnchanged.textContent = stats.unchanged_skip_rate + '%';
+    }
+    if (stats.tiles) {
+        statTiles.textContent = stats.tiles + ' (' + stats.tile_latency_ms + ' ms)';
+    }
+    if (stats.flow_success_rate !== undefined) {
+        statFlow.textContent = stats.flow_success_rate + '%';
+    }
+    if (stats.adaptive_imgsz) {
+        statAdaptive.textContent = stats.adaptive_skip + ' / ' + stats.adaptive_imgsz + 'px / ' + stats.detector_latency_ms + ' ms';
+    }
+    if (stats.motion_open_rate !== undefined) {
+        statMotion.textContent = stats.motion_open_rate + '% / ' + stats.motion_closed_rate + '%';
+    }
+    if (stats.corrupted_frames !== undefined) {
+        statCorrupted.textContent = stats.corrupted_frames;
+    }
 }
 
 function addLog(message, level = 'info') {
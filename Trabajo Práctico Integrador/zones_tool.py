@@ -80,12 +80,13 @@ def mostrar_hud(zm, current, disp):
 
 #region Funciones Principales
 
-def main(source=0, out_path=ARCHIVO_ZONAS):
+def main(source=0, out_path=ARCHIVO_ZONAS, fourcc=None, resolucion=None):
     zm = GestorZonas(out_path)
     zm.cargar()
     
     # Abrir camara, video o pantalla usando crear_fuente_pantalla
-    cap = crear_fuente_pantalla(source)
+    # (la webcam debe usar la misma resolucion que main.py para que las zonas coincidan)
+    cap = crear_fuente_pantalla(source, fourcc=fourcc, resolucion=resolucion)
     if not cap.isOpened():
         print(f"ERROR: No se pudo abrir la fuente: {source}")
         print("Tip: usa --source 0 para webcam, --source video.mp4 para un archivo, "
@@ -170,6 +171,9 @@ if __name__ == "__main__":
         '"screen:1" para monitor especifico, "screen:region:x,y,w,h" para region especifica')
     parser.add_argument("--output", default=ARCHIVO_ZONAS, help="Archivo de salida para zonas")
     parser.add_argument("--list_monitors", action="store_true", help="Listar monitores disponibles y salir")
+    parser.add_argument("--cam_fourcc", default=None, help="Formato de pixel de la webcam (MJPG o YUYV), igual que en main.py")
+    parser.add_argument("--cam_width", type=int, default=0, help="Ancho solicitado a la webcam, igual que en main.py")
+    parser.add_argument("--cam_height", type=int, default=0, help="Alto solicitado a la webcam, igual que en main.py")
     args = parser.parse_args()
     if args.list_monitors:
         listar_monitores()
@@ -177,6 +181,7 @@ if __name__ == "__main__":
     source = args.source
     if isinstance(source, str) and source.isdigit():
         source = int(source)
-    main(source=source, out_path=args.output)
+    resolucion = (args.cam_width, args.cam_height) if args.cam_width and args.cam_height else None
+    main(source=source, out_path=args.output, fourcc=args.cam_fourcc, resolucion=resolucion)
 
 #endregion